@@ -0,0 +1,38 @@
+import fakeredis
+import pytest
+import redis
+import redis.asyncio
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    """
+    Serve every Redis client the app creates (streaming, progress, metrics,
+    rate limits) from an in-memory fakeredis server, empty for each test.
+    The Django cache and the process-level registries are reset as well.
+    """
+    from django.core.cache import cache
+
+    from bizlaunch.funnels import catalog, chains, ratelimit, streaming
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis,
+        "from_url",
+        classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)),
+    )
+    monkeypatch.setattr(
+        redis.asyncio.Redis,
+        "from_url",
+        classmethod(
+            lambda cls, url, **kwargs: fakeredis.FakeAsyncRedis(server=server, **kwargs)
+        ),
+    )
+    monkeypatch.setattr(streaming, "_client", None)
+    monkeypatch.setattr(ratelimit, "_script", None)
+    monkeypatch.setattr(ratelimit, "_adjust_script", None)
+    monkeypatch.setattr(chains, "_chains", {})
+    monkeypatch.setattr(catalog, "_local_catalog", None)
+    cache.clear()
+    yield fakeredis.FakeRedis(server=server)
+    cache.clear()
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+
+def make_etag(request, *parts):
+    """
+    Strong ETag of a response from values that change whenever its body
+    does, e.g. updated_at timestamps and child counts, so it can be computed
+    without serializing anything.
+    The query string and the negotiated format are included, as they change
+    the body (pagination links, browsable API) but not those values.
+    """
+    digest = hashlib.sha256()
+    renderer = getattr(request, "accepted_renderer", None)
+    for part in (
+        request.get_full_path(),
+        getattr(renderer, "format", ""),
+        *parts,
+    ):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_not_modified(request, etag):
+    """
+    Whether the request's If-None-Match header matches the ETag. If-None-Match
+    uses the weak comparison, so a W/ prefix added by a proxy still matches.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in (tag.removeprefix("W/") for tag in etags)
+
+
+def not_modified_response(etag):
+    """
+    Empty 304 response for a matching If-None-Match, returned before any
+    serializer or renderer runs.
+    """
+    return set_etag(HttpResponseNotModified(), etag)
+
+
+def set_etag(response, etag):
+    """
+    Add the ETag to a response. The responses are user specific, so they may
+    only be stored privately and are revalidated on every use.
+    """
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,138 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination for CoreModel querysets, newest first, on the indexed
+    created_at with the uuid as tie-break.
+
+    A cursor holds the (created_at, uuid) of the row a page starts after, so
+    every page is a range scan from that key: no COUNT(*) and no OFFSET, and
+    deep pages cost the same as the first one. Rows created or deleted while
+    a client pages through never shift the pages.
+
+    Response data:
+    {
+        "next": "...?cursor=...",
+        "previous": "...?cursor=...",
+        "next_cursor": "...",
+        "previous_cursor": "...",
+        "page_size": 10,
+        "results": [...]
+    }
+    """
+
+    ordering = ("-created_at", "-uuid")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            reverse, created_at, uuid = cursor
+            if reverse:
+                # Rows before the cursor, read oldest first
+                queryset = queryset.filter(created_at__gte=created_at).filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, uuid__gt=uuid)
+                )
+            else:
+                queryset = queryset.filter(created_at__lte=created_at).filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, uuid__lt=uuid)
+                )
+
+        if reverse:
+            queryset = queryset.order_by("created_at", "uuid")
+        else:
+            queryset = queryset.order_by("-created_at", "-uuid")
+
+        # One extra row tells whether there is another page.
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.next_cursor = None
+        self.previous_cursor = None
+        if self.page and self.has_next:
+            self.next_cursor = self.encode_position(self.page[-1], reverse=False)
+        if self.page and self.has_previous:
+            self.previous_cursor = self.encode_position(self.page[0], reverse=True)
+        return self.page
+
+    def encode_position(self, instance, reverse):
+        """
+        Opaque cursor of the rows after (or, when reverse, before) an instance.
+        """
+        value = f"{int(reverse)}|{instance.created_at.isoformat()}|{instance.uuid}"
+        return urlsafe_b64encode(value.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        """
+        Read the request's cursor.
+        Returns:
+            tuple: (reverse, created_at, uuid), or None without a cursor
+        Raises:
+            NotFound: If the cursor is malformed
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            reverse, created_at, uuid = (
+                urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            )
+            return reverse == "1", datetime.fromisoformat(created_at), UUID(uuid)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if self.previous_cursor is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.previous_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "next_cursor": self.next_cursor,
+                "previous_cursor": self.previous_cursor,
+                "page_size": self.page_size,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"].update(
+            {
+                "next_cursor": {"type": "string", "nullable": True},
+                "previous_cursor": {"type": "string", "nullable": True},
+                "page_size": {"type": "integer"},
+            }
+        )
+        return response_schema
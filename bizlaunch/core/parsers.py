@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from bizlaunch.core.renderers import ApiORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser decoding with orjson. Falls back to the stdlib decoder when
+    orjson is not installed.
+    """
+
+    renderer_class = ApiORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON and returns the resulting data.
+        """
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            content = stream.read()
+            # orjson reads UTF-8 only; other charsets are decoded first.
+            if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f"JSON parse error - {str(exc)}")
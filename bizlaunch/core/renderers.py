@@ -0,0 +1,293 @@
+from typing import Any, Dict, Optional
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+# Datetimes are passed to DRF's encoder, whose format differs from orjson's
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+# Keys of error responses that are not field names
+DEFAULT_RESPONSE_KEYS = {
+    "status",
+    "success",
+    "message",
+    "data",
+    "pagination",
+    "detail",
+    "non_field_errors",
+}
+
+# Paths that are never wrapped in the envelope
+SKIP_PATHS = ("/swagger", "/redoc", "/admin", "/static", "/media")
+
+# Standard status messages
+STATUS_MESSAGES = {
+    200: _("Success"),
+    201: _("Created Successfully"),
+    204: _("Deleted Successfully"),
+    400: _("Bad Request"),
+    401: _("Unauthorized"),
+    403: _("Permission Denied"),
+    404: _("Not Found"),
+    405: _("Method Not Allowed"),
+    500: _("Internal Server Error"),
+}
+
+
+def should_wrap_response(request) -> bool:
+    """
+    Determine if the response should be wrapped based on the request path.
+    Returns:
+        bool: True for API requests outside the documentation paths
+    """
+    path = request.path_info.lower().rstrip("/")
+
+    # Skip if not an API request
+    if not path.startswith("/api"):
+        return False
+
+    # Skip documentation and other excluded paths
+    return not any(path.startswith(skip_path) for skip_path in SKIP_PATHS)
+
+
+def get_default_message(status_code: int) -> str:
+    """
+    Get default message for status code.
+    Args:
+        status_code (int): HTTP status code
+    Returns:
+        str: Default message for the status code
+    """
+    return STATUS_MESSAGES.get(status_code, _("Unknown Status"))
+
+
+def format_error_message(response_data: Any) -> str:
+    """
+    Format error messages from various error types into a standardized format.
+    Args:
+        response_data: The error response data
+    Returns:
+        str: Formatted error message
+    """
+    if isinstance(response_data, str):
+        return response_data
+
+    if isinstance(response_data, dict):
+        error_messages = []
+
+        # Handle non_field_errors
+        if "non_field_errors" in response_data:
+            error_messages.extend(response_data["non_field_errors"])
+
+        # Handle 'detail' error
+        if "detail" in response_data:
+            error_messages.append(str(response_data["detail"]))
+
+        # Handle field-specific errors
+        for key, value in response_data.items():
+            if key not in DEFAULT_RESPONSE_KEYS:
+                if isinstance(value, list):
+                    error_messages.append(f"{key}: {' '.join(str(v) for v in value)}")
+                else:
+                    error_messages.append(f"{key}: {str(value)}")
+
+        return " | ".join(error_messages) if error_messages else _("An error occurred")
+
+    return str(response_data)
+
+
+def is_paginated(response_data: Any) -> bool:
+    """
+    Whether response data comes from a page number or keyset paginator.
+    """
+    return (
+        isinstance(response_data, dict)
+        and "results" in response_data
+        and ("count" in response_data or "next_cursor" in response_data)
+    )
+
+
+def get_pagination(response_data: dict, request) -> dict:
+    """
+    Standardized pagination data of a paginated response.
+    Keyset pages (see bizlaunch.core.pagination) have no count or page
+    number; they expose the cursors of the next and previous pages instead.
+    Args:
+        response_data (Dict): The paginator's response data
+        request: The request, for the current page
+    Returns:
+        Dict: Standardized pagination data
+    """
+    if "next_cursor" in response_data:
+        return {
+            "page_size": response_data.get("page_size", len(response_data["results"])),
+            "next": response_data.get("next"),
+            "previous": response_data.get("previous"),
+            "next_cursor": response_data.get("next_cursor"),
+            "previous_cursor": response_data.get("previous_cursor"),
+        }
+
+    try:
+        current_page = int(request.query_params.get("page", 1))
+    except ValueError:
+        current_page = 1
+
+    return {
+        "count": response_data.get("count", 0),
+        "page_size": response_data.get("page_size", len(response_data.get("results", []))),
+        "current_page": current_page,
+        "next": response_data.get("next"),
+        "previous": response_data.get("previous"),
+    }
+
+
+def create_envelope(
+    status_code: int, success: bool, message: str = None, data: Any = None, pagination: Optional[Dict] = None
+) -> Dict:
+    """
+    Create standardized response dictionary.
+    Args:
+        status_code (int): HTTP status code
+        success (bool): Success status
+        message (str, optional): Response message
+        data (Any, optional): Response data
+        pagination (Dict, optional): Pagination information
+    Returns:
+        Dict: Standardized response dictionary
+    """
+    response = {
+        "status": status_code,
+        "success": success,
+        "message": message or get_default_message(status_code),
+        "data": data if data is not None else {},
+    }
+
+    if pagination:
+        response["pagination"] = pagination
+
+    return response
+
+
+def wrap_response_data(data: Any, status_code: int, request) -> Dict:
+    """
+    Wrap a view's response data in the standard envelope.
+    The data is referenced, not copied: the envelope only adds keys around it.
+    Args:
+        data: The response data as returned by the view
+        status_code (int): HTTP status code of the response
+        request: The request object
+    Returns:
+        Dict: Standardized response dictionary
+    """
+    # Handle successful responses
+    if status_code < 400:
+        # Check for pagination
+        if is_paginated(data):
+            return create_envelope(
+                status_code=status_code,
+                success=True,
+                data=data["results"],
+                pagination=get_pagination(data, request),
+            )
+        return create_envelope(status_code=status_code, success=True, data=data)
+
+    # Handle error responses
+    return create_envelope(
+        status_code=status_code,
+        success=False,
+        message=format_error_message(data),
+        data=data if isinstance(data, dict) else None,
+    )
+
+
+class ApiJSONRenderer(JSONRenderer):
+    """
+    JSON renderer producing the standard API response envelope, so that
+    each response is serialized exactly once.
+
+    Standard Response Format:
+    {
+        "status": 200,
+        "success": true,
+        "message": "Success",
+        "data": { ... }
+    }
+
+    Paginated Response Format:
+    {
+        "status": 200,
+        "success": true,
+        "message": "Success",
+        "data": [...],
+        "pagination": {
+            "count": 100,
+            "page_size": 5,
+            "current_page": 1,
+            "next": "...",
+            "previous": "..."
+        }
+    }
+
+    Keyset paginated responses replace count and current_page with
+    "next_cursor" and "previous_cursor".
+
+    Error Response Format:
+    {
+        "status": 400,
+        "success": false,
+        "message": "error message here",
+        "data": { ... }  # Original error data
+    }
+    """
+
+    def get_envelope(self, data, renderer_context):
+        """
+        The data to render: the envelope around the view's data for API
+        responses, or the data unchanged for other paths.
+        """
+        renderer_context = renderer_context or {}
+        request = renderer_context.get("request")
+        response = renderer_context.get("response")
+        if request is None or response is None or not should_wrap_response(request):
+            return data
+        return wrap_response_data(data, response.status_code, request)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(
+            self.get_envelope(data, renderer_context), accepted_media_type, renderer_context
+        )
+
+
+class ApiORJSONRenderer(ApiJSONRenderer):
+    """
+    ApiJSONRenderer serializing with orjson, several times faster than the
+    stdlib encoder on large responses.
+    UUIDs, strings, numbers and containers are encoded natively; datetimes,
+    decimals, lazy translation strings and anything else go through DRF's
+    encoder, so the output matches ApiJSONRenderer. Falls back to it when
+    orjson is not installed or indented output is requested, e.g. by the
+    browsable API.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        data = self.get_envelope(data, renderer_context)
+        if data is None:
+            return b""
+        ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=ORJSON_OPTIONS)
+        # Escape \u2028 and \u2029 like DRF, keeping the output a strict
+        # javascript subset.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
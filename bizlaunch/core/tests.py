@@ -1,3 +1,150 @@
-from django.test import TestCase
+import json
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.test import RequestFactory, TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from bizlaunch.core.conditional import is_not_modified, make_etag
+from bizlaunch.core.pagination import KeysetPagination
+from bizlaunch.core.renderers import ApiJSONRenderer, ApiORJSONRenderer
+from bizlaunch.funnels.models import Project
+from bizlaunch.users.models import User
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="pages@example.com", password="pw")
+        for i in range(7):
+            Project.objects.create(user=cls.user, name=f"Project {i}")
+        cls.expected = list(Project.objects.order_by("-created_at", "-uuid"))
+
+    def paginate(self, cursor=None):
+        paginator = KeysetPagination()
+        paginator.page_size = 3
+        query = {} if cursor is None else {"cursor": cursor}
+        request = Request(APIRequestFactory().get("/api/copy/projects/", query))
+        page = paginator.paginate_queryset(Project.objects.all(), request)
+        return paginator, page
+
+    def test_next_cursors_walk_every_row_once(self):
+        paginator, page = self.paginate()
+        rows = list(page)
+        self.assertIsNone(paginator.previous_cursor)
+        while paginator.next_cursor:
+            paginator, page = self.paginate(paginator.next_cursor)
+            rows.extend(page)
+        self.assertEqual(rows, self.expected)
+        self.assertEqual(len(page), 1)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        first, first_page = self.paginate()
+        second, second_page = self.paginate(first.next_cursor)
+        self.assertEqual(second_page, self.expected[3:6])
+
+        previous, previous_page = self.paginate(second.previous_cursor)
+        self.assertEqual(previous_page, first_page)
+        self.assertIsNone(previous.previous_cursor)
+        self.assertEqual(previous.next_cursor, first.next_cursor)
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        first, _ = self.paginate()
+        Project.objects.create(user=self.user, name="Newer")
+        _, second_page = self.paginate(first.next_cursor)
+        self.assertEqual(second_page, self.expected[3:6])
+
+    def test_malformed_cursor_is_not_found(self):
+        with self.assertRaises(NotFound):
+            self.paginate("not-a-cursor")
+
+    def test_paginated_response(self):
+        paginator, page = self.paginate()
+        data = paginator.get_paginated_response([project.name for project in page]).data
+        self.assertEqual(data["page_size"], 3)
+        self.assertEqual(data["next_cursor"], paginator.next_cursor)
+        self.assertEqual(parse_qs(urlparse(data["next"]).query)["cursor"], [paginator.next_cursor])
+        self.assertIsNone(data["previous"])
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_is_not_modified(self):
+        etag = '"abc"'
+        cases = [
+            ({}, False),
+            ({"HTTP_IF_NONE_MATCH": '"abc"'}, True),
+            ({"HTTP_IF_NONE_MATCH": 'W/"abc"'}, True),
+            ({"HTTP_IF_NONE_MATCH": '"xyz", "abc"'}, True),
+            ({"HTTP_IF_NONE_MATCH": "*"}, True),
+            ({"HTTP_IF_NONE_MATCH": '"xyz"'}, False),
+        ]
+        for headers, expected in cases:
+            with self.subTest(headers=headers):
+                request = self.factory.get("/api/copy/jobs/", **headers)
+                self.assertEqual(is_not_modified(request, etag), expected)
+
+    def test_make_etag_depends_on_parts_and_query(self):
+        request = self.factory.get("/api/copy/jobs/")
+        etag = make_etag(request, "a", 1)
+        self.assertEqual(etag, make_etag(request, "a", 1))
+        self.assertNotEqual(etag, make_etag(request, "a", 2))
+        self.assertNotEqual(etag, make_etag(self.factory.get("/api/copy/jobs/?cursor=x"), "a", 1))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+
+class EnvelopeRendererTests(TestCase):
+    def render(self, data, status_code=200, path="/api/copy/jobs/", renderer=None):
+        renderer = renderer or ApiJSONRenderer()
+        context = {
+            "request": Request(APIRequestFactory().get(path)),
+            "response": Response(status=status_code),
+        }
+        return json.loads(renderer.render(data, "application/json", context))
+
+    def test_success_is_wrapped(self):
+        body = self.render({"uuid": "1"}, 201)
+        self.assertEqual(
+            body,
+            {"status": 201, "success": True, "message": "Created Successfully", "data": {"uuid": "1"}},
+        )
+
+    def test_page_number_pagination(self):
+        body = self.render({"count": 12, "next": "n", "previous": None, "results": [1, 2]})
+        self.assertEqual(body["data"], [1, 2])
+        self.assertEqual(
+            body["pagination"],
+            {"count": 12, "page_size": 2, "current_page": 1, "next": "n", "previous": None},
+        )
+
+    def test_keyset_pagination(self):
+        body = self.render(
+            {
+                "next": "n",
+                "previous": None,
+                "next_cursor": "c",
+                "previous_cursor": None,
+                "page_size": 10,
+                "results": [1],
+            }
+        )
+        self.assertEqual(body["data"], [1])
+        self.assertEqual(body["pagination"]["next_cursor"], "c")
+        self.assertNotIn("count", body["pagination"])
+
+    def test_errors_are_flattened_into_the_message(self):
+        body = self.render({"name": ["This field is required."]}, 400)
+        self.assertFalse(body["success"])
+        self.assertEqual(body["message"], "name: This field is required.")
+        self.assertEqual(body["data"], {"name": ["This field is required."]})
+
+    def test_paths_outside_the_api_are_not_wrapped(self):
+        self.assertEqual(self.render({"a": 1}, path="/swagger/"), {"a": 1})
+
+    def test_orjson_renderer_matches_the_stdlib_renderer(self):
+        data = {"results": [{"name": "café", "n": 1.5}], "count": 1, "next": None}
+        self.assertEqual(self.render(data, renderer=ApiORJSONRenderer()), self.render(data))
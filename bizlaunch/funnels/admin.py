@@ -2,6 +2,8 @@ from django.contrib import admin
 
 from .models import (
     AdCopy,
+    ClientUpload,
+    CopyBatch,
     CopyJob,
     FunnelTemplate,
     PageImage,
@@ -10,6 +12,15 @@ from .models import (
     SystemTemplate,
 )
 
+USAGE_FIELDS = (
+    "input_tokens",
+    "cached_tokens",
+    "image_tokens",
+    "output_tokens",
+    "latency_ms",
+    "cost_usd",
+)
+
 
 @admin.register(SystemTemplate)
 class SystemTemplateAdmin(admin.ModelAdmin):
@@ -40,23 +51,56 @@ class PageTemplateAdmin(admin.ModelAdmin):
 
 @admin.register(PageImage)
 class PageImageAdmin(admin.ModelAdmin):
-    list_display = ("page", "order")
+    list_display = ("page", "order", "mime_type", "width", "height")
     list_filter = ("page",)
     ordering = ("order",)
-    readonly_fields = ("image_content",)
+    readonly_fields = ("content_hash", "width", "height", "mime_type")
 
 
 @admin.register(CopyJob)
 class CopyJobAdmin(admin.ModelAdmin):
-    list_display = ("system", "status", "user")
-    list_filter = ("status", "system", "user")
+    list_display = ("system", "status", "user", "use_batch", "latency_ms", "cost_usd")
+    list_filter = ("status", "use_batch", "system", "user")
     search_fields = ("system__name", "user__username")
-    readonly_fields = ("client_file",)
+    readonly_fields = (
+        "client_file",
+        "parent",
+        "row_number",
+        "rows_ingested",
+        "row_count",
+        *USAGE_FIELDS,
+    )
 
 
 @admin.register(AdCopy)
 class AdCopyAdmin(admin.ModelAdmin):
-    list_display = ("copy_job", "funnel", "page")
-    list_filter = ("copy_job", "funnel", "page")
+    list_display = (
+        "copy_job",
+        "funnel",
+        "page",
+        "status",
+        "model",
+        "latency_ms",
+        "input_tokens",
+        "output_tokens",
+        "cost_usd",
+    )
+    list_filter = ("status", "model", "copy_job", "funnel", "page")
     search_fields = ("copy_job__uuid", "funnel__name", "page__name")
-    readonly_fields = ("copy_text", "copy_json")
+    readonly_fields = ("copy_text", "copy_json", "error", "model", *USAGE_FIELDS)
+
+
+@admin.register(ClientUpload)
+class ClientUploadAdmin(admin.ModelAdmin):
+    list_display = ("filename", "user", "status", "offset", "size", "created_at")
+    list_filter = ("status",)
+    search_fields = ("uuid", "filename", "user__email")
+    readonly_fields = ("file", "size", "offset", "checksum")
+
+
+@admin.register(CopyBatch)
+class CopyBatchAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "status", "request_count", "created_at", "completed_at")
+    list_filter = ("status", "backend")
+    search_fields = ("uuid", "batch_id")
+    readonly_fields = ("backend", "batch_id", "input_file", "request_count", "error")
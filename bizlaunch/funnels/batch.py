@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import uuid
+from decimal import Decimal
+
+import openai
+from django.conf import settings
+from django.utils.module_loading import import_string
+from langchain_core.messages import convert_to_messages, convert_to_openai_messages
+
+from bizlaunch.funnels.chains import api_key
+from bizlaunch.funnels.fakes import FakeAdCopyChatModel
+from bizlaunch.funnels.prompts import build_messages, output_components
+from bizlaunch.funnels.routing import Priority, estimate_cost, route_for
+
+logger = logging.getLogger(__name__)
+
+# Provider endpoint every batch request is sent to
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch requests are billed at half the real-time price
+BATCH_PRICE_FACTOR = 0.5
+
+
+class BatchStatus:
+    """
+    States a batch backend reports for a submitted batch.
+    """
+
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BatchError(Exception):
+    """
+    A single request of a batch that failed at the provider.
+    """
+
+
+def batch_custom_id(job, image):
+    """
+    Identifies the request of one page of one job within a batch.
+    """
+    return f"{job.uuid}:{image.uuid}"
+
+
+def build_batch_request(job, image, instructions):
+    """
+    One JSONL line of a batch file: the same chat request the real-time
+    chain would make for the page.
+    """
+    data = {"image": image, "instructions": instructions, "priority": Priority.LOW}
+    body = {
+        "model": route_for(data).model,
+        "messages": convert_to_openai_messages(build_messages(data)),
+    }
+    if output_components(data):
+        body["response_format"] = {"type": "json_object"}
+    return {
+        "custom_id": batch_custom_id(job, image),
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": body,
+    }
+
+
+def batch_usage_fields(body):
+    """
+    AdCopy usage fields of one successful batch response.
+    """
+    usage = body.get("usage") or {}
+    model = body.get("model", "")
+    input_tokens = usage.get("prompt_tokens", 0)
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    output_tokens = usage.get("completion_tokens", 0)
+    cost = estimate_cost(model, input_tokens, cached_tokens, output_tokens)
+    return {
+        "model": model,
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": None if cost is None else Decimal(f"{cost * BATCH_PRICE_FACTOR:.6f}"),
+    }
+
+
+def parse_batch_output(content: bytes):
+    """
+    Read a batch results file.
+    Returns:
+        tuple: (dict of the model output text, or a BatchError, per
+        custom_id; dict of the AdCopy usage fields per custom_id)
+    """
+    results = {}
+    usages = {}
+    for line in content.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        body = response.get("body") or {}
+        if result.get("error"):
+            output = BatchError(result["error"].get("message", "Request failed"))
+        elif response.get("status_code") != 200:
+            error = body.get("error") or {}
+            output = BatchError(
+                error.get("message", f"Request failed with {response.get('status_code')}")
+            )
+        else:
+            output = body["choices"][0]["message"]["content"]
+            usages[result["custom_id"]] = batch_usage_fields(body)
+        results[result["custom_id"]] = output
+    return results, usages
+
+
+class BaseBatchBackend:
+    """
+    Interface of batch backends, selected by ADCOPY_BATCH_BACKEND.
+    """
+
+    def submit(self, input_file):
+        """
+        Submit a JSONL batch file and return the backend's batch id.
+        """
+        raise NotImplementedError
+
+    def poll(self, batch_id):
+        """
+        Check on a submitted batch.
+        Returns:
+            tuple: (BatchStatus, results file content or None, error message)
+        """
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BaseBatchBackend):
+    """
+    OpenAI's Batch API: requests are processed within 24 hours at a
+    fraction of the real-time price and outside the real-time rate limits.
+    """
+
+    # Batches in these states have stopped; whatever finished is ingested.
+    finished_statuses = ("completed", "expired", "cancelled")
+
+    def __init__(self):
+        self.client = openai.OpenAI(api_key=api_key)
+
+    def submit(self, input_file):
+        with input_file.open("rb") as f:
+            uploaded = self.client.files.create(
+                file=(os.path.basename(input_file.name), f), purpose="batch"
+            )
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "failed":
+            errors = batch.errors.data if batch.errors else []
+            return (
+                BatchStatus.FAILED,
+                None,
+                "; ".join(error.message for error in errors) or "Batch failed",
+            )
+        if batch.status not in self.finished_statuses:
+            return BatchStatus.PENDING, None, ""
+
+        # Successful and failed requests come back in separate files.
+        content = b""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content += self.client.files.content(file_id).content.rstrip(b"\n") + b"\n"
+        return BatchStatus.COMPLETED, content, ""
+
+
+class FileSystemBatchBackend(BaseBatchBackend):
+    """
+    Local stand-in for a provider batch API, for tests and development.
+    Batches live in ADCOPY_BATCH_FAKE_DIR and are answered by the offline
+    fake chat model the first time they are polled.
+    """
+
+    def __init__(self):
+        self.root = settings.ADCOPY_BATCH_FAKE_DIR
+
+    def submit(self, input_file):
+        batch_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.root, batch_id))
+        with input_file.open("rb") as f, open(
+            os.path.join(self.root, batch_id, "input.jsonl"), "wb"
+        ) as out:
+            out.write(f.read())
+        return batch_id
+
+    def poll(self, batch_id):
+        output_path = os.path.join(self.root, batch_id, "output.jsonl")
+        if not os.path.exists(output_path):
+            self.process(batch_id, output_path)
+        with open(output_path, "rb") as f:
+            return BatchStatus.COMPLETED, f.read(), ""
+
+    def process(self, batch_id, output_path):
+        model = FakeAdCopyChatModel(model_name=settings.ADCOPY_MODEL, latency=0)
+        with open(os.path.join(self.root, batch_id, "input.jsonl"), "rb") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        with open(output_path, "w") as out:
+            for request in requests:
+                message = model.invoke(convert_to_messages(request["body"]["messages"]))
+                result = {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "model": request["body"]["model"],
+                            "usage": {
+                                "prompt_tokens": message.usage_metadata["input_tokens"],
+                                "completion_tokens": message.usage_metadata["output_tokens"],
+                                "prompt_tokens_details": {
+                                    "cached_tokens": message.usage_metadata[
+                                        "input_token_details"
+                                    ]["cache_read"]
+                                },
+                            },
+                            "choices": [
+                                {"message": {"role": "assistant", "content": message.content}}
+                            ]
+                        },
+                    },
+                    "error": None,
+                }
+                out.write(json.dumps(result) + "\n")
+
+
+def get_batch_backend(path=None):
+    """
+    Instantiate the batch backend at the given dotted path, by default
+    the one configured by ADCOPY_BATCH_BACKEND.
+    """
+    return import_string(path or settings.ADCOPY_BATCH_BACKEND)()
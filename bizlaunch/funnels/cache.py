@@ -0,0 +1,55 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "adcopy:response"
+
+
+def adcopy_cache_key(system_prompt, instructions, image, model):
+    """
+    Build a content-addressed cache key for one ad copy generation.
+    Any change to the prompt, the instructions, the model or the image
+    bytes yields a different key, so entries never need invalidating.
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, instructions, image or ""):
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(hashlib.sha256(part).digest())
+    return f"{CACHE_KEY_PREFIX}:{digest.hexdigest()}"
+
+
+def get_cached_ad_copy(key):
+    """
+    Return the cached ad copy for the key, or None on a miss.
+    """
+    if not settings.ADCOPY_CACHE_ENABLED:
+        return None
+    try:
+        return cache.get(key)
+    except Exception as e:
+        # The cache is an optimization; never fail a generation because of it.
+        logger.warning(f"Ad copy cache lookup failed: {str(e)}")
+        return None
+
+
+def set_cached_ad_copy(key, copy_text):
+    """
+    Store generated ad copy under the key.
+    Entries expire after ADCOPY_CACHE_TIMEOUT and entries larger than
+    ADCOPY_CACHE_MAX_ENTRY_SIZE are not stored. Since every entry has a TTL,
+    Redis' volatile-* maxmemory policies evict these first under memory
+    pressure, which bounds the total size of the cache.
+    """
+    if not settings.ADCOPY_CACHE_ENABLED:
+        return
+    if len(copy_text.encode("utf-8")) > settings.ADCOPY_CACHE_MAX_ENTRY_SIZE:
+        return
+    try:
+        cache.set(key, copy_text, timeout=settings.ADCOPY_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Ad copy cache store failed: {str(e)}")
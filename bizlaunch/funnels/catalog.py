@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bizlaunch.core.renderers import ApiORJSONRenderer, create_envelope
+from bizlaunch.funnels.models import SystemTemplate
+from bizlaunch.funnels.serializers import SystemTemplateSerializer
+
+logger = logging.getLogger(__name__)
+
+CATALOG_KEY_PREFIX = "funnels:catalog"
+CATALOG_VERSION_KEY = f"{CATALOG_KEY_PREFIX}:version"
+
+# This process's copy of the catalog: (version, etag, content, checked_at)
+_local_catalog = None
+
+
+def catalog_key(version):
+    """
+    Cache key of the rendered catalog of a version.
+    """
+    return f"{CATALOG_KEY_PREFIX}:{version}"
+
+
+def render_catalog():
+    """
+    Render the catalog response body, envelope included, from the database.
+    """
+    systems = SystemTemplate.objects.all()
+    data = SystemTemplateSerializer(systems, many=True).data
+    return ApiORJSONRenderer().render(create_envelope(200, True, data=data))
+
+
+def catalog_etag(content):
+    """
+    Strong ETag of a rendered catalog. It is derived from the content, not
+    the version, which starts over when the cache is flushed.
+    """
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def get_catalog_version():
+    """
+    Current catalog version, shared by all processes through the cache.
+    """
+    cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+    return cache.get(CATALOG_VERSION_KEY)
+
+
+def get_catalog():
+    """
+    The rendered funnel catalog served by FunnelSystemsAPIView.
+    Each process keeps the latest version in memory and serves it without
+    any query; once FUNNEL_CATALOG_VERSION_CHECK_INTERVAL has passed it
+    compares its version with the shared one. A new version is read from the
+    cache, where the first process to need it stored it after rendering it.
+    Returns:
+        tuple: (ETag, response body bytes)
+    """
+    global _local_catalog
+
+    now = time.monotonic()
+    local = _local_catalog
+    if local is not None and now - local[3] < settings.FUNNEL_CATALOG_VERSION_CHECK_INTERVAL:
+        return local[1], local[2]
+
+    try:
+        version = get_catalog_version()
+        if local is not None and local[0] == version:
+            _local_catalog = (version, local[1], local[2], now)
+            return local[1], local[2]
+        content = cache.get(catalog_key(version))
+        if content is None:
+            # The version is read before the database, so the stored
+            # content is never older than its version.
+            content = render_catalog()
+            cache.set(
+                catalog_key(version),
+                content,
+                timeout=settings.FUNNEL_CATALOG_CACHE_TIMEOUT,
+            )
+            logger.info(f"Rendered funnel catalog version {version}")
+    except Exception as e:
+        # The cache is an optimization; never fail the catalog because of it.
+        logger.warning(f"Funnel catalog cache unavailable: {str(e)}")
+        content = render_catalog()
+        return catalog_etag(content), content
+
+    etag = catalog_etag(content)
+    _local_catalog = (version, etag, content, now)
+    return etag, content
+
+
+def invalidate_catalog():
+    """
+    Start a new catalog version, so that every process renders or reads
+    the catalog again on its next version check.
+    """
+    global _local_catalog
+
+    _local_catalog = None
+    try:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.incr(CATALOG_VERSION_KEY)
+        logger.info(f"Funnel catalog invalidated, now at version {version}")
+    except Exception as e:
+        logger.warning(f"Could not invalidate the funnel catalog: {str(e)}")
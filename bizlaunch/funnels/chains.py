@@ -1,109 +1,391 @@
-import base64
+import asyncio
+import threading
 
 from decouple import config
-from langchain_core.messages import HumanMessage, SystemMessage
+from django.conf import settings
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnableBranch, RunnableLambda
 from langchain_openai import ChatOpenAI
 
+from bizlaunch.funnels.cache import (
+    adcopy_cache_key,
+    get_cached_ad_copy,
+    set_cached_ad_copy,
+)
+from bizlaunch.funnels.fakes import FakeAdCopyChatModel
+from bizlaunch.funnels.images import estimate_image_tokens
+from bizlaunch.funnels.metrics import ModelCallMetricsHandler
 from bizlaunch.funnels.models import PageImage
+from bizlaunch.funnels.prompts import (
+    build_messages,
+    get_prompt_parts,
+    output_components,
+)
+from bizlaunch.funnels.ratelimit import (
+    RateLimitSettlementHandler,
+    estimate_tokens,
+    get_rate_limiter,
+)
+from bizlaunch.funnels.resilience import (
+    CircuitBreaker,
+    acall_with_retries,
+    astream_with_retries,
+    call_with_retries,
+    stream_with_retries,
+)
+from bizlaunch.funnels.routing import Priority, route_for
+from bizlaunch.funnels.structured import parse_copy_json
 
 api_key = config("OPENAI_API_KEY")
 
+# Process-level registry of ad copy chains, keyed by model name and options.
+# Each chain owns one chat model client, so its HTTP connection pool is kept
+# alive and reused across pages and jobs handled by this process.
+_chains = {}
+_chains_lock = threading.Lock()
+_event_loop = None
 
-def create_adcopy_chain():
-    # System prompt template
-    SYSTEM_PROMPT = """You are an expert advertising copywriter. Analyze the provided webpage image and user instructions to generate compelling ad copy.
-
-    Output Format:
-    - Return the copy in clear sections using markdown-style headers
-    - Each section should address a specific component from the page
-    - Include both textual and visual analysis insights
-    - Maintain brand voice specified in the instructions
-
-    Example Response:
-    ### Main Headline
-    Experience the Future of Fitness
-
-    ### Hero Section
-    Our state-of-the-art equipment and personalized training programs are designed to help you achieve your goals faster.
-
-    ### Call-to-Action
-    Join us today and transform your fitness journey. Click below to get started."""
-
-    def prepare_messages(data: dict):
-        return [
-            SystemMessage(content=SYSTEM_PROMPT),
-            HumanMessage(
-                content=[
-                    {
-                        "type": "text",
-                        "text": f"User Instructions:\n{data['instructions']}",
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{data['image_base64']}",
-                            "detail": "auto",
-                        },
-                    },
-                ]
-            ),
-        ]
-
-    # Chain construction
-    # prompt = ChatPromptTemplate.from_messages(
-    #     [
-    #         ("system", SYSTEM_PROMPT),
-    #         (
-    #             "human",
-    #             [
-    #                 {"type": "text", "text": "User Instructions:\n{instructions}"},
-    #                 {
-    #                     "type": "image_url",
-    #                     "image_url": "{image_data}",
-    #                 },
-    #             ],
-    #         ),
-    #     ]
-    # )
-
-    return (
-        RunnableLambda(prepare_messages)
-        | ChatOpenAI(model="gpt-4o", api_key=api_key)
-        | StrOutputParser()
+
+def get_chat_model(model=None, **options):
+    """
+    Return the chat model configured by ADCOPY_LLM_BACKEND.
+    The "fake" backend runs offline and is used for tests and benchmarks.
+    """
+    model = model or settings.ADCOPY_MODEL
+    callbacks = [ModelCallMetricsHandler(model)]
+    if settings.ADCOPY_LLM_BACKEND == "fake":
+        return FakeAdCopyChatModel(
+            model_name=model, latency=settings.ADCOPY_FAKE_LATENCY, callbacks=callbacks
+        )
+    # Retries are handled by the chain's resilience layer, not the client.
+    options.setdefault("max_retries", 0)
+    # Streamed calls report token usage too, including cached input tokens.
+    options.setdefault("stream_usage", True)
+    return ChatOpenAI(model=model, api_key=api_key, callbacks=callbacks, **options)
+
+
+def get_adcopy_chain(model=None, **options):
+    """
+    Return the shared ad copy chain for the given model and options,
+    building it on first use in this process.
+    """
+    key = (
+        settings.ADCOPY_LLM_BACKEND,
+        model or settings.ADCOPY_MODEL,
+        tuple(sorted(options.items())),
     )
+    chain = _chains.get(key)
+    if chain is None:
+        with _chains_lock:
+            chain = _chains.get(key)
+            if chain is None:
+                chain = create_adcopy_chain(
+                    get_chat_model(key[1], **options),
+                    rate_limiter=get_rate_limiter(key[1]),
+                    breaker=CircuitBreaker(key[1]),
+                )
+                _chains[key] = chain
+    return chain
+
+
+def run_async(coro):
+    """
+    Run a coroutine on this process's long-lived event loop.
+    Async HTTP connections are bound to the loop that opened them, so the
+    shared chat model clients can only keep them alive across jobs if every
+    job runs on the same loop.
+    """
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+    return _event_loop.run_until_complete(coro)
+
+
+def init_adcopy_chains():
+    """
+    Reset the chain registry and build the default chain.
+    Called in each Celery worker process after fork, so that no HTTP
+    connections are shared with the parent process.
+    """
+    global _event_loop
+    with _chains_lock:
+        _chains.clear()
+    _event_loop = None
+    get_adcopy_chain()
+
+
+def validate_output(data: dict, output: str):
+    """
+    Check structured output against the input's component schema, raising
+    StructuredOutputError when it does not match. Free-form copy passes.
+    """
+    components = output_components(data)
+    if components:
+        parse_copy_json(output, components)
+    return output
+
+
+def estimate_call_tokens(data: dict):
+    """
+    Upper estimate of the tokens one chain call will use, counted against
+    the tokens-per-minute budget before the call is made.
+    """
+    parts = get_prompt_parts(data)
+    tokens = (
+        sum(estimate_tokens(part) for part in parts)
+        + settings.OPENAI_RATE_LIMIT_COMPLETION_TOKENS
+    )
+    image = data.get("image")
+    if image is not None:
+        tokens += estimate_image_tokens(
+            image.width, image.height, settings.ADCOPY_IMAGE_DETAIL
+        )
+    else:
+        tokens += estimate_image_tokens(None, None, settings.ADCOPY_IMAGE_DETAIL)
+    return tokens
+
+
+class RetryingRunnable(Runnable):
+    """
+    Runnable wrapper that sends every call through a circuit breaker and
+    retries retryable errors with jittered exponential backoff.
+    Streaming is passed through, so token deltas of the wrapped chain
+    reach the caller as soon as the model produces them.
+    """
+
+    def __init__(self, runnable, breaker):
+        self.runnable = runnable
+        self.breaker = breaker
+
+    def invoke(self, input, config=None, **kwargs):
+        return call_with_retries(
+            lambda: self.runnable.invoke(input, config, **kwargs), self.breaker
+        )
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await acall_with_retries(
+            lambda: self.runnable.ainvoke(input, config, **kwargs), self.breaker
+        )
+
+    def stream(self, input, config=None, **kwargs):
+        yield from stream_with_retries(
+            lambda: self.runnable.stream(input, config, **kwargs), self.breaker
+        )
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in astream_with_retries(
+            lambda: self.runnable.astream(input, config, **kwargs), self.breaker
+        ):
+            yield chunk
 
 
-# def generate_ad_copy(context):
-#     image_bytes = context.get("image", "")
-#     client_data = context.get("client_data", "")
+def with_retries(runnable, breaker):
+    """
+    Wrap a runnable so every call goes through the circuit breaker and
+    retries retryable errors with jittered exponential backoff.
+    """
+    return RetryingRunnable(runnable, breaker)
 
-#     image_base64 = base64.b64encode(image_bytes).decode("utf-8")
 
-#     chain = create_adcopy_chain()
-#     return chain.invoke(
-#         {
-#             "image_base64": image_base64,
-#             "instructions": client_data,
-#         }
-#     )
+def create_adcopy_chain(llm=None, rate_limiter=None, breaker=None):
+    def acquire(data: dict):
+        tokens = estimate_call_tokens(data)
+        rate_limiter.acquire(tokens)
+        return settled(tokens)
 
+    async def aacquire(data: dict):
+        tokens = estimate_call_tokens(data)
+        await rate_limiter.aacquire(tokens)
+        return settled(tokens)
 
-def generate_ad_copy(instructions: str, file_content=None):
-    """Generate ad copy from image file and instructions"""
-    try:
-        chain = create_adcopy_chain()
-        return chain.invoke(
-            {"image_base64": file_content, "instructions": instructions}
+    def settled(tokens):
+        # The returned chain is run on the same input; its handler corrects
+        # the estimate with the usage the model reports.
+        return model_chain.with_config(
+            callbacks=[RateLimitSettlementHandler(rate_limiter, tokens)]
         )
 
-    except Exception as e:
-        import traceback
+    llm = llm or get_chat_model()
+    # Pages with a component schema are answered in JSON mode.
+    chain = model_chain = RunnableBranch(
+        (
+            lambda data: bool(output_components(data)),
+            RunnableLambda(build_messages)
+            | llm.bind(response_format={"type": "json_object"})
+            | StrOutputParser(),
+        ),
+        RunnableLambda(build_messages) | llm | StrOutputParser(),
+    )
+    if rate_limiter is not None:
+        # Every call waits for its share of the shared request/token budget.
+        chain = RunnableLambda(acquire, afunc=aacquire)
+    if breaker is not None:
+        # Retries re-acquire rate limit budget, since each one is a new call.
+        chain = with_retries(chain, breaker)
+    return chain
+
+
+def get_call_config(data, route, usage=None):
+    """
+    Run config of one chain call: its route, for the route metrics, and the
+    handler collecting its usage, if any.
+    """
+    config = {"metadata": {"route": route.name}}
+    if usage is not None:
+        image = data.get("image")
+        if image is not None:
+            usage.image_tokens_per_call = estimate_image_tokens(
+                image.width, image.height, settings.ADCOPY_IMAGE_DETAIL
+            )
+        config["callbacks"] = [usage]
+    return config
+
+
+def get_cache_key(data):
+    """
+    Cache key of one input of the shared ad copy chain.
+    """
+    image = data.get("image")
+    parts = get_prompt_parts(data)
+    return adcopy_cache_key(
+        parts.system,
+        f"{parts.page_context}\n\n{parts.instructions}",
+        image.prompt_image_key if image is not None else data["image_base64"],
+        f"{settings.ADCOPY_LLM_BACKEND}:{route_for(data).model}",
+    )
+
+
+def generate_ad_copy(
+    instructions: str,
+    image=None,
+    use_cache=True,
+    on_delta=None,
+    components=None,
+    priority=Priority.NORMAL,
+    usage=None,
+):
+    """
+    Generate ad copy from a PageImage and instructions.
+    Pages with a component schema get structured JSON copy, validated
+    against the schema before it is returned or cached. `components`
+    overrides the image's schema, e.g. to generate a single section.
+    The model is chosen by the routing rules from the page and `priority`.
+    `usage`, a UsageCallbackHandler, collects the tokens, latency and cost
+    of the model calls made.
+    When on_delta is given the chain is streamed and on_delta(text) is
+    called with every chunk of copy as it is generated.
+    Raises the model error once retries are exhausted, or CircuitOpenError
+    while the model's circuit breaker is open.
+    """
+    data = {"image": image, "instructions": instructions, "priority": priority}
+    if components is not None:
+        data["components"] = components
+    cache_key = get_cache_key(data) if use_cache else None
+    if cache_key:
+        cached = get_cached_ad_copy(cache_key)
+        if cached is not None:
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
 
-        traceback.print_exc
-        return f"Error processing image: {str(e)}"
+    route = route_for(data)
+    chain = get_adcopy_chain(route.model)
+    config = get_call_config(data, route, usage)
+    if on_delta is None:
+        result = chain.invoke(data, config)
+    else:
+        parts = []
+        for chunk in chain.stream(data, config):
+            parts.append(chunk)
+            on_delta(chunk)
+        result = "".join(parts)
+    validate_output(data, result)
+    if cache_key:
+        set_cached_ad_copy(cache_key, result)
+    return result
+
+
+async def arun_ad_copies(chains, inputs, configs, on_delta=None, max_concurrency=None):
+    """
+    Run each input through its chain concurrently, with at most
+    max_concurrency calls in flight. With on_delta the chains are streamed
+    and on_delta(index, text) is called with every chunk of copy as it is
+    generated.
+    Returns:
+        list: Generated copy text, or the raised exception, for each input
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or len(inputs) or 1)
+
+    async def run(index, data):
+        async with semaphore:
+            if on_delta is None:
+                return await chains[index].ainvoke(data, configs[index])
+            parts = []
+            async for chunk in chains[index].astream(data, configs[index]):
+                parts.append(chunk)
+                on_delta(index, chunk)
+            return "".join(parts)
+
+    return await asyncio.gather(
+        *(run(index, data) for index, data in enumerate(inputs)),
+        return_exceptions=True,
+    )
+
+
+async def agenerate_ad_copies(
+    inputs, max_concurrency=None, chain=None, use_cache=True, on_delta=None, usages=None
+):
+    """
+    Generate ad copy for many pages concurrently.
+    Cached pages are answered from the cache; only the misses reach the model.
+
+    Args:
+        inputs (list): Dicts with "instructions" and "image" (or "image_base64") keys
+        max_concurrency (int, optional): Cap on in-flight model requests
+        chain (Runnable, optional): Chain to use for every input, instead of
+            the shared chain of the model each input is routed to
+        use_cache (bool): Whether to read and populate the response cache
+        on_delta (callable, optional): Streams the chain and is called as
+            on_delta(index, text) with every chunk of copy generated for inputs[index]
+        usages (list, optional): A UsageCallbackHandler per input, collecting
+            the usage of its model calls
+    Returns:
+        list: Generated copy text, or the raised exception, for each input
+    """
+    outputs = [None] * len(inputs)
+    cache_keys = [get_cache_key(data) if use_cache else None for data in inputs]
+    for i, cache_key in enumerate(cache_keys):
+        if cache_key:
+            outputs[i] = get_cached_ad_copy(cache_key)
+            if outputs[i] is not None and on_delta is not None:
+                on_delta(i, outputs[i])
+
+    misses = [i for i, output in enumerate(outputs) if output is None]
+    routes = [route_for(inputs[i]) for i in misses]
+    results = await arun_ad_copies(
+        [chain or get_adcopy_chain(route.model) for route in routes],
+        [inputs[i] for i in misses],
+        [
+            get_call_config(inputs[i], route, usages[i] if usages else None)
+            for i, route in zip(misses, routes, strict=True)
+        ],
+        on_delta=(
+            None
+            if on_delta is None
+            else lambda index, text: on_delta(misses[index], text)
+        ),
+        max_concurrency=max_concurrency,
+    )
+    for i, result in zip(misses, results, strict=True):
+        if not isinstance(result, Exception):
+            try:
+                validate_output(inputs[i], result)
+            except Exception as e:
+                result = e
+        outputs[i] = result
+        if cache_keys[i] and not isinstance(result, Exception):
+            set_cached_ad_copy(cache_keys[i], result)
+    return outputs
 
 
 def main():
@@ -112,7 +394,7 @@ def main():
     instructions = "Client is a premium yoga studio targeting working professionals. Use calm, rejuvenating tone."
 
     for page in pages:
-        result = generate_ad_copy(instructions, file_content=page.image_content)
+        result = generate_ad_copy(instructions, image=page)
         print(result)
 
 
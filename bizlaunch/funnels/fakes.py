@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from bizlaunch.funnels.images import estimate_image_tokens
+from bizlaunch.funnels.ratelimit import estimate_tokens
+from bizlaunch.funnels.structured import COMPONENTS_HEADER
+
+# Shortest prompt prefix the provider caches, in tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Prompt prefixes the fake provider has seen, shared by all fake models of
+# the process like a provider's cache is shared by all of its clients
+_seen_prefixes = set()
+_seen_prefixes_lock = threading.Lock()
+
+FAKE_AD_COPY = """### Main Headline
+Find Your Calm After Work
+
+### Hero Section
+Unwind with evening classes designed for busy professionals.
+
+### Call-to-Action
+Book your first class today."""
+
+
+class FakeAdCopyChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOpenAI.
+    Returns a canned ad copy after a configurable latency, so the sync,
+    async and streaming code paths can be exercised and benchmarked without
+    network access. Unlike langchain's FakeListChatModel it does not
+    serialize batches, so concurrency behaves like a real provider client.
+    """
+
+    model_name: str = "fake-adcopy"
+    latency: float = 0.5
+    response: str = FAKE_AD_COPY
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-adcopy-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name, "latency": self.latency}
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        """
+        The canned copy, or canned structured copy for every component
+        when the prompt carries a component schema.
+        """
+        content = messages[-1].content
+        parts = content if isinstance(content, list) else [{"text": content}]
+        for part in parts:
+            text = part.get("text", "")
+            if COMPONENTS_HEADER in text:
+                schema = json.loads(text.split(COMPONENTS_HEADER, 1)[1])
+                components = [
+                    {**component, "copy": f"{component['component']} copy."}
+                    for component in schema
+                ]
+                for component in components:
+                    component.pop("description", None)
+                return json.dumps({"components": components})
+        return self.response
+
+    def _usage(self, messages: List[BaseMessage]) -> dict:
+        """
+        Token usage of a call, simulating provider prompt caching: input
+        tokens up to the end of the longest message part whose prefix was
+        sent before, if at least PROMPT_CACHE_MIN_TOKENS long, are cached.
+        """
+        digest = hashlib.sha256()
+        input_tokens = 0
+        cached_tokens = 0
+        prefixes = []
+        for message in messages:
+            content = message.content
+            parts = content if isinstance(content, list) else [{"text": content}]
+            for part in parts:
+                if part.get("type") == "image_url":
+                    url = part["image_url"]["url"]
+                    digest.update(url.encode("utf-8"))
+                    input_tokens += estimate_image_tokens(
+                        None, None, part["image_url"].get("detail", "auto")
+                    )
+                else:
+                    digest.update(part.get("text", "").encode("utf-8"))
+                    input_tokens += estimate_tokens(part.get("text", ""))
+                prefix = digest.copy().hexdigest()
+                prefixes.append(prefix)
+                with _seen_prefixes_lock:
+                    seen = prefix in _seen_prefixes
+                if seen and input_tokens >= PROMPT_CACHE_MIN_TOKENS:
+                    cached_tokens = input_tokens
+        with _seen_prefixes_lock:
+            _seen_prefixes.update(prefixes)
+        output_tokens = estimate_tokens(self._respond(messages))
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        }
+
+    def _message(self, messages: List[BaseMessage]) -> AIMessage:
+        return AIMessage(
+            content=self._respond(messages), usage_metadata=self._usage(messages)
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self._respond(messages).split(" ")
+        for i, token in enumerate(tokens):
+            time.sleep(self.latency / len(tokens))
+            text = token if i == 0 else f" {token}"
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        # Usage comes last, as with stream_usage=True on ChatOpenAI.
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self._respond(messages).split(" ")
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.latency / len(tokens))
+            text = token if i == 0 else f" {token}"
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        # Usage comes last, as with stream_usage=True on ChatOpenAI.
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+        )
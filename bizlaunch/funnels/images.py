@@ -0,0 +1,127 @@
+import hashlib
+import io
+import math
+import mimetypes
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+# Formats page screenshots can be re-encoded to before being sent to the model
+OUTPUT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def inspect_image(content: bytes):
+    """
+    Read the metadata stored alongside a page image.
+    Args:
+        content (bytes): Raw image bytes
+    Returns:
+        dict: content_hash (SHA-256 hex digest), width, height and mime_type
+    """
+    with Image.open(io.BytesIO(content)) as img:
+        width, height = img.size
+        mime_type = Image.MIME.get(img.format, "application/octet-stream")
+    return {
+        "content_hash": hashlib.sha256(content).hexdigest(),
+        "width": width,
+        "height": height,
+        "mime_type": mime_type,
+    }
+
+
+def image_extension(mime_type):
+    """
+    File extension used when storing an image of the given MIME type.
+    """
+    return mimetypes.guess_extension(mime_type) or ""
+
+
+def target_size(width, height, detail="auto"):
+    """
+    Largest size the model actually looks at for an image.
+    Mirrors the provider's own downscaling: "low" detail fits the image in
+    512x512, otherwise it is fit in 2048x2048 and its short side capped at
+    768px, the size that maps onto whole 512px tiles. Anything larger only
+    costs upload time. Images are never upscaled.
+    """
+    if detail == "low":
+        scale = min(1, 512 / max(width, height))
+    else:
+        scale = min(1, 2048 / max(width, height), 768 / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_image_tokens(width, height, detail="auto"):
+    """
+    Input tokens the model charges for an image: a flat 85 at low detail,
+    otherwise 85 plus 170 per 512px tile of the downscaled image.
+    """
+    if detail == "low":
+        return 85
+    if not width or not height:
+        # Unknown size: assume a typical 2x2 tile screenshot.
+        return 85 + 170 * 4
+    width, height = target_size(width, height, detail=detail)
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def preprocess_image(content: bytes, image_format="JPEG", quality=85, detail="auto"):
+    """
+    Downsize and re-encode an image for the model.
+    Args:
+        content (bytes): Source image bytes
+        image_format (str): Pillow output format, "JPEG" or "WEBP"
+        quality (int): Encoder quality, 1-100
+        detail (str): Image detail level the image will be sent with
+    Returns:
+        bytes: The encoded variant
+    """
+    with Image.open(io.BytesIO(content)) as img:
+        size = target_size(*img.size, detail=detail)
+        if img.mode in ("RGBA", "LA", "P"):
+            # Flatten transparency onto white; JPEG has no alpha channel.
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        if size != img.size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        img.save(output, format=image_format, quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def variant_spec(image_format, quality, detail):
+    """
+    Identifier of a preprocessing configuration, used in variant file names
+    and response cache keys.
+    """
+    return f"{image_format.lower()}-q{quality}-{detail}"
+
+
+def get_image_variant(page_image, image_format="JPEG", quality=85, detail="auto"):
+    """
+    Return the preprocessed variant of a PageImage and its MIME type.
+    Variants are derived once per source image hash and configuration and
+    kept in file storage next to the originals, so every worker reuses them.
+    """
+    image_format = image_format.upper()
+    mime_type = OUTPUT_MIME_TYPES[image_format]
+    name = (
+        f"page_images/variants/{page_image.content_hash}-"
+        f"{variant_spec(image_format, quality, detail)}{image_extension(mime_type)}"
+    )
+    if default_storage.exists(name):
+        with default_storage.open(name, "rb") as f:
+            return f.read(), mime_type
+
+    content = preprocess_image(
+        page_image.read_image(), image_format, quality=quality, detail=detail
+    )
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return content, mime_type
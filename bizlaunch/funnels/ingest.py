@@ -0,0 +1,113 @@
+import csv
+import logging
+from itertools import islice
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ClientFileError(ValueError):
+    """
+    Raised when a client CSV file cannot be read at all, e.g. it has no
+    usable header row or is not valid UTF-8.
+    """
+
+
+def clean_header(fieldnames):
+    """
+    Validate the header row of a client file.
+    Returns:
+        list: The stripped column names
+    Raises:
+        ClientFileError: If the header is missing, blank or repeats a column
+    """
+    if not fieldnames:
+        raise ClientFileError("The file is empty or has no header row.")
+    header = [(name or "").strip() for name in fieldnames]
+    if not all(header):
+        raise ClientFileError("Every column of the header row needs a name.")
+    if len(set(header)) != len(header):
+        raise ClientFileError("The header row has duplicate column names.")
+    return header
+
+
+def clean_row(row):
+    """
+    Validate one data row and turn it into a job's client data.
+    Args:
+        row (dict): Row as read by csv.DictReader
+    Returns:
+        dict: Non-empty values by column
+    Raises:
+        ValueError: If the row cannot be used for generation
+    """
+    if row.get(None):
+        raise ValueError("Row has more values than the header has columns.")
+    data = {
+        key: value.strip()
+        for key, value in row.items()
+        if key is not None and value and value.strip()
+    }
+    if not data:
+        raise ValueError("Row has no values.")
+    for key, value in data.items():
+        if len(value) > settings.COPY_JOB_CSV_MAX_VALUE_LENGTH:
+            raise ValueError(
+                f"Value of column {key!r} is longer than "
+                f"{settings.COPY_JOB_CSV_MAX_VALUE_LENGTH} characters."
+            )
+    return data
+
+
+def read_client_rows(client_file, start=0, offset=0):
+    """
+    Stream the data rows of a client CSV file from storage, one at a time,
+    without loading the file into memory.
+    An ingestion continues from the byte offset yielded with the last row it
+    read, so each step reads only its own rows instead of every earlier one.
+    Args:
+        client_file (FieldFile): The uploaded CSV file
+        start (int): Number of data rows already read
+        offset (int): Byte offset in the file after those rows; when 0, the
+            first `start` rows are read and skipped
+    Yields:
+        tuple: (row number, client data dict or the ValueError explaining
+        why the row is invalid, byte offset after the row), row numbers
+        starting at 1 after the header
+    Raises:
+        ClientFileError: If the file cannot be read as CSV
+    """
+    with client_file.open("rb") as f:
+        position = 0
+
+        def lines():
+            # Lines are decoded one by one to count the bytes the csv
+            # module consumes; it never reads past the end of a row.
+            nonlocal position
+            for line in iter(f.readline, b""):
+                # utf-8-sig drops the byte order mark spreadsheet exports add.
+                encoding = "utf-8-sig" if position == 0 else "utf-8"
+                position += len(line)
+                yield line.decode(encoding)
+
+        try:
+            header = next(csv.reader(lines()), None)
+            if header is None:
+                # An empty file has no rows, like one with only a header.
+                return
+            header = clean_header(header)
+            if offset:
+                f.seek(offset)
+                position = offset
+            reader = csv.DictReader(lines(), fieldnames=header)
+            rows = enumerate(reader, start=start + 1 if offset else 1)
+            if not offset:
+                rows = islice(rows, start, None)
+            for row_number, row in rows:
+                try:
+                    yield row_number, clean_row(row), position
+                except ValueError as e:
+                    yield row_number, e, position
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ClientFileError(f"Could not read the file as CSV: {str(e)}")
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from bizlaunch.funnels.chains import agenerate_ad_copies, create_adcopy_chain
+from bizlaunch.funnels.fakes import FakeAdCopyChatModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sequential and concurrent ad copy generation "
+        "against the offline fake chat model"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=12)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.5,
+            help="Simulated model latency per request, in seconds",
+        )
+
+    def handle(self, *args, **options):
+        chain = create_adcopy_chain(FakeAdCopyChatModel(latency=options["latency"]))
+        inputs = [
+            {"instructions": f"Page {i}", "image_base64": ""}
+            for i in range(options["pages"])
+        ]
+
+        start = time.perf_counter()
+        for data in inputs:
+            chain.invoke(data)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(
+            agenerate_ad_copies(
+                inputs,
+                max_concurrency=options["concurrency"],
+                chain=chain,
+                use_cache=False,
+            )
+        )
+        concurrent = time.perf_counter() - start
+
+        self.stdout.write(f"Pages: {options['pages']}")
+        self.stdout.write(f"Sequential: {sequential:.2f}s")
+        self.stdout.write(
+            f"Async (concurrency={options['concurrency']}): {concurrent:.2f}s"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Speed-up: {sequential / concurrent:.1f}x")
+        )
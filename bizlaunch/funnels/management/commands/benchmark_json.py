@@ -0,0 +1,114 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.parsers import JSONParser
+
+from bizlaunch.core.parsers import ORJSONParser
+from bizlaunch.core.renderers import ApiJSONRenderer, ApiORJSONRenderer, create_envelope, orjson
+from bizlaunch.funnels.models import CopyJob, Project, SystemTemplate
+from bizlaunch.funnels.serializers import (
+    CopyJobStatusSerializer,
+    ProjectSerializer,
+    SystemTemplateSerializer,
+)
+
+
+def time_per_call(func, iterations):
+    """
+    Average wall time of func in milliseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the stdlib and orjson JSON renderers and parsers on real API "
+        "payloads read from the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--job",
+            help="CopyJob (UUID) for the job status payload; defaults to the "
+            "job with the most generated pages",
+        )
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def get_payloads(self, job_uuid):
+        """
+        Enveloped response data of the largest API responses, by name.
+        """
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        jobs = CopyJob.objects.prefetch_related("generated_copies")
+        if job_uuid:
+            job = jobs.filter(uuid=job_uuid).first()
+        else:
+            job = jobs.annotate(pages=Count("generated_copies")).order_by("-pages").first()
+
+        payloads = {}
+        if job is not None:
+            payloads["job status"] = create_envelope(
+                200, True, data=CopyJobStatusSerializer(job).data
+            )
+        list_pagination = {"count": page_size, "page_size": page_size, "current_page": 1}
+        payloads["job list page"] = create_envelope(
+            200,
+            True,
+            data=CopyJobStatusSerializer(jobs.order_by("-created_at")[:page_size], many=True).data,
+            pagination=list_pagination,
+        )
+        payloads["project list page"] = create_envelope(
+            200,
+            True,
+            data=ProjectSerializer(
+                Project.objects.select_related("copy_job__system").order_by("-created_at")[
+                    :page_size
+                ],
+                many=True,
+            ).data,
+            pagination=list_pagination,
+        )
+        payloads["system catalog"] = create_envelope(
+            200, True, data=SystemTemplateSerializer(SystemTemplate.objects.all(), many=True).data
+        )
+        return payloads
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed; nothing to compare.")
+        iterations = options["iterations"]
+        renderers = (("stdlib", ApiJSONRenderer()), ("orjson", ApiORJSONRenderer()))
+        parsers = (("stdlib", JSONParser()), ("orjson", ORJSONParser()))
+
+        for name, payload in self.get_payloads(options["job"]).items():
+            content = ApiJSONRenderer().render(payload)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {len(content)} bytes"))
+
+            timings = {}
+            for label, renderer in renderers:
+                timings[label] = time_per_call(
+                    lambda renderer=renderer, payload=payload: renderer.render(payload),
+                    iterations,
+                )
+            self.write_timings("render", timings)
+
+            timings = {}
+            for label, parser in parsers:
+                timings[label] = time_per_call(
+                    lambda parser=parser, content=content: parser.parse(io.BytesIO(content)),
+                    iterations,
+                )
+            self.write_timings("parse", timings)
+
+    def write_timings(self, operation, timings):
+        self.stdout.write(
+            f"  {operation}: stdlib {timings['stdlib']:.3f} ms, "
+            f"orjson {timings['orjson']:.3f} ms "
+            f"({timings['stdlib'] / timings['orjson']:.1f}x)"
+        )
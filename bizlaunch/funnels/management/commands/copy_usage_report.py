@@ -0,0 +1,97 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bizlaunch.funnels.models import AdCopy
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Show latency and token percentiles of generated pages, per model and "
+        "per page layout, from the usage stored on AdCopy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Only include pages generated in the last N days (0 for all)",
+        )
+        parser.add_argument("--system", help="Only include jobs of this system (UUID)")
+        parser.add_argument("--model", help="Only include pages generated by this model")
+        parser.add_argument(
+            "--slowest",
+            type=int,
+            default=5,
+            help="Also list the N slowest pages",
+        )
+
+    def handle(self, *args, **options):
+        copies = AdCopy.objects.filter(latency_ms__isnull=False)
+        if options["days"]:
+            since = timezone.now() - timedelta(days=options["days"])
+            copies = copies.filter(created_at__gte=since)
+        if options["system"]:
+            copies = copies.filter(copy_job__system_id=options["system"])
+        if options["model"]:
+            copies = copies.filter(model=options["model"])
+
+        rows = list(
+            copies.values_list(
+                "uuid",
+                "model",
+                "page__layout",
+                "latency_ms",
+                "input_tokens",
+                "output_tokens",
+                "cost_usd",
+            )
+        )
+        if not rows:
+            self.stdout.write("No generated pages with recorded usage")
+            return
+
+        for title, key in (("model", 1), ("layout", 2)):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"By {title}"))
+            groups = defaultdict(list)
+            for row in rows:
+                groups[row[key] or "(none)"].append(row)
+            for name, group in sorted(groups.items()):
+                self.write_group(name, group)
+
+        if options["slowest"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("Slowest pages"))
+            for row in sorted(rows, key=lambda row: row[3], reverse=True)[
+                : options["slowest"]
+            ]:
+                self.stdout.write(
+                    f"  AdCopy {row[0]} ({row[1]}, {row[2] or 'no layout'}): "
+                    f"{row[3]} ms, {row[4]} input / {row[5]} output tokens"
+                )
+
+    def write_group(self, name, group):
+        latencies = sorted(row[3] for row in group)
+        tokens = sorted(row[4] + row[5] for row in group)
+        cost = sum(row[6] for row in group if row[6] is not None)
+        self.stdout.write(f"{name}: {len(group)} pages, ${cost:.4f}")
+        self.stdout.write(
+            "  latency ms: "
+            + ", ".join(f"p{p} {percentile(latencies, p)}" for p in PERCENTILES)
+        )
+        self.stdout.write(
+            "  tokens per page: "
+            + ", ".join(f"p{p} {percentile(tokens, p)}" for p in PERCENTILES)
+        )
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from bizlaunch.funnels.images import image_extension, inspect_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy page screenshots into file storage under their content-addressed "
+        "names, e.g. to back the PageImage rows of fixtures/data_fixture.json"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory",
+            nargs="?",
+            default="fixtures/funnels",
+            help="Directory searched recursively for images",
+        )
+
+    def handle(self, *args, **options):
+        for path in sorted(Path(options["directory"]).rglob("*")):
+            if path.suffix.lower() not in (".png", ".jpg", ".jpeg", ".webp"):
+                continue
+            content = path.read_bytes()
+            metadata = inspect_image(content)
+            name = (
+                f"page_images/{metadata['content_hash']}"
+                f"{image_extension(metadata['mime_type'])}"
+            )
+            if default_storage.exists(name):
+                self.stdout.write(f"{path}: already stored as {name}")
+                continue
+            default_storage.save(name, ContentFile(content))
+            self.stdout.write(self.style.SUCCESS(f"{path}: stored as {name}"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from bizlaunch.funnels.metrics import get_route_stats, reset_route_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the calls, errors, latency, tokens and cost of each model "
+        "routing rule, to tune ADCOPY_MODEL_ROUTES"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear the counters after showing them",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_route_stats()
+        if not stats:
+            self.stdout.write("No routed model calls recorded")
+        for route, counters in sorted(stats.items()):
+            self.stdout.write(
+                f"{route} ({counters['model']}): {counters['calls']} calls, "
+                f"{counters['errors']} errors, "
+                f"{counters['avg_latency_ms']} ms average latency"
+            )
+            self.stdout.write(
+                f"  {counters['input_tokens']} input tokens "
+                f"({counters['cached_tokens']} cached), "
+                f"{counters['output_tokens']} output tokens, "
+                f"${counters['cost_usd']:.4f}"
+                + (
+                    f" (${counters['cost_per_call_usd']:.5f} per call)"
+                    if counters["cost_per_call_usd"] is not None
+                    else ""
+                )
+            )
+        if options["reset"]:
+            reset_route_stats()
+            self.stdout.write(self.style.SUCCESS("Counters cleared"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from bizlaunch.funnels.metrics import get_prompt_cache_stats, reset_prompt_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show, per model, how many input tokens of ad copy calls were served "
+        "from the provider's prompt cache, and the average time to first token"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear the counters after showing them",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_prompt_cache_stats()
+        if not stats:
+            self.stdout.write("No model calls recorded")
+        for model, counters in sorted(stats.items()):
+            uncached = counters["input_tokens"] - counters["cached_tokens"]
+            self.stdout.write(
+                f"{model}: {counters['calls']} calls, "
+                f"{counters['input_tokens']} input tokens "
+                f"({counters['cached_tokens']} cached, {uncached} uncached, "
+                f"{counters['cached_ratio']:.0%} hit rate), "
+                f"{counters['output_tokens']} output tokens"
+            )
+            if counters["avg_ttft_ms"] is not None:
+                self.stdout.write(
+                    f"  time to first token: {counters['avg_ttft_ms']} ms average "
+                    f"over {counters['streamed_calls']} streamed calls"
+                )
+        if options["reset"]:
+            reset_prompt_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters cleared"))
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from bizlaunch.funnels.models import CopyJob, Status
+from bizlaunch.funnels.tasks import (
+    acquire_job_lock,
+    job_lock_key,
+    new_lock_owner,
+    process_copy_job,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-enqueue copy jobs stuck in PROCESSING, e.g. after a deploy. "
+        "Resumed jobs only generate the pages that have no ad copy yet. "
+        "Jobs whose lock is still refreshed by a running task are skipped. "
+        "Batch-mode jobs and client file jobs are left to their periodic "
+        "and ingestion tasks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Only resume jobs not updated for this many minutes (default: 30)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the jobs that would be resumed without enqueuing them",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help=(
+                "Take over the lock of jobs that still hold one, e.g. right after "
+                "their worker was killed. Only use it when no worker runs them."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["stale_minutes"] < 1:
+            raise CommandError("--stale-minutes must be at least 1.")
+        cutoff = timezone.now() - timedelta(minutes=options["stale_minutes"])
+        # Batch jobs are resubmitted by submit_copy_batches, and jobs with a
+        # client file are driven by ingest_client_file; only their row jobs
+        # are resumed here.
+        jobs = (
+            CopyJob.objects.filter(status=Status.PROCESSING, updated_at__lt=cutoff)
+            .exclude(use_batch=True)
+            .exclude(
+                Q(parent__isnull=True) & Q(client_file__isnull=False) & ~Q(client_file="")
+            )
+            .order_by("created_at")
+        )
+
+        resumed = 0
+        for job in jobs:
+            done = job.generated_copies.filter(status=Status.COMPLETED).count()
+            if options["dry_run"]:
+                locked = cache.get(job_lock_key(job.uuid)) is not None
+                action = "locked, would skip" if locked and not options["force"] else "would resume"
+                self.stdout.write(f"{job.uuid}: {done} pages done, {action}")
+                continue
+            # The lock is claimed here and handed to the task, so no other
+            # task can take the job in between. A task still working on the
+            # job keeps its lock refreshed (see JobLockHeartbeat); the lock
+            # of a killed one expires after COPY_JOB_LOCK_TIMEOUT.
+            lock = new_lock_owner()
+            if options["force"]:
+                cache.set(job_lock_key(job.uuid), lock, timeout=settings.COPY_JOB_LOCK_TIMEOUT)
+            elif not acquire_job_lock(job.uuid, lock):
+                self.stdout.write(f"{job.uuid}: {done} pages done, still running, skipped")
+                continue
+            task = process_copy_job.delay(str(job.uuid), lock=lock)
+            job.celery_task_id = task.id
+            job.save(update_fields=["celery_task_id", "updated_at"])
+            resumed += 1
+            self.stdout.write(f"{job.uuid}: {done} pages done, resumed as {task.id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Resumed {resumed} copy jobs"))
@@ -0,0 +1,298 @@
+import logging
+import time
+from decimal import Decimal
+
+import redis
+from langchain_core.callbacks import BaseCallbackHandler
+
+from bizlaunch.funnels.routing import estimate_cost
+from bizlaunch.funnels.streaming import get_stream_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "adcopy:prompt_cache"
+ROUTE_METRICS_KEY_PREFIX = "adcopy:route"
+
+# Counters kept per model
+METRIC_FIELDS = (
+    "calls",
+    "input_tokens",
+    "cached_tokens",
+    "output_tokens",
+    "streamed_calls",
+    "ttft_ms",
+)
+
+
+# Counters kept per route
+ROUTE_METRIC_FIELDS = (
+    "calls",
+    "errors",
+    "latency_ms",
+    "input_tokens",
+    "cached_tokens",
+    "output_tokens",
+)
+
+
+def metrics_key(model):
+    """
+    Redis hash holding the prompt cache counters of a model.
+    """
+    return f"{METRICS_KEY_PREFIX}:{model}"
+
+
+def route_metrics_key(route):
+    """
+    Redis hash holding the latency and cost counters of a routing rule.
+    """
+    return f"{ROUTE_METRICS_KEY_PREFIX}:{route}"
+
+
+def get_usage(response):
+    """
+    Token usage of a chat model call from its LLMResult.
+    Returns:
+        dict: input_tokens, cached_tokens (input tokens served from the
+        provider's prompt cache) and output_tokens; all 0 when the model
+        did not report usage
+    """
+    usage = {}
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None and getattr(message, "usage_metadata", None):
+                usage = message.usage_metadata
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": usage.get("input_tokens", 0),
+        "cached_tokens": details.get("cache_read") or 0,
+        "output_tokens": usage.get("output_tokens", 0),
+    }
+
+
+class ModelCallMetricsHandler(BaseCallbackHandler):
+    """
+    Records per call how many input tokens the provider served from its
+    prompt cache, and the time to the first streamed token. Every call is
+    logged; totals per model are kept in Redis for prompt_cache_stats.
+    Calls made with a "route" in their metadata (see routing.py) also add
+    their latency, tokens and cost to that route's totals, shown by
+    model_route_stats.
+    Recording never raises: metrics must not fail a generation.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        route = (metadata or {}).get("route")
+        self.started[run_id] = [time.monotonic(), None, route]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        timing = self.started.get(run_id)
+        if timing is not None and timing[1] is None:
+            timing[1] = time.monotonic()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _, _, route = self.started.pop(run_id, (None, None, None))
+        if route:
+            record_route_error(route)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started_at, first_token_at, route = self.started.pop(run_id, (None, None, None))
+        usage = get_usage(response)
+        ttft_ms = None
+        if started_at is not None and first_token_at is not None:
+            ttft_ms = round((first_token_at - started_at) * 1000)
+        if route and started_at is not None:
+            latency_ms = round((time.monotonic() - started_at) * 1000)
+            record_route_call(route, self.model, usage, latency_ms)
+
+        hit_ratio = 0
+        if usage["input_tokens"]:
+            hit_ratio = usage["cached_tokens"] / usage["input_tokens"]
+        logger.info(
+            f"Model call on {self.model}: {usage['input_tokens']} input tokens, "
+            f"{usage['cached_tokens']} cached ({hit_ratio:.0%}), "
+            f"{usage['output_tokens']} output tokens"
+            + (f", first token after {ttft_ms} ms" if ttft_ms is not None else "")
+        )
+        record_call(self.model, usage, ttft_ms)
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Collects the model usage of one page's generation, to be stored on its
+    AdCopy. A generation can make several calls when retried: tokens are
+    summed over the calls, and the latency runs from the start of the first
+    call to the end of the last one.
+    """
+
+    def __init__(self, image_tokens_per_call=0):
+        self.image_tokens_per_call = image_tokens_per_call
+        self.model = ""
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.started_at = None
+        self.ended_at = None
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self.model = (metadata or {}).get("ls_model_name") or self.model
+        self.calls += 1
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.ended_at = time.monotonic()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = get_usage(response)
+        self.input_tokens += usage["input_tokens"]
+        self.cached_tokens += usage["cached_tokens"]
+        self.output_tokens += usage["output_tokens"]
+        self.ended_at = time.monotonic()
+
+    def as_fields(self):
+        """
+        The usage as AdCopy field values; empty when no model call was
+        made, e.g. when the copy came from the response cache.
+        """
+        if not self.calls:
+            return {}
+        cost = estimate_cost(
+            self.model, self.input_tokens, self.cached_tokens, self.output_tokens
+        )
+        return {
+            "model": self.model,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "image_tokens": self.image_tokens_per_call * self.calls,
+            "output_tokens": self.output_tokens,
+            "latency_ms": round(((self.ended_at or self.started_at) - self.started_at) * 1000),
+            "cost_usd": None if cost is None else Decimal(f"{cost:.6f}"),
+        }
+
+
+def record_call(model, usage, ttft_ms=None):
+    """
+    Add one call to the model's counters.
+    """
+    try:
+        pipe = get_stream_client().pipeline()
+        key = metrics_key(model)
+        pipe.hincrby(key, "calls", 1)
+        for field in ("input_tokens", "cached_tokens", "output_tokens"):
+            pipe.hincrby(key, field, usage[field])
+        if ttft_ms is not None:
+            pipe.hincrby(key, "streamed_calls", 1)
+            pipe.hincrby(key, "ttft_ms", ttft_ms)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not record metrics of {model}: {str(e)}")
+
+
+def record_route_call(route, model, usage, latency_ms):
+    """
+    Add one call to the route's counters.
+    """
+    cost = estimate_cost(
+        model, usage["input_tokens"], usage["cached_tokens"], usage["output_tokens"]
+    )
+    try:
+        pipe = get_stream_client().pipeline()
+        key = route_metrics_key(route)
+        pipe.hset(key, "model", model)
+        pipe.hincrby(key, "calls", 1)
+        pipe.hincrby(key, "latency_ms", latency_ms)
+        for field in ("input_tokens", "cached_tokens", "output_tokens"):
+            pipe.hincrby(key, field, usage[field])
+        if cost is not None:
+            pipe.hincrbyfloat(key, "cost_usd", cost)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not record metrics of route {route}: {str(e)}")
+
+
+def record_route_error(route):
+    """
+    Count one failed call of the route.
+    """
+    try:
+        get_stream_client().hincrby(route_metrics_key(route), "errors", 1)
+    except redis.RedisError as e:
+        logger.warning(f"Could not record metrics of route {route}: {str(e)}")
+
+
+def get_route_stats():
+    """
+    Counters of all routes with recorded calls.
+    Returns:
+        dict: Per route, its latest model, the counters, avg_latency_ms,
+        cost_usd and cost_per_call_usd
+    """
+    client = get_stream_client()
+    stats = {}
+    for key in client.scan_iter(match=f"{ROUTE_METRICS_KEY_PREFIX}:*"):
+        route = key.decode("utf-8")[len(ROUTE_METRICS_KEY_PREFIX) + 1 :]
+        raw = client.hgetall(key)
+        counters = {
+            field: int(raw.get(field.encode("utf-8"), 0)) for field in ROUTE_METRIC_FIELDS
+        }
+        counters["model"] = raw.get(b"model", b"").decode("utf-8")
+        counters["cost_usd"] = float(raw.get(b"cost_usd", 0))
+        calls = counters["calls"]
+        counters["avg_latency_ms"] = counters["latency_ms"] // calls if calls else None
+        counters["cost_per_call_usd"] = counters["cost_usd"] / calls if calls else None
+        stats[route] = counters
+    return stats
+
+
+def reset_route_stats():
+    """
+    Delete the counters of all routes.
+    """
+    client = get_stream_client()
+    for key in client.scan_iter(match=f"{ROUTE_METRICS_KEY_PREFIX}:*"):
+        client.delete(key)
+
+
+def get_prompt_cache_stats():
+    """
+    Counters of all models with recorded calls.
+    Returns:
+        dict: Per model, the counters plus cached_ratio (share of input
+        tokens served from the prompt cache) and avg_ttft_ms
+    """
+    client = get_stream_client()
+    stats = {}
+    for key in client.scan_iter(match=f"{METRICS_KEY_PREFIX}:*"):
+        model = key.decode("utf-8")[len(METRICS_KEY_PREFIX) + 1 :]
+        raw = client.hgetall(key)
+        counters = {
+            field: int(raw.get(field.encode("utf-8"), 0)) for field in METRIC_FIELDS
+        }
+        counters["cached_ratio"] = (
+            counters["cached_tokens"] / counters["input_tokens"]
+            if counters["input_tokens"]
+            else 0
+        )
+        counters["avg_ttft_ms"] = (
+            counters["ttft_ms"] // counters["streamed_calls"]
+            if counters["streamed_calls"]
+            else None
+        )
+        stats[model] = counters
+    return stats
+
+
+def reset_prompt_cache_stats():
+    """
+    Delete the counters of all models.
+    """
+    client = get_stream_client()
+    for key in client.scan_iter(match=f"{METRICS_KEY_PREFIX}:*"):
+        client.delete(key)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0005_copyjob_celery_task_id_project'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='copyjob',
+            name='use_cache',
+            field=models.BooleanField(default=True, help_text='Reuse previously generated copy for identical pages and instructions'),
+        ),
+    ]
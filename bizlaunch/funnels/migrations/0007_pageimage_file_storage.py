@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:13
+
+import bizlaunch.funnels.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0006_copyjob_use_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the image bytes', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='pageimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pageimage',
+            name='image',
+            field=models.ImageField(blank=True, height_field='height', null=True, upload_to=bizlaunch.funnels.models.page_image_upload_path, width_field='width'),
+        ),
+        migrations.AddField(
+            model_name='pageimage',
+            name='mime_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='pageimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+import base64
+import hashlib
+import io
+import mimetypes
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations
+from PIL import Image
+
+
+def move_images_to_storage(apps, schema_editor):
+    PageImage = apps.get_model("funnels", "PageImage")
+    queryset = PageImage.objects.exclude(image_content__isnull=True).exclude(image_content="")
+    for page_image in queryset.iterator(chunk_size=20):
+        content = base64.b64decode(page_image.image_content)
+        with Image.open(io.BytesIO(content)) as img:
+            width, height = img.size
+            mime_type = Image.MIME.get(img.format, "application/octet-stream")
+        content_hash = hashlib.sha256(content).hexdigest()
+        name = f"page_images/{content_hash}{mimetypes.guess_extension(mime_type) or ''}"
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+
+        page_image.image = name
+        page_image.content_hash = content_hash
+        page_image.width = width
+        page_image.height = height
+        page_image.mime_type = mime_type
+        page_image.save(update_fields=["image", "content_hash", "width", "height", "mime_type"])
+
+
+def move_images_to_database(apps, schema_editor):
+    PageImage = apps.get_model("funnels", "PageImage")
+    for page_image in PageImage.objects.exclude(image="").exclude(image__isnull=True).iterator(chunk_size=20):
+        with default_storage.open(page_image.image.name, "rb") as f:
+            page_image.image_content = base64.b64encode(f.read()).decode("utf-8")
+        page_image.save(update_fields=["image_content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0007_pageimage_file_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_images_to_storage, move_images_to_database),
+    ]
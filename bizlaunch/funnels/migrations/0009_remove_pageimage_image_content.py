@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0008_move_page_images_to_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pageimage',
+            name='image_content',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0009_remove_pageimage_image_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adcopy',
+            name='error',
+            field=models.TextField(blank=True, help_text='Why generation failed, for failed pages'),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('partially_completed', 'Partially Completed'), ('completed', 'Completed'), ('failed', 'Failed')], default='completed', help_text='Whether the copy for this page was generated or failed', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='adcopy',
+            name='copy_text',
+            field=models.TextField(blank=True, help_text='Generated ad copy text'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0010_adcopy_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adcopy',
+            name='page_image',
+            field=models.ForeignKey(blank=True, help_text='Page image the copy was generated from', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='generated_copies', to='funnels.pageimage'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0011_adcopy_page_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CopyBatch',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('backend', models.CharField(help_text='Dotted path of the batch backend the batch was submitted to', max_length=255)),
+                ('batch_id', models.CharField(blank=True, help_text='Identifier of the batch at the backend', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('partially_completed', 'Partially Completed'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('input_file', models.FileField(blank=True, help_text='JSONL file with one model request per page', null=True, upload_to='copy_batches/')),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='use_batch',
+            field=models.BooleanField(default=False, help_text="Generate through the provider's batch API: slower, but cheaper for bulk jobs"),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='batch',
+            field=models.ForeignKey(blank=True, help_text="Batch the job's pages were submitted in", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='funnels.copybatch'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0012_copybatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='copyjob',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Job whose client file this job was created from, one job per row', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='row_jobs', to='funnels.copyjob'),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='row_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Number of rows in the client file, set once it has been read to the end', null=True),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='row_number',
+            field=models.PositiveIntegerField(blank=True, help_text="Row of the parent's client file this job was created from", null=True),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='rows_ingested',
+            field=models.PositiveIntegerField(default=0, help_text='Rows of the client file turned into row jobs so far'),
+        ),
+    ]
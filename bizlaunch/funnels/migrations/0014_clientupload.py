@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:40
+
+import bizlaunch.funnels.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0013_copyjob_row_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientUpload',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('file', models.FileField(upload_to=bizlaunch.funnels.models.client_upload_path)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Total size of the file in bytes')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Number of bytes received so far')),
+                ('checksum', models.CharField(blank=True, help_text='Expected SHA-256 of the whole file, hex encoded', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('partially_completed', 'Partially Completed'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='client_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0014_clientupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adcopy',
+            name='cached_tokens',
+            field=models.PositiveIntegerField(default=0, help_text="Prompt tokens served from the provider's prompt cache"),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='cost_usd',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Estimated cost from ADCOPY_MODEL_PRICES', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='image_tokens',
+            field=models.PositiveIntegerField(default=0, help_text='Estimated prompt tokens spent on page images'),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='input_tokens',
+            field=models.PositiveIntegerField(default=0, help_text='Prompt tokens, including image and cached tokens'),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, help_text='Time spent waiting for the model, retries included', null=True),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='model',
+            field=models.CharField(blank=True, help_text='Model the copy was generated with; blank when served from cache', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='adcopy',
+            name='output_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='cached_tokens',
+            field=models.PositiveIntegerField(default=0, help_text="Prompt tokens served from the provider's prompt cache"),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='cost_usd',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Estimated cost from ADCOPY_MODEL_PRICES', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='image_tokens',
+            field=models.PositiveIntegerField(default=0, help_text='Estimated prompt tokens spent on page images'),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='input_tokens',
+            field=models.PositiveIntegerField(default=0, help_text='Prompt tokens, including image and cached tokens'),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, help_text='Time spent waiting for the model, retries included', null=True),
+        ),
+        migrations.AddField(
+            model_name='copyjob',
+            name='output_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
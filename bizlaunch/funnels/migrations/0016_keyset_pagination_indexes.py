@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0015_llm_usage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='copyjob',
+            index=models.Index(fields=['user', '-created_at', '-uuid'], name='copyjob_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', '-created_at', '-uuid'], name='project_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-17 03:09
+
+from django.db import migrations, models
+
+
+def delete_duplicate_copies(apps, schema_editor):
+    # Keep one copy per page of a job: the latest completed one, else the latest.
+    AdCopy = apps.get_model("funnels", "AdCopy")
+    copies = (
+        AdCopy.objects.filter(page_image__isnull=False)
+        .order_by("copy_job_id", "page_image_id", "-created_at")
+        .values_list("pk", "copy_job_id", "page_image_id", "status")
+    )
+    kept = {}
+    duplicates = []
+    for pk, copy_job_id, page_image_id, status in copies.iterator():
+        key = (copy_job_id, page_image_id)
+        if key not in kept:
+            kept[key] = (pk, status)
+        elif status == "completed" and kept[key][1] != "completed":
+            duplicates.append(kept[key][0])
+            kept[key] = (pk, status)
+        else:
+            duplicates.append(pk)
+    AdCopy.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0016_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_copies, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='adcopy',
+            constraint=models.UniqueConstraint(fields=('copy_job', 'page_image'), name='adcopy_job_page_image_unique'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-17 03:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_duplicate_row_jobs(apps, schema_editor):
+    # Keep the first row job created for each row of a client file.
+    CopyJob = apps.get_model("funnels", "CopyJob")
+    row_jobs = (
+        CopyJob.objects.filter(parent__isnull=False, row_number__isnull=False)
+        .order_by("parent_id", "row_number", "created_at")
+        .values_list("pk", "parent_id", "row_number")
+    )
+    seen = set()
+    duplicates = []
+    for pk, parent_id, row_number in row_jobs.iterator():
+        if (parent_id, row_number) in seen:
+            duplicates.append(pk)
+        seen.add((parent_id, row_number))
+    CopyJob.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funnels', '0017_adcopy_job_page_image_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_row_jobs, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='copyjob',
+            name='client_file_offset',
+            field=models.PositiveBigIntegerField(default=0, help_text='Byte offset in the client file after the rows ingested so far'),
+        ),
+        migrations.AddConstraint(
+            model_name='copyjob',
+            constraint=models.UniqueConstraint(fields=('parent', 'row_number'), name='copyjob_parent_row_unique'),
+        ),
+    ]
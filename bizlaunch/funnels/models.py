@@ -1,10 +1,20 @@
+import base64
 import os
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 from bizlaunch.core.models import CoreModel
+from bizlaunch.funnels.images import (
+    get_image_variant,
+    image_extension,
+    inspect_image,
+    variant_spec,
+)
 
 User = get_user_model()
 
@@ -92,11 +102,40 @@ class PageTemplate(CoreModel):
         return f"{self.funnel.name} - {self.name}"
 
 
+@receiver([post_save, post_delete], sender=SystemTemplate)
+@receiver([post_save, post_delete], sender=FunnelTemplate)
+@receiver([post_save, post_delete], sender=SystemFunnelAssociation)
+@receiver([post_save, post_delete], sender=PageTemplate)
+def invalidate_funnel_catalog(sender, **kwargs):
+    """
+    Start a new version of the cached funnel catalog once the change is
+    committed. Bulk updates bypass signals; call invalidate_catalog() after
+    them.
+    """
+    # local import to avoid circular dependency
+    from bizlaunch.funnels.catalog import invalidate_catalog
+
+    transaction.on_commit(invalidate_catalog)
+
+
+def page_image_upload_path(instance, filename):
+    """
+    Generate the file upload path for PageImage files.
+    Images are content-addressed, so identical uploads share one file.
+    Path format: page_images/content_hash.ext
+    Files saved before the hash is known keep their own name.
+    """
+    if not instance.content_hash:
+        return f"page_images/{filename}"
+    return f"page_images/{instance.content_hash}{image_extension(instance.mime_type)}"
+
+
 class PageImage(CoreModel):
     """
     Dedicated model to store images associated with a PageTemplate.
     You can reference these images within the PageTemplate.components JSON
     if needed, using an identifier or a direct URL.
+    The image itself lives in file storage; only its metadata is in the row.
     """
 
     page = models.ForeignKey(
@@ -104,7 +143,22 @@ class PageImage(CoreModel):
         on_delete=models.CASCADE,
         related_name="images",
     )
-    image_content = models.TextField(null=True, blank=True)
+    image = models.ImageField(
+        upload_to=page_image_upload_path,
+        width_field="width",
+        height_field="height",
+        null=True,
+        blank=True,
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="SHA-256 of the image bytes",
+    )
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    mime_type = models.CharField(max_length=50, blank=True)
     components = models.JSONField(
         default=dict,
         help_text="JSON structure defining components like headlines, "
@@ -118,6 +172,68 @@ class PageImage(CoreModel):
     def __str__(self):
         return f"Image for {self.page.name}"
 
+    def save(self, *args, **kwargs):
+        # Fill the metadata of newly assigned images before the file is
+        # committed, since the upload path is derived from the content hash.
+        if self.image and (not self.image._committed or not self.content_hash):
+            self.image.open("rb")
+            metadata = inspect_image(self.image.read())
+            self.image.seek(0)
+            for field, value in metadata.items():
+                setattr(self, field, value)
+        if self.image and not self.image._committed:
+            # Reuse a stored copy of the same content; saving again would
+            # make the storage add a suffix to the name instead.
+            name = self.image.field.generate_filename(self, os.path.basename(self.image.name))
+            if self.content_hash and self.image.storage.exists(name):
+                self.image.close()
+                self.image.name = name
+                self.image._committed = True
+        super().save(*args, **kwargs)
+
+    def read_image(self) -> bytes:
+        """
+        Read the raw image bytes from storage.
+        """
+        with self.image.open("rb") as f:
+            return f.read()
+
+    @property
+    def prompt_image_key(self) -> str:
+        """
+        Identifies the exact image sent to the model: the source content
+        plus the preprocessing applied to it.
+        """
+        if not settings.ADCOPY_IMAGE_PREPROCESS:
+            return self.content_hash
+        return f"{self.content_hash}:" + variant_spec(
+            settings.ADCOPY_IMAGE_FORMAT,
+            settings.ADCOPY_IMAGE_QUALITY,
+            settings.ADCOPY_IMAGE_DETAIL,
+        )
+
+    def get_prompt_image(self):
+        """
+        Return the bytes and MIME type of the image as sent to the model,
+        downsized and re-encoded unless ADCOPY_IMAGE_PREPROCESS is off.
+        """
+        if not settings.ADCOPY_IMAGE_PREPROCESS:
+            return self.read_image(), self.mime_type
+        return get_image_variant(
+            self,
+            settings.ADCOPY_IMAGE_FORMAT,
+            quality=settings.ADCOPY_IMAGE_QUALITY,
+            detail=settings.ADCOPY_IMAGE_DETAIL,
+        )
+
+    def get_image_data_url(self) -> str:
+        """
+        Base64-encode the prompt image as a data URL. Only called when a
+        prompt is built, so the encoded copy never outlives a single request.
+        """
+        content, mime_type = self.get_prompt_image()
+        return f"data:{mime_type};base64,{base64.b64encode(content).decode('utf-8')}"
+
 
 class Status(models.TextChoices):
     PENDING = "pending", _("Pending")
@@ -127,6 +243,40 @@ class Status(models.TextChoices):
     FAILED = "failed", _("Failed")
 
 
+class CopyBatch(CoreModel):
+    """
+    A provider batch holding the page prompts of one or more batch-mode
+    CopyJobs. Results are ingested into AdCopy once the batch completes.
+    """
+
+    backend = models.CharField(
+        max_length=255,
+        help_text="Dotted path of the batch backend the batch was submitted to",
+    )
+    batch_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Identifier of the batch at the backend",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    input_file = models.FileField(
+        upload_to="copy_batches/",
+        null=True,
+        blank=True,
+        help_text="JSONL file with one model request per page",
+    )
+    request_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Copy Batch {self.pk} - {self.status}"
+
+
 def copy_job_file_upload_path(instance, filename):
     """
     Generate the file upload path for CopyJob files.
@@ -135,7 +285,87 @@ def copy_job_file_upload_path(instance, filename):
     return os.path.join(f"{instance.user.uuid}/copy_jobs/{instance.pk}/{filename}")
 
 
-class CopyJob(CoreModel):
+class LLMUsage(models.Model):
+    """
+    Model usage of ad copy generation: for one page on AdCopy, summed over
+    its pages on CopyJob.
+    """
+
+    input_tokens = models.PositiveIntegerField(
+        default=0,
+        help_text="Prompt tokens, including image and cached tokens",
+    )
+    cached_tokens = models.PositiveIntegerField(
+        default=0,
+        help_text="Prompt tokens served from the provider's prompt cache",
+    )
+    image_tokens = models.PositiveIntegerField(
+        default=0,
+        help_text="Estimated prompt tokens spent on page images",
+    )
+    output_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Time spent waiting for the model, retries included",
+    )
+    cost_usd = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        help_text="Estimated cost from ADCOPY_MODEL_PRICES",
+    )
+
+    class Meta:
+        abstract = True
+
+
+def client_upload_path(instance, filename):
+    """
+    Generate the file path of chunked client file uploads.
+    Path format: user_uuid/uploads/upload_uuid/file_name.csv
+    """
+    return os.path.join(f"{instance.user.uuid}/uploads/{instance.pk}/{filename}")
+
+
+class ClientUpload(CoreModel):
+    """
+    A client file uploaded in chunks. Chunks are appended to the file as they
+    arrive; `offset` is how many bytes have been received, so an interrupted
+    upload resumes from there. The status is PROCESSING while a chunk is
+    being written. Once complete, the file can be attached to CopyJobs as
+    their client_file.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="client_uploads",
+    )
+    file = models.FileField(upload_to=client_upload_path)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size of the file in bytes")
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Number of bytes received so far",
+    )
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Expected SHA-256 of the whole file, hex encoded",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+
+    def __str__(self):
+        return f"Client Upload {self.pk} - {self.status}"
+
+
+class CopyJob(CoreModel, LLMUsage):
     """
     Stores client data and tracks the status of the ad copy generation process.
     """
@@ -169,12 +399,64 @@ class CopyJob(CoreModel):
         blank=True,
         help_text="Celery task ID for asynchronous processing",
     )
+    use_cache = models.BooleanField(
+        default=True,
+        help_text="Reuse previously generated copy for identical pages and instructions",
+    )
+    use_batch = models.BooleanField(
+        default=False,
+        help_text="Generate through the provider's batch API: slower, but cheaper for bulk jobs",
+    )
+    batch = models.ForeignKey(
+        CopyBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        help_text="Batch the job's pages were submitted in",
+    )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="row_jobs",
+        help_text="Job whose client file this job was created from, one job per row",
+    )
+    row_number = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Row of the parent's client file this job was created from",
+    )
+    rows_ingested = models.PositiveIntegerField(
+        default=0,
+        help_text="Rows of the client file turned into row jobs so far",
+    )
+    client_file_offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Byte offset in the client file after the rows ingested so far",
+    )
+    row_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Number of rows in the client file, set once it has been read to the end",
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's jobs (bizlaunch.core.pagination)
+            models.Index(fields=["user", "-created_at", "-uuid"], name="copyjob_user_created_idx"),
+        ]
+        constraints = [
+            # One row job per row of a client file
+            models.UniqueConstraint(fields=["parent", "row_number"], name="copyjob_parent_row_unique"),
+        ]
 
     def __str__(self):
         return f"Copy Job {self.pk} - {self.status}"
 
 
-class AdCopy(CoreModel):
+class AdCopy(CoreModel, LLMUsage):
     """
     Stores the generated ad copy results.
     """
@@ -186,14 +468,45 @@ class AdCopy(CoreModel):
     )
     funnel = models.ForeignKey(FunnelTemplate, on_delete=models.CASCADE, null=True)
     page = models.ForeignKey(PageTemplate, on_delete=models.CASCADE)
-    copy_text = models.TextField(help_text="Generated ad copy text")
+    page_image = models.ForeignKey(
+        PageImage,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="generated_copies",
+        help_text="Page image the copy was generated from",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.COMPLETED,
+        help_text="Whether the copy for this page was generated or failed",
+    )
+    copy_text = models.TextField(blank=True, help_text="Generated ad copy text")
     copy_json = models.JSONField(
         default=dict,
         help_text="Generated ad copy in JSON format",
     )
+    error = models.TextField(
+        blank=True,
+        help_text="Why generation failed, for failed pages",
+    )
+    model = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Model the copy was generated with; blank when served from cache",
+    )
+
+    class Meta:
+        constraints = [
+            # One copy per page of a job, however many times it is generated
+            models.UniqueConstraint(
+                fields=["copy_job", "page_image"], name="adcopy_job_page_image_unique"
+            ),
+        ]
 
     def __str__(self):
-        return f"Ad Copy for Job {self.job.pk}"
+        return f"Ad Copy for Job {self.copy_job.pk}"
 
 
 class Project(CoreModel):
@@ -213,5 +526,11 @@ class Project(CoreModel):
         related_name="project",
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's projects (bizlaunch.core.pagination)
+            models.Index(fields=["user", "-created_at", "-uuid"], name="project_user_created_idx"),
+        ]
+
     def __str__(self):
         return self.name
@@ -0,0 +1,145 @@
+import logging
+import time
+
+import redis
+from django.conf import settings
+
+from bizlaunch.funnels.streaming import get_stream_client
+
+logger = logging.getLogger(__name__)
+
+
+def progress_key(job_uuid):
+    """
+    Redis hash holding the progress of a CopyJob.
+    """
+    return f"copyjob:{job_uuid}:progress"
+
+
+def start_progress(job, total, completed=0):
+    """
+    Reset the progress of a job that is starting or resuming.
+    Args:
+        job (CopyJob): The job
+        total (int): Number of pages in the job
+        completed (int): Pages already done before a resume
+    """
+    key = progress_key(job.uuid)
+    now = time.time()
+    try:
+        pipe = get_stream_client().pipeline()
+        pipe.delete(key)
+        pipe.hset(
+            key,
+            mapping={
+                "user": str(job.user_id),
+                "status": job.status,
+                "total": total,
+                "done": completed,
+                "failed": 0,
+                "resumed": completed,
+                "started_at": now,
+                "updated_at": now,
+            },
+        )
+        pipe.expire(key, settings.COPY_JOB_PROGRESS_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not record progress of CopyJob {job.uuid}: {str(e)}")
+
+
+def record_page(job_uuid, image, success):
+    """
+    Count one finished page and return the updated progress, or None when
+    it could not be recorded. Safe to call from concurrent page tasks.
+    """
+    key = progress_key(job_uuid)
+    try:
+        pipe = get_stream_client().pipeline()
+        pipe.hincrby(key, "done" if success else "failed", 1)
+        pipe.hset(
+            key,
+            mapping={
+                "latest_page": str(image.uuid),
+                "latest_page_name": image.page.name,
+                "updated_at": time.time(),
+            },
+        )
+        pipe.hgetall(key)
+        state = pipe.execute()[-1]
+    except redis.RedisError as e:
+        logger.warning(f"Could not record progress of CopyJob {job_uuid}: {str(e)}")
+        return None
+    return format_progress(state)
+
+
+def finish_progress(job_uuid, status):
+    """
+    Record the final status of a job; returns the final progress or None.
+    """
+    key = progress_key(job_uuid)
+    try:
+        pipe = get_stream_client().pipeline()
+        pipe.hset(key, mapping={"status": status, "updated_at": time.time()})
+        pipe.hgetall(key)
+        state = pipe.execute()[-1]
+    except redis.RedisError as e:
+        logger.warning(f"Could not record progress of CopyJob {job_uuid}: {str(e)}")
+        return None
+    return format_progress(state)
+
+
+def get_progress(job_uuid):
+    """
+    Read the progress of a job.
+    Returns:
+        tuple: (owner user id, progress dict), or (None, None) when no
+        progress is recorded for the job
+    """
+    try:
+        state = get_stream_client().hgetall(progress_key(job_uuid))
+    except redis.RedisError as e:
+        logger.warning(f"Could not read progress of CopyJob {job_uuid}: {str(e)}")
+        return None, None
+    if not state or b"user" not in state or b"total" not in state:
+        return None, None
+    return state[b"user"].decode("utf-8"), format_progress(state)
+
+
+def format_progress(state):
+    """
+    Turn a raw progress hash into the progress served to clients.
+    The ETA extrapolates the time per page spent since the job (re)started.
+    """
+    state = {key.decode("utf-8"): value.decode("utf-8") for key, value in state.items()}
+    if "total" not in state:
+        return None
+    total = int(state["total"])
+    done = int(state["done"])
+    failed = int(state["failed"])
+    started_at = float(state["started_at"])
+    updated_at = float(state["updated_at"])
+
+    remaining = max(total - done - failed, 0)
+    processed = done + failed - int(state["resumed"])
+    eta = None
+    if remaining == 0:
+        eta = 0
+    elif processed > 0:
+        eta = round((updated_at - started_at) / processed * remaining, 1)
+
+    latest_page = None
+    if state.get("latest_page"):
+        latest_page = {
+            "uuid": state["latest_page"],
+            "name": state.get("latest_page_name", ""),
+        }
+    return {
+        "status": state["status"],
+        "total": total,
+        "done": done,
+        "failed": failed,
+        "latest_page": latest_page,
+        "eta_seconds": eta,
+        "updated_at": updated_at,
+    }
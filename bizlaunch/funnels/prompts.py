@@ -0,0 +1,108 @@
+from typing import NamedTuple
+
+from django.conf import settings
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from bizlaunch.funnels.structured import components_prompt, get_components
+
+# System prompt template
+SYSTEM_PROMPT = """You are an expert advertising copywriter. Analyze the provided webpage image and user instructions to generate compelling ad copy.
+
+    Output Format:
+    - Return the copy in clear sections using markdown-style headers
+    - Each section should address a specific component from the page
+    - Include both textual and visual analysis insights
+    - Maintain brand voice specified in the instructions
+
+    Example Response:
+    ### Main Headline
+    Experience the Future of Fitness
+
+    ### Hero Section
+    Our state-of-the-art equipment and personalized training programs are designed to help you achieve your goals faster.
+
+    ### Call-to-Action
+    Join us today and transform your fitness journey. Click below to get started."""
+
+# System prompt for pages with a component schema; the answer is validated
+# against the schema and stored in AdCopy.copy_json.
+STRUCTURED_SYSTEM_PROMPT = """You are an expert advertising copywriter. Analyze the provided webpage image and user instructions to generate compelling ad copy for each component of the page.
+
+Output Format:
+- Return a single JSON object of the form {"components": [{"section": "...", "component": "...", "copy": "..."}]}
+- Include exactly one entry for every page component listed by the user, with the same "section" and "component" values and in the same order
+- "copy" is the plain text of the component, without markdown
+- Maintain brand voice specified in the instructions"""
+
+
+class PromptParts(NamedTuple):
+    """
+    The text of one model request, from the most to the least shared part.
+    Providers cache prompt prefixes (OpenAI from 1024 tokens on), so messages
+    are laid out in this order: the system prompt is the same for every
+    call, the page context and image for every job generating that page,
+    and only the instructions differ per job. Repeat pages then only pay
+    full price for the instructions.
+    """
+
+    system: str
+    page_context: str
+    instructions: str
+
+
+def get_image_url(data: dict):
+    """
+    Build the image data URL of a chain input.
+    Inputs carry either a PageImage under "image", which is read and encoded
+    only now, or an already encoded "image_base64" string.
+    """
+    image = data.get("image")
+    if image is not None:
+        return image.get_image_data_url()
+    return f"data:image/jpeg;base64,{data['image_base64']}"
+
+
+def output_components(data: dict):
+    """
+    Component schema the copy of a chain input is structured by, or an
+    empty list for free-form markdown copy.
+    """
+    if not settings.ADCOPY_STRUCTURED_OUTPUT:
+        return []
+    return get_components(data)
+
+
+def get_prompt_parts(data: dict):
+    """
+    Prompt text sent to the model for a chain input.
+    Returns:
+        PromptParts: System prompt, page context and job instructions
+    """
+    instructions = f"User Instructions:\n{data['instructions']}"
+    components = output_components(data)
+    if not components:
+        return PromptParts(SYSTEM_PROMPT, "", instructions)
+    return PromptParts(STRUCTURED_SYSTEM_PROMPT, components_prompt(components), instructions)
+
+
+def build_messages(data: dict):
+    """
+    Chat messages sent to the model for a chain input, laid out static
+    first (see PromptParts): system prompt, then the page's component
+    schema and image, then the job's instructions.
+    """
+    parts = get_prompt_parts(data)
+    content = []
+    if parts.page_context:
+        content.append({"type": "text", "text": parts.page_context})
+    content.append(
+        {
+            "type": "image_url",
+            "image_url": {
+                "url": get_image_url(data),
+                "detail": settings.ADCOPY_IMAGE_DETAIL,
+            },
+        }
+    )
+    content.append({"type": "text", "text": parts.instructions})
+    return [SystemMessage(content=parts.system), HumanMessage(content=content)]
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import math
+import time
+
+import redis
+from django.conf import settings
+from langchain_core.callbacks import BaseCallbackHandler
+
+from bizlaunch.funnels.metrics import get_usage
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill and take from two token buckets, one counting requests
+# and one counting model tokens, both refilled continuously over a minute.
+# Nothing is taken unless both buckets can cover the call; in that case the
+# script returns how many milliseconds to wait before trying again.
+# Redis' own clock is used so that all workers agree on the time.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+
+local function level(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local value = tonumber(state[1])
+    if value == nil then
+        return capacity
+    end
+    return math.min(capacity, value + (now - tonumber(state[2])) * capacity / 60000)
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+local requests_left = level(KEYS[1], rpm)
+local tokens_left = level(KEYS[2], tpm)
+
+local wait = 0
+if requests_left < 1 then
+    wait = math.max(wait, (1 - requests_left) * 60000 / rpm)
+end
+if tokens_left < tokens then
+    wait = math.max(wait, (tokens - tokens_left) * 60000 / tpm)
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+
+redis.call('HSET', KEYS[1], 'level', tostring(requests_left - 1), 'ts', now)
+redis.call('HSET', KEYS[2], 'level', tostring(tokens_left - tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('PEXPIRE', KEYS[2], 120000)
+return 0
+"""
+
+# Atomically refill the tokens bucket and add ARGV[2] tokens to it, up to its
+# capacity ARGV[1]. A negative amount takes tokens and may leave the level
+# below zero, so that later callers wait until the overdraft is refilled.
+TOKEN_ADJUST_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+
+local capacity = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'level', 'ts')
+local value = tonumber(state[1])
+if value == nil then
+    value = capacity
+else
+    value = math.min(capacity, value + (now - tonumber(state[2])) * capacity / 60000)
+end
+
+redis.call('HSET', KEYS[1], 'level', tostring(math.min(capacity, value + tonumber(ARGV[2]))), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return 0
+"""
+
+_script = None
+_adjust_script = None
+
+
+def get_token_bucket_script():
+    """
+    Return the token bucket script registered on the rate limit Redis.
+    """
+    global _script
+    if _script is None:
+        client = redis.Redis.from_url(settings.OPENAI_RATE_LIMIT_REDIS_URL)
+        _script = client.register_script(TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+def get_token_adjust_script():
+    """
+    Return the token adjustment script registered on the rate limit Redis.
+    """
+    global _adjust_script
+    if _adjust_script is None:
+        client = redis.Redis.from_url(settings.OPENAI_RATE_LIMIT_REDIS_URL)
+        _adjust_script = client.register_script(TOKEN_ADJUST_SCRIPT)
+    return _adjust_script
+
+
+class RateLimiter:
+    """
+    Distributed requests/min and tokens/min limiter for one model.
+    The budget lives in Redis and is shared by every worker process, so the
+    aggregate call rate stays at the provider limit however many jobs run.
+    Callers that exceed the budget wait for it to refill instead of failing.
+    """
+
+    # Upper bound on a single sleep, so waiters re-check the bucket regularly
+    max_sleep = 5.0
+
+    def __init__(self, model, requests_per_minute, tokens_per_minute):
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.keys = [
+            f"ratelimit:{model}:requests",
+            f"ratelimit:{model}:tokens",
+        ]
+
+    def try_acquire(self, tokens):
+        """
+        Try to take one request and the given number of tokens.
+        Returns:
+            float: 0 if acquired, otherwise the seconds to wait before retrying
+        """
+        # A call larger than the whole bucket could never be served.
+        tokens = min(tokens, self.tokens_per_minute)
+        try:
+            wait_ms = get_token_bucket_script()(
+                keys=self.keys,
+                args=[self.requests_per_minute, self.tokens_per_minute, tokens],
+            )
+        except redis.RedisError as e:
+            # Fail open: an unavailable limiter must not stop generation.
+            logger.warning(f"Rate limiter unavailable, proceeding: {str(e)}")
+            return 0
+        return wait_ms / 1000
+
+    def acquire(self, tokens):
+        """
+        Block until one request and the given number of tokens are available.
+        """
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            logger.info(f"Rate limit reached for {self.model}, waiting {wait:.2f}s")
+            time.sleep(min(wait, self.max_sleep))
+
+    def settle(self, estimated, used):
+        """
+        Correct the tokens taken for a call by acquire() once its real usage
+        is known: the unused part of the estimate is given back, and usage
+        beyond it is taken from the bucket.
+        Args:
+            estimated (int): Tokens passed to acquire() for the call
+            used (int): Tokens the provider reported for the call
+        """
+        difference = min(estimated, self.tokens_per_minute) - used
+        if not difference:
+            return
+        try:
+            get_token_adjust_script()(
+                keys=self.keys[1:], args=[self.tokens_per_minute, difference]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, usage not settled: {str(e)}")
+
+    async def aacquire(self, tokens):
+        """
+        Async variant of acquire() that yields to the event loop while waiting.
+        """
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if not wait:
+                return
+            logger.info(f"Rate limit reached for {self.model}, waiting {wait:.2f}s")
+            await asyncio.sleep(min(wait, self.max_sleep))
+
+
+class RateLimitSettlementHandler(BaseCallbackHandler):
+    """
+    Callback handler settling the estimate a call acquired from a rate
+    limiter with the usage the provider reports for it.
+    """
+
+    def __init__(self, rate_limiter, estimated):
+        self.rate_limiter = rate_limiter
+        self.estimated = estimated
+
+    def on_llm_end(self, response, **kwargs):
+        usage = get_usage(response)
+        used = usage["input_tokens"] + usage["output_tokens"]
+        # Without reported usage the estimate stands.
+        if used:
+            self.rate_limiter.settle(self.estimated, used)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count of a text, at about four characters per token.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def get_rate_limiter(model):
+    """
+    Return the shared limiter for a model, or None when rate limiting is off.
+    """
+    if not settings.OPENAI_RATE_LIMIT_ENABLED:
+        return None
+    return RateLimiter(
+        model,
+        requests_per_minute=settings.OPENAI_RATE_LIMIT_RPM,
+        tokens_per_minute=settings.OPENAI_RATE_LIMIT_TPM,
+    )
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+import openai
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: throttling, timeouts, dropped connections and
+# provider-side failures. Anything else (bad request, auth, content policy)
+# fails the same way on every attempt.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    openai.ConflictError,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the model while its circuit breaker is open.
+    """
+
+
+def is_retryable(exc):
+    """
+    Whether a failed model call may succeed if attempted again.
+    """
+    # An exhausted quota is reported as a 429 too, but no retry can help.
+    if isinstance(exc, openai.RateLimitError) and exc.code == "insufficient_quota":
+        return False
+    if isinstance(exc, RETRYABLE_ERRORS):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code == 408
+
+
+def backoff_delay(attempt):
+    """
+    Seconds to wait before retry number `attempt` (starting at 0), using
+    exponential backoff with full jitter so that workers that failed
+    together do not retry together.
+    """
+    ceiling = min(
+        settings.ADCOPY_RETRY_MAX_DELAY,
+        settings.ADCOPY_RETRY_INITIAL_DELAY * 2**attempt,
+    )
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker shared by all workers through the cache.
+
+    After ADCOPY_CIRCUIT_FAILURE_THRESHOLD consecutive retryable failures
+    the circuit opens and calls fail immediately with CircuitOpenError for
+    ADCOPY_CIRCUIT_RESET_TIMEOUT seconds. Then it is half-open: a single
+    call across all workers is let through as a probe while the others keep
+    failing fast. A probe failure re-opens the circuit, a success closes it.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.failures_key = f"circuit:{name}:failures"
+        self.open_key = f"circuit:{name}:open"
+        # Set while the circuit is open or half-open, until a call succeeds
+        self.tripped_key = f"circuit:{name}:tripped"
+        self.probe_key = f"circuit:{name}:probe"
+
+    def is_open(self):
+        try:
+            return bool(cache.get(self.open_key))
+        except Exception:
+            return False
+
+    def before_call(self):
+        try:
+            state = cache.get_many([self.open_key, self.tripped_key])
+            if state.get(self.open_key):
+                allowed = False
+            elif state.get(self.tripped_key):
+                # Half-open: only the caller that claims the probe goes ahead.
+                allowed = cache.add(
+                    self.probe_key, True, timeout=settings.ADCOPY_CIRCUIT_RESET_TIMEOUT
+                )
+            else:
+                allowed = True
+        except Exception:
+            allowed = True
+        if not allowed:
+            raise CircuitOpenError(f"Circuit breaker open for {self.name}")
+
+    def record_success(self):
+        try:
+            cache.delete_many([self.failures_key, self.tripped_key, self.probe_key])
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {str(e)}")
+
+    def record_failure(self):
+        try:
+            cache.add(self.failures_key, 0, timeout=settings.ADCOPY_CIRCUIT_RESET_TIMEOUT * 10)
+            failures = cache.incr(self.failures_key)
+            if failures >= settings.ADCOPY_CIRCUIT_FAILURE_THRESHOLD or cache.get(
+                self.tripped_key
+            ):
+                cache.set(self.open_key, True, timeout=settings.ADCOPY_CIRCUIT_RESET_TIMEOUT)
+                cache.set(
+                    self.tripped_key, True, timeout=settings.ADCOPY_CIRCUIT_RESET_TIMEOUT * 10
+                )
+                cache.delete(self.probe_key)
+                logger.error(
+                    f"Circuit breaker opened for {self.name} after {failures} failures"
+                )
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {str(e)}")
+
+
+def call_with_retries(func, breaker):
+    """
+    Call func() guarded by the breaker, retrying retryable errors with
+    jittered exponential backoff up to ADCOPY_RETRY_ATTEMPTS attempts.
+    """
+    for attempt in range(settings.ADCOPY_RETRY_ATTEMPTS):
+        breaker.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if attempt + 1 == settings.ADCOPY_RETRY_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Retrying {breaker.name} in {delay:.1f}s after: {str(e)}")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+async def acall_with_retries(func, breaker):
+    """
+    Async variant of call_with_retries(); func() must return an awaitable.
+    """
+    for attempt in range(settings.ADCOPY_RETRY_ATTEMPTS):
+        breaker.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if attempt + 1 == settings.ADCOPY_RETRY_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Retrying {breaker.name} in {delay:.1f}s after: {str(e)}")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+def stream_with_retries(func, breaker):
+    """
+    Streaming variant of call_with_retries(); func() must return an iterator.
+    Errors are only retried until the first chunk has been yielded, since
+    the caller has already consumed the partial output after that.
+    """
+    for attempt in range(settings.ADCOPY_RETRY_ATTEMPTS):
+        breaker.before_call()
+        started = False
+        try:
+            for chunk in func():
+                started = True
+                yield chunk
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if started or attempt + 1 == settings.ADCOPY_RETRY_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Retrying {breaker.name} in {delay:.1f}s after: {str(e)}")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return
+
+
+async def astream_with_retries(func, breaker):
+    """
+    Async variant of stream_with_retries(); func() must return an async iterator.
+    """
+    for attempt in range(settings.ADCOPY_RETRY_ATTEMPTS):
+        breaker.before_call()
+        started = False
+        try:
+            async for chunk in func():
+                started = True
+                yield chunk
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure()
+            if started or attempt + 1 == settings.ADCOPY_RETRY_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Retrying {breaker.name} in {delay:.1f}s after: {str(e)}")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return
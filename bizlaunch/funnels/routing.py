@@ -0,0 +1,106 @@
+import logging
+from typing import NamedTuple
+
+from django.conf import settings
+
+from bizlaunch.funnels.structured import get_components
+
+logger = logging.getLogger(__name__)
+
+
+class Priority:
+    """
+    How urgently a generation is needed.
+    """
+
+    HIGH = "high"  # a user is waiting, e.g. section regeneration
+    NORMAL = "normal"  # copy jobs
+    LOW = "low"  # batch-mode jobs
+
+
+class Route(NamedTuple):
+    """
+    The model a generation is sent to, and the name of the routing rule
+    that chose it, under which its latency and cost are recorded.
+    """
+
+    name: str
+    model: str
+
+
+DEFAULT_ROUTE_NAME = "default"
+
+
+def get_page_features(data: dict):
+    """
+    What the routing rules look at for a chain input.
+    Returns:
+        tuple: (page layout in lower case, number of components in the
+        page's schema or None when it has none, priority)
+    """
+    image = data.get("image")
+    layout = ""
+    if image is not None:
+        layout = (image.page.layout or "").lower()
+    components = get_components(data)
+    return (
+        layout,
+        len(components) if components else None,
+        data.get("priority", Priority.NORMAL),
+    )
+
+
+def rule_matches(rule, layout, component_count, priority):
+    """
+    Whether a page meets every condition of a routing rule:
+    - "priority": list of priorities the rule applies to
+    - "layouts": keywords, one of which the page layout must contain
+    - "max_components": most components the page's schema may have;
+      pages without a schema never match
+    """
+    if "priority" in rule and priority not in rule["priority"]:
+        return False
+    if "layouts" in rule and not any(
+        keyword.lower() in layout for keyword in rule["layouts"]
+    ):
+        return False
+    if "max_components" in rule and (
+        component_count is None or component_count > rule["max_components"]
+    ):
+        return False
+    return True
+
+
+def route_for(data: dict):
+    """
+    Pick the model for a chain input: the first of ADCOPY_MODEL_ROUTES
+    whose conditions the page meets, or ADCOPY_MODEL.
+    """
+    if settings.ADCOPY_ROUTING_ENABLED:
+        features = get_page_features(data)
+        for rule in settings.ADCOPY_MODEL_ROUTES:
+            if rule_matches(rule, *features):
+                return Route(rule["name"], rule["model"])
+    return Route(DEFAULT_ROUTE_NAME, settings.ADCOPY_MODEL)
+
+
+def estimate_cost(model, input_tokens, cached_tokens, output_tokens):
+    """
+    Cost of a call in USD from ADCOPY_MODEL_PRICES, or None for models
+    without a configured price. Dated snapshots reported by the provider,
+    e.g. "gpt-4o-2024-08-06", are priced as the model they start with.
+    """
+    prices = settings.ADCOPY_MODEL_PRICES.get(model)
+    if prices is None:
+        for name in sorted(settings.ADCOPY_MODEL_PRICES, key=len, reverse=True):
+            if model.startswith(f"{name}-"):
+                prices = settings.ADCOPY_MODEL_PRICES[name]
+                break
+        else:
+            return None
+    input_price, cached_price, output_price = prices
+    return (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
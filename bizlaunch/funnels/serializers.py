@@ -1,9 +1,17 @@
 import random
 import string
 
+from django.conf import settings
 from rest_framework import serializers
 
-from bizlaunch.funnels.models import AdCopy, CopyJob, Project, SystemTemplate
+from bizlaunch.funnels.models import (
+    AdCopy,
+    ClientUpload,
+    CopyJob,
+    Project,
+    Status,
+    SystemTemplate,
+)
 
 
 class SystemTemplateSerializer(serializers.ModelSerializer):
@@ -13,22 +21,77 @@ class SystemTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class ClientUploadSerializer(serializers.ModelSerializer):
+    """
+    Starts a chunked client file upload and reports how much of it arrived.
+    """
+
+    checksum = serializers.RegexField(
+        r"^[0-9a-fA-F]{64}$",
+        required=False,
+        allow_blank=True,
+        help_text="Optional SHA-256 of the whole file, hex encoded",
+    )
+
+    class Meta:
+        model = ClientUpload
+        fields = ["uuid", "filename", "size", "checksum", "offset", "status", "created_at"]
+        read_only_fields = ["uuid", "offset", "status", "created_at"]
+
+    def validate_filename(self, value):
+        if not value.endswith(".csv"):
+            raise serializers.ValidationError("Only CSV files are allowed.")
+        return value
+
+    def validate_size(self, value):
+        if value > settings.CLIENT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Files may be at most {settings.CLIENT_UPLOAD_MAX_SIZE} bytes."
+            )
+        return value
+
+
+def validate_client_upload(upload, request):
+    """
+    A client upload can only be attached by its owner once it is complete.
+    """
+    if upload.user_id != request.user.pk or upload.status != Status.COMPLETED:
+        raise serializers.ValidationError("No completed upload with this UUID.")
+    return upload
+
+
 class CopyJobCreateSerializer(serializers.ModelSerializer):
     text_data = serializers.CharField(write_only=True, required=True)
+    upload = serializers.SlugRelatedField(
+        slug_field="uuid",
+        queryset=ClientUpload.objects.all(),
+        write_only=True,
+        required=False,
+        help_text="A completed chunked upload, used as the client file",
+    )
 
     class Meta:
         model = CopyJob
-        fields = ["system", "client_file", "text_data"]
+        fields = ["system", "client_file", "upload", "text_data", "use_cache", "use_batch"]
+
+    def validate_upload(self, value):
+        return validate_client_upload(value, self.context["request"])
 
     def validate(self, attrs):
         if not attrs.get("text_data"):
             raise serializers.ValidationError("The 'text_data' field is required.")
         if attrs.get("client_file") and not attrs["client_file"].name.endswith(".csv"):
             raise serializers.ValidationError("Only CSV files are allowed.")
+        if attrs.get("client_file") and attrs.get("upload"):
+            raise serializers.ValidationError("Provide either client_file or upload.")
         return attrs
 
     def create(self, validated_data):
         text_data = validated_data.pop("text_data")
+        upload = validated_data.pop("upload", None)
+        if upload:
+            # The job shares the uploaded file instead of copying it.
+            validated_data["client_file"] = upload.file.name
         validated_data["client_data"] = {"user_input": text_data}
         validated_data["user"] = self.context["request"].user
         return super().create(validated_data)
@@ -37,7 +100,32 @@ class CopyJobCreateSerializer(serializers.ModelSerializer):
 class AdCopyGenerationSerializer(serializers.ModelSerializer):
     class Meta:
         model = AdCopy
-        fields = ["funnel", "page", "copy_text", "copy_json"]
+        fields = ["uuid", "funnel", "page", "status", "copy_text", "copy_json"]
+
+
+class SectionRegenerateSerializer(serializers.Serializer):
+    """
+    Request body for regenerating one section of an AdCopy.
+    """
+
+    section = serializers.CharField(help_text="Name of the section to rewrite")
+    instructions = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        default="",
+        help_text="Optional notes on how to change the section",
+    )
+
+    def validate_section(self, value):
+        ad_copy = self.context["ad_copy"]
+        sections = {
+            entry["section"] for entry in ad_copy.copy_json.get("components", [])
+        }
+        if value not in sections:
+            raise serializers.ValidationError(
+                "This ad copy has no structured copy for that section."
+            )
+        return value
 
 
 class CopyJobStatusSerializer(serializers.ModelSerializer):
@@ -50,7 +138,18 @@ class CopyJobStatusSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CopyJob
-        fields = ["uuid", "user", "status", "results", "created_at", "updated_at"]
+        fields = [
+            "uuid",
+            "user",
+            "status",
+            "results",
+            "parent",
+            "row_number",
+            "rows_ingested",
+            "row_count",
+            "created_at",
+            "updated_at",
+        ]
         read_only_fields = fields
 
 
@@ -87,38 +186,73 @@ class ProjectCreateSerializer(serializers.ModelSerializer):
     - system: The selected system funnel (required).
     - text_data: Write-only field. Either text_data or client_file must be provided.
     - client_file: Write-only field. Optional CSV file. Either this or text_data is required.
+    - upload: Write-only field. Optional UUID of a completed chunked upload, used
+      instead of client_file for large files.
+    - use_cache: Write-only field. Optional; set to false to always regenerate the copy.
+    - use_batch: Write-only field. Optional; generate the copy offline through the
+      provider's batch API (cheaper, finishes within 24 hours).
     """
 
     text_data = serializers.CharField(write_only=True, required=False, allow_blank=True)
     client_file = serializers.FileField(
         write_only=True, required=False, allow_null=True
     )
+    upload = serializers.SlugRelatedField(
+        slug_field="uuid",
+        queryset=ClientUpload.objects.all(),
+        write_only=True,
+        required=False,
+    )
     system = serializers.PrimaryKeyRelatedField(
         queryset=SystemTemplate.objects.all(), write_only=True
     )
+    use_cache = serializers.BooleanField(write_only=True, required=False, default=True)
+    use_batch = serializers.BooleanField(write_only=True, required=False, default=False)
     copy_job = CopyJobNestedSerializer(read_only=True)
 
     class Meta:
         model = Project
-        fields = ["uuid", "name", "system", "text_data", "client_file", "copy_job"]
+        fields = [
+            "uuid",
+            "name",
+            "system",
+            "text_data",
+            "client_file",
+            "upload",
+            "use_cache",
+            "use_batch",
+            "copy_job",
+        ]
         read_only_fields = ["uuid", "copy_job"]
 
     def validate(self, attrs):
         text = attrs.get("text_data", "").strip()
         file = attrs.get("client_file")
-        if not text and not file:
+        upload = attrs.get("upload")
+        if not text and not file and not upload:
             raise serializers.ValidationError(
-                "Either text_data or client_file is required."
+                "Either text_data, client_file or upload is required."
             )
         if file and not file.name.endswith(".csv"):
             raise serializers.ValidationError("Only CSV files are allowed.")
+        if file and upload:
+            raise serializers.ValidationError("Provide either client_file or upload.")
         return attrs
 
+    def validate_upload(self, value):
+        return validate_client_upload(value, self.context["request"])
+
     def create(self, validated_data):
         # Extract fields for the copy job creation.
         text = validated_data.pop("text_data", "").strip()
         client_file = validated_data.pop("client_file", None)
+        upload = validated_data.pop("upload", None)
+        if upload:
+            # The job shares the uploaded file instead of copying it.
+            client_file = upload.file.name
         system = validated_data.pop("system")
+        use_cache = validated_data.pop("use_cache", True)
+        use_batch = validated_data.pop("use_batch", False)
         request = self.context.get("request")
         user = request.user if request else None
 
@@ -138,7 +272,12 @@ class ProjectCreateSerializer(serializers.ModelSerializer):
 
         # Create the copy job. Note that the system is associated here.
         copy_job = CopyJob.objects.create(
-            system=system, client_data=client_data, user=user, client_file=client_file
+            system=system,
+            client_data=client_data,
+            user=user,
+            client_file=client_file,
+            use_cache=use_cache,
+            use_batch=use_batch,
         )
 
         # Create the project and link the copy job.
@@ -0,0 +1,170 @@
+import json
+import logging
+import time
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from bizlaunch.funnels.models import CopyJob, Status
+
+logger = logging.getLogger(__name__)
+
+# Job statuses after which no more events are published
+FINISHED_STATUSES = (Status.COMPLETED, Status.PARTIALLY_COMPLETED, Status.FAILED)
+
+_client = None
+
+
+def stream_channel(job_uuid):
+    """
+    Redis pub/sub channel the events of a CopyJob are published on.
+    """
+    return f"copyjob:{job_uuid}:stream"
+
+
+def get_stream_client():
+    """
+    Return this process's Redis client for publishing stream events.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.COPY_JOB_STREAM_REDIS_URL)
+    return _client
+
+
+class CopyStreamPublisher:
+    """
+    Publishes the live output of one CopyJob to its pub/sub channel.
+
+    Events are JSON objects with an "event" name:
+    - "delta": a chunk of generated copy for a page ({"page", "text"})
+    - "page": a page finished ({"page", "status"}, plus "error" on failure)
+    - "progress": the job's progress after a page finished (see progress.py)
+    - "done": the job finished ({"status"})
+
+    Token deltas are buffered per page and flushed at most every
+    COPY_JOB_STREAM_FLUSH_INTERVAL seconds, so a fast model costs a handful
+    of Redis round trips per second instead of one per token. Publishing
+    never raises: a client missing some output must not fail the job.
+    """
+
+    def __init__(self, job_uuid):
+        self.channel = stream_channel(job_uuid)
+        self.enabled = settings.COPY_JOB_STREAM_ENABLED
+        self.buffers = {}
+        self.last_flush = 0.0
+
+    def publish(self, event, **data):
+        if not self.enabled:
+            return
+        try:
+            get_stream_client().publish(
+                self.channel, json.dumps({"event": event, **data})
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish to {self.channel}: {str(e)}")
+
+    def delta(self, page_uuid, text):
+        if not self.enabled or not text:
+            return
+        self.buffers.setdefault(str(page_uuid), []).append(text)
+        # The first delta goes out right away; later ones are batched.
+        if time.monotonic() - self.last_flush >= settings.COPY_JOB_STREAM_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        buffers, self.buffers = self.buffers, {}
+        for page_uuid, parts in buffers.items():
+            self.publish("delta", page=page_uuid, text="".join(parts))
+        self.last_flush = time.monotonic()
+
+    def page(self, page_uuid, status, error=None, progress=None):
+        self.flush()
+        data = {"page": str(page_uuid), "status": status}
+        if error:
+            data["error"] = error
+        self.publish("page", **data)
+        if progress is not None:
+            self.publish("progress", **progress)
+
+    def done(self, status, progress=None):
+        self.flush()
+        if progress is not None:
+            self.publish("progress", **progress)
+        self.publish("done", status=status)
+
+
+def format_sse(event, data):
+    """
+    Encode one Server-Sent Event; data is a JSON string.
+    """
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def job_event_stream(job_uuid):
+    """
+    Async iterator of Server-Sent Events for a CopyJob.
+    Starts with a "status" event carrying the job's current status, then
+    relays the job's live events until it is done, the client goes away
+    or COPY_JOB_STREAM_TIMEOUT passes. Comment lines are sent while the
+    job is quiet to keep proxies from closing the connection.
+    """
+    client = redis.asyncio.Redis.from_url(settings.COPY_JOB_STREAM_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        # Subscribe before reading the status, so that no event published
+        # in between is lost.
+        await pubsub.subscribe(stream_channel(job_uuid))
+        job_status = (
+            await CopyJob.objects.filter(uuid=job_uuid)
+            .values_list("status", flat=True)
+            .afirst()
+        )
+        yield format_sse("status", json.dumps({"status": job_status}))
+        if job_status in FINISHED_STATUSES:
+            return
+        from bizlaunch.funnels.progress import (
+            get_progress,  # local import to avoid circular dependency
+        )
+
+        _, progress = await sync_to_async(get_progress)(job_uuid)
+        if progress is not None:
+            yield format_sse("progress", json.dumps(progress))
+
+        deadline = time.monotonic() + settings.COPY_JOB_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.COPY_JOB_STREAM_KEEPALIVE,
+            )
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            data = message["data"].decode("utf-8")
+            event = json.loads(data)["event"]
+            yield format_sse(event, data)
+            if event == "done":
+                return
+    except redis.RedisError as e:
+        logger.warning(f"Stream for CopyJob {job_uuid} interrupted: {str(e)}")
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF negotiate text/event-stream for the streaming endpoints.
+    Streaming responses bypass renderers; this only renders the errors
+    raised before the stream starts, as a single "error" event.
+    """
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_sse("error", json.dumps(data, default=str))
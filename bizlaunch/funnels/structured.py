@@ -0,0 +1,128 @@
+import json
+import re
+
+# Heads the component schema in the prompt of structured generations
+COMPONENTS_HEADER = "Page Components:"
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when the model's structured output does not match the page's
+    component schema.
+    """
+
+
+def get_components(data: dict):
+    """
+    Component schema of a chain input: an explicit "components" list, or
+    the components of its PageImage. Empty when the page has none.
+    """
+    components = data.get("components")
+    if components is None and data.get("image") is not None:
+        components = data["image"].components
+    if not isinstance(components, list):
+        return []
+    return [
+        component
+        for component in components
+        if isinstance(component, dict) and component.get("component")
+    ]
+
+
+def components_prompt(components):
+    """
+    The component schema as sent to the model.
+    """
+    schema = [
+        {
+            "section": component.get("section", ""),
+            "component": component["component"],
+            "description": component.get("description", ""),
+        }
+        for component in components
+    ]
+    return f"{COMPONENTS_HEADER}\n{json.dumps(schema, ensure_ascii=False)}"
+
+
+def parse_copy_json(text, components):
+    """
+    Validate the model's structured output against the component schema.
+    Args:
+        text (str): Model output, a JSON object with a "components" list
+        components (list): The page's component schema
+    Returns:
+        dict: {"components": [{"section", "component", "copy"}, ...]} with
+        one entry per schema component, in schema order
+    Raises:
+        StructuredOutputError: If the output is not valid JSON or misses
+        a component
+    """
+    try:
+        output = json.loads(_CODE_FENCE.sub("", text.strip()))
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Output is not valid JSON: {str(e)}")
+    if isinstance(output, dict):
+        output = output.get("components")
+    if not isinstance(output, list):
+        raise StructuredOutputError("Output has no components list")
+
+    copies = {}
+    for entry in output:
+        if isinstance(entry, dict) and isinstance(entry.get("copy"), str):
+            key = (entry.get("section", ""), entry.get("component"))
+            copies.setdefault(key, entry["copy"].strip())
+
+    result = []
+    for component in components:
+        key = (component.get("section", ""), component["component"])
+        if key not in copies:
+            raise StructuredOutputError(
+                f"Output is missing component {key[1]!r} of section {key[0]!r}"
+            )
+        result.append({"section": key[0], "component": key[1], "copy": copies[key]})
+    return {"components": result}
+
+
+def section_components(components, section):
+    """
+    The components of one section of a component schema.
+    """
+    return [
+        component for component in components if component.get("section", "") == section
+    ]
+
+
+def merge_copy_json(copy_json, update):
+    """
+    Replace the components of copy_json that appear in update, keeping
+    the order of copy_json.
+    Returns:
+        dict: The merged structured copy
+    """
+    copies = {
+        (entry["section"], entry["component"]): entry["copy"]
+        for entry in update["components"]
+    }
+    return {
+        "components": [
+            {**entry, "copy": copies.get((entry["section"], entry["component"]), entry["copy"])}
+            for entry in copy_json["components"]
+        ]
+    }
+
+
+def render_copy_text(copy_json):
+    """
+    Render structured copy as the markdown stored in AdCopy.copy_text,
+    one header per section followed by its components.
+    """
+    blocks = []
+    section = None
+    for entry in copy_json["components"]:
+        if entry["section"] != section:
+            section = entry["section"]
+            blocks.append(f"### {section}")
+        blocks.append(f"**{entry['component']}**\n{entry['copy']}")
+    return "\n\n".join(blocks)
@@ -1,84 +1,880 @@
-from celery import shared_task
-
-from .chains import generate_ad_copy, main  # Your LLM integration function
-from .models import (
-    AdCopy,
-    CopyJob,
-    PageImage,
-    PageTemplate,
-    Status,
-    SystemFunnelAssociation,
+import json
+import logging
+import tempfile
+import threading
+import uuid
+from functools import partial
+from itertools import islice
+
+from celery import chord, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .batch import (
+    BatchStatus,
+    batch_custom_id,
+    build_batch_request,
+    get_batch_backend,
+    parse_batch_output,
+)
+from .chains import (
+    agenerate_ad_copies,
+    generate_ad_copy,
+    output_components,
+    run_async,
+    validate_output,
+)
+from .ingest import ClientFileError, read_client_rows
+from .metrics import UsageCallbackHandler
+from .models import AdCopy, CopyBatch, CopyJob, PageImage, Status
+from .progress import finish_progress, record_page, start_progress
+from .routing import Priority
+from .streaming import CopyStreamPublisher
+from .structured import (
+    get_components,
+    merge_copy_json,
+    parse_copy_json,
+    render_copy_text,
+    section_components,
 )
 
+logger = logging.getLogger(__name__)
+
+
+class ExecutionMode:
+    """
+    Supported values for the COPY_JOB_EXECUTION_MODE setting.
+    """
+
+    SEQUENTIAL = "sequential"
+    FANOUT = "fanout"
+    ASYNC = "async"
+
+
+def aggregate_job_status(results):
+    """
+    Derive the final CopyJob status from per-page success flags.
+    A job with no pages is considered completed.
+    """
+    if all(results):
+        return Status.COMPLETED
+    if any(results):
+        return Status.PARTIALLY_COMPLETED
+    return Status.FAILED
+
+
+def build_instructions(client_data):
+    """
+    Turn a CopyJob's client data into the instructions sent to the model.
+    """
+    if client_data.get("user_input"):
+        return client_data["user_input"]
+    return "\n".join(f"{key}: {value}" for key, value in client_data.items())
+
+
+def build_copy_fields(image, output):
+    """
+    AdCopy fields for a page's generated output. Structured output is
+    stored in copy_json and rendered as markdown into copy_text.
+    """
+    components = output_components({"image": image})
+    if not components:
+        return {"copy_text": output}
+    copy_json = parse_copy_json(output, components)
+    return {"copy_text": render_copy_text(copy_json), "copy_json": copy_json}
+
+
+def save_page_result(job, image, output, publisher=None, usage=None):
+    """
+    Persist the outcome of generating one page: the copy text, or a failed
+    AdCopy recording the error when generation raised. `usage` holds the
+    AdCopy usage fields of the model calls made for the page.
+    Returns:
+        bool: Whether the page succeeded
+    """
+    if not isinstance(output, Exception):
+        try:
+            fields = build_copy_fields(image, output)
+        except Exception as e:
+            output = e
+
+    if isinstance(output, Exception):
+        logger.error(
+            f"Error processing page image {image.uuid} of CopyJob {job.uuid}: {str(output)}"
+        )
+        error = str(output) or output.__class__.__name__
+        AdCopy.objects.update_or_create(
+            copy_job=job,
+            page_image=image,
+            defaults={
+                "funnel": image.page.funnel,
+                "page": image.page,
+                "status": Status.FAILED,
+                "error": error,
+                **(usage or {}),
+            },
+        )
+        progress = record_page(job.uuid, image, success=False)
+        if publisher is not None:
+            publisher.page(image.uuid, Status.FAILED, error=error, progress=progress)
+        return False
+
+    # A page has one AdCopy per job; a duplicate attempt replaces it.
+    AdCopy.objects.update_or_create(
+        copy_job=job,
+        page_image=image,
+        defaults={
+            "funnel": image.page.funnel,
+            "page": image.page,
+            "status": Status.COMPLETED,
+            "error": "",
+            "copy_json": {},
+            **fields,
+            **(usage or {}),
+        },
+    )
+    progress = record_page(job.uuid, image, success=True)
+    if publisher is not None:
+        publisher.page(image.uuid, Status.COMPLETED, progress=progress)
+    logger.info(f"Saved ad copy for image in page: {image.page.name}")
+    return True
+
+
+# CopyJob fields summed over its pages
+JOB_USAGE_FIELDS = (
+    "input_tokens",
+    "cached_tokens",
+    "image_tokens",
+    "output_tokens",
+    "latency_ms",
+    "cost_usd",
+)
+
+
+def set_job_usage(job):
+    """
+    Sum the model usage of a job's pages, or of its row jobs for jobs
+    created from a client file, onto the job; its latency_ms is the model
+    time of all pages, not the job's wall-clock time. The caller saves
+    the job.
+    """
+    children = job.row_jobs.all() if job.row_count is not None else job.generated_copies.all()
+    totals = children.aggregate(**{field: Sum(field) for field in JOB_USAGE_FIELDS})
+    for field in JOB_USAGE_FIELDS:
+        value = totals[field]
+        if value is None and field not in ("latency_ms", "cost_usd"):
+            value = 0
+        setattr(job, field, value)
+
+
+def get_page_plan(system):
+    """
+    Resolve the ordered list of page images to generate for a system:
+    its funnels in system order, their pages in funnel order and each
+    page's images in image order. Images without a file are skipped.
+    Runs a single query; the page and funnel of every image are joined in.
+    """
+    return list(
+        PageImage.objects.filter(
+            page__funnel__systemfunnelassociation__system=system,
+            image__isnull=False,
+        )
+        .exclude(image="")
+        .select_related("page__funnel")
+        .order_by(
+            "page__funnel__systemfunnelassociation__order_in_system",
+            "page__order_in_funnel",
+            "order",
+        )
+    )
+
+
+def get_pending_images(job, images):
+    """
+    Checkpoint lookup for a (re)started job: drop the images that already
+    have a successful AdCopy for the job, and discard the failed attempts
+    of the remaining ones so they are generated again.
+    Returns:
+        tuple: (images still to generate, number of pages already done)
+    """
+    done = set(
+        job.generated_copies.filter(
+            status=Status.COMPLETED, page_image__isnull=False
+        ).values_list("page_image_id", flat=True)
+    )
+    job.generated_copies.exclude(status=Status.COMPLETED).delete()
+    pending = [image for image in images if image.uuid not in done]
+    return pending, len(images) - len(pending)
+
+
+def generate_page(job, image, publisher=None):
+    """
+    Generate and persist the ad copy for a single page image of a job.
+    With a publisher the copy is streamed to the job's live channel.
+    Returns:
+        bool: Whether the page succeeded
+    """
+    on_delta = None
+    if publisher is not None and publisher.enabled:
+        on_delta = partial(publisher.delta, image.uuid)
+    usage = UsageCallbackHandler()
+    try:
+        output = generate_ad_copy(
+            build_instructions(job.client_data),
+            image=image,
+            use_cache=job.use_cache,
+            on_delta=on_delta,
+            usage=usage,
+        )
+    except Exception as e:
+        output = e
+    return save_page_result(job, image, output, publisher, usage.as_fields())
+
 
-@shared_task(bind=True)
-def process_copy_job(job_uuid):
+def generate_pages_concurrently(job, images, publisher=None):
+    """
+    Generate the ad copy for all page images of a job in one event loop,
+    keeping up to COPY_JOB_ASYNC_CONCURRENCY model requests in flight.
+    Database writes happen afterwards, outside the event loop.
+    Returns:
+        list: Per-page success flags, in the order of the images
+    """
+    instructions = build_instructions(job.client_data)
+    inputs = [
+        {"instructions": instructions, "image": image}
+        for image in images
+    ]
+    on_delta = None
+    if publisher is not None and publisher.enabled:
+
+        def on_delta(index, text):
+            publisher.delta(images[index].uuid, text)
+
+    usages = [UsageCallbackHandler() for _ in images]
+    outputs = run_async(
+        agenerate_ad_copies(
+            inputs,
+            max_concurrency=settings.COPY_JOB_ASYNC_CONCURRENCY,
+            use_cache=job.use_cache,
+            on_delta=on_delta,
+            usages=usages,
+        )
+    )
+
+    return [
+        save_page_result(job, image, output, publisher, usage.as_fields())
+        for image, output, usage in zip(images, outputs, usages, strict=True)
+    ]
+
+
+def job_lock_key(job_uuid):
+    """
+    Cache key of the lock held by the task processing a CopyJob.
+    """
+    return f"copyjob:{job_uuid}:lock"
+
+
+def new_lock_owner():
+    """
+    Token identifying one run of a task holding a CopyJob lock. A task
+    redelivered by the broker keeps its task id, so the id cannot tell the
+    redelivered run from the original one.
+    """
+    return uuid.uuid4().hex
+
+
+def acquire_job_lock(job_uuid, owner, claim=None):
+    """
+    Claim a CopyJob for the task run `owner`. The lock expires unless its
+    owner refreshes it (see JobLockHeartbeat) within COPY_JOB_LOCK_TIMEOUT
+    seconds, so a killed worker leaves it behind for that long at most.
+    Args:
+        job_uuid: UUID of the job
+        owner (str): Token of the task run, see new_lock_owner()
+        claim (str, optional): Token under which the lock was claimed on
+            the task's behalf before it was enqueued, e.g. by
+            resume_copy_jobs; the task takes the lock over from it
+    Returns:
+        bool: Whether the task may process the job
+    """
+    key = job_lock_key(job_uuid)
+    try:
+        if claim is not None and cache.get(key) == claim:
+            cache.set(key, owner, timeout=settings.COPY_JOB_LOCK_TIMEOUT)
+            return True
+        return cache.add(key, owner, timeout=settings.COPY_JOB_LOCK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"CopyJob lock unavailable, proceeding: {str(e)}")
+        return True
+
+
+def refresh_job_lock(job_uuid, owner):
+    """
+    Extend the lock of a CopyJob by COPY_JOB_LOCK_TIMEOUT seconds.
+    Returns:
+        bool: Whether `owner` still holds the lock
+    """
+    key = job_lock_key(job_uuid)
     try:
-        print(f"Starting processing for CopyJob with UUID: {job_uuid}")
+        if cache.get(key) != owner:
+            return False
+        return cache.touch(key, settings.COPY_JOB_LOCK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Could not refresh lock of CopyJob {job_uuid}: {str(e)}")
+        return True
+
+
+def release_job_lock(job_uuid, owner):
+    """
+    Release the lock of a CopyJob once `owner` has finished with it.
+    A lock another run has taken over in the meantime is left alone.
+    """
+    key = job_lock_key(job_uuid)
+    try:
+        if cache.get(key) == owner:
+            cache.delete(key)
+    except Exception as e:
+        logger.warning(f"Could not release lock of CopyJob {job_uuid}: {str(e)}")
+
+
+class JobLockHeartbeat:
+    """
+    Context manager refreshing the lock of a CopyJob from a background
+    thread every third of COPY_JOB_LOCK_TIMEOUT while the task holding it
+    works, however long a single page takes.
+    """
+
+    def __init__(self, job_uuid, owner):
+        self.job_uuid = job_uuid
+        self.owner = owner
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(settings.COPY_JOB_LOCK_TIMEOUT / 3):
+            if not refresh_job_lock(self.job_uuid, self.owner):
+                logger.warning(f"Lock of CopyJob {self.job_uuid} was taken over")
+                return
+
+    def __enter__(self):
+        refresh_job_lock(self.job_uuid, self.owner)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+# How often a redelivered task waits for the lock of its killed run to expire
+JOB_LOCK_RETRIES = 3
+
+
+# acks_late + reject_on_worker_lost: if the worker dies mid-job the broker
+# redelivers the task, which resumes from the pages already generated once
+# the lock of the killed run has expired.
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_copy_job(self, job_uuid, lock=None):
+    """
+    Generate the ad copy of a CopyJob. `lock` is the token the job's lock
+    was claimed under on this task's behalf, if any.
+    """
+    owner = new_lock_owner()
+    # A second task for a job that is being processed does nothing, since
+    # both would generate and checkpoint the same pages.
+    if not acquire_job_lock(job_uuid, owner, claim=lock):
+        redelivered = (self.request.delivery_info or {}).get("redelivered")
+        if (redelivered or self.request.retries) and self.request.retries < JOB_LOCK_RETRIES:
+            logger.info(f"CopyJob {job_uuid} is locked, retrying redelivered task later")
+            raise self.retry(countdown=settings.COPY_JOB_LOCK_TIMEOUT)
+        logger.info(f"CopyJob {job_uuid} is already being processed, skipping")
+        return
+
+    try:
+        logger.info(f"Starting processing for CopyJob with UUID: {job_uuid}")
         job = CopyJob.objects.get(uuid=job_uuid)
-        print(f"Found CopyJob: {job}")
+        if job.status not in (Status.PENDING, Status.PROCESSING):
+            # A redelivered task whose original run finished the job.
+            release_job_lock(job_uuid, owner)
+            logger.info(f"CopyJob {job_uuid} has already finished: {job.status}")
+            return
         job.status = Status.PROCESSING
         job.save()
+        publisher = CopyStreamPublisher(job.uuid)
+
+        if job.client_file and job.parent_id is None:
+            # One row job per row of the file, created in bounded steps.
+            ingest_client_file.delay(str(job.uuid))
+            release_job_lock(job_uuid, owner)
+            logger.info(f"CopyJob {job_uuid} queued for client file ingestion")
+            return
 
-        # # Get all funnels in the system with their order
-        # system_funnels = (
-        #     SystemFunnelAssociation.objects.filter(system=job.system)
-        #     .select_related("funnel")
-        #     .order_by("order_in_system")
-        # )
-        # print(f"Found {len(system_funnels)} system funnels for system: {job.system}")
-
-        # # Loop through each funnel template in the system
-        # for sf in system_funnels:
-        #     print(f"Processing funnel: {sf.funnel.name}")
-        #     funnel_template = sf.funnel
-
-        #     # Get all pages in the funnel template
-        #     pages = funnel_template.pages.order_by("order_in_funnel")
-        #     print(f"Found {len(pages)} pages in funnel: {funnel_template.name}")
-
-        #     # Loop through each page in the funnel
-        #     for page in pages:
-        #         print(f"Processing page: {page.name}")
-
-        #         # Get all images associated with the page
-        #         images = page.images.order_by("order")
-        #         print(f"Found {len(images)} images for page: {page.name}")
-
-        #         # Process each image
-        #         for image in images:
-        #             if not image.image_content:
-        #                 print(f"Skipping image for page {page.name} as it has no content.")
-        #                 continue
-
-        #             # Send image content and client data to the ad copy function
-        #             print(f"Generating ad copy for image in page: {page.name}")
-        #             result_text = generate_ad_copy(image.image_content, job.client_data)
-        pages = PageImage.objects.all().order_by("order")
-        instructions = "Client is a premium yoga studio targeting working professionals. Use calm, rejuvenating tone."
-
-        for page in pages:
-            result = generate_ad_copy(instructions, file_content=page.image_content)
-            print(result)
-            # Save the generated text in the AdCopy model
-            AdCopy.objects.create(
-                copy_job=job,
-                page=page.page,  # Use the related PageTemplate instance via reverse lookup
-                copy_text=result,  # Save the text received from the function
+        if job.use_batch:
+            # Picked up by the next submit_copy_batches run.
+            release_job_lock(job_uuid, owner)
+            logger.info(f"CopyJob {job_uuid} queued for batch generation")
+            return
+
+        pages = get_page_plan(job.system)
+        logger.info(f"Found {len(pages)} page images for system: {job.system}")
+        pending, completed = get_pending_images(job, pages)
+        start_progress(job, len(pages), completed)
+        if completed:
+            logger.info(
+                f"Resuming CopyJob {job_uuid}: {completed} pages already done, "
+                f"{len(pending)} to go"
+            )
+
+        if settings.COPY_JOB_EXECUTION_MODE == ExecutionMode.FANOUT and pending:
+            # One subtask per page; the finalizer sets the job status once
+            # every page has reported back, and releases the lock. Page
+            # tasks keep the lock alive while they run.
+            header = [
+                process_copy_job_page.s(str(job.uuid), str(image.uuid), lock=owner)
+                for image in pending
+            ]
+            chord(header)(
+                finalize_copy_job.s(str(job.uuid), completed=completed, lock=owner)
             )
-            print(f"Saved ad copy for image in page: {page.page.name}")
+            logger.info(f"Dispatched {len(header)} page tasks for CopyJob {job_uuid}")
+            return
 
-            # Update job status to partially completed after processing each page
-            job.status = Status.PARTIALLY_COMPLETED
-            job.save()
+        with JobLockHeartbeat(job_uuid, owner):
+            if settings.COPY_JOB_EXECUTION_MODE == ExecutionMode.ASYNC:
+                results = generate_pages_concurrently(job, pending, publisher)
+            else:
+                # The job stays PROCESSING until every page has been
+                # attempted, so that interrupted jobs can be told apart
+                # from finished ones.
+                results = [generate_page(job, image, publisher) for image in pending]
 
-        # Mark the job as completed after processing all funnels
-        job.status = Status.COMPLETED
+        # Set the final status once all funnels are processed
+        job.status = aggregate_job_status([True] * completed + results)
+        set_job_usage(job)
         job.save()
-        print(f"CopyJob {job_uuid} completed successfully.")
+        publisher.done(job.status, finish_progress(job.uuid, job.status))
+        release_job_lock(job_uuid, owner)
+        logger.info(f"CopyJob {job_uuid} finished: {job.status}")
 
     except Exception as e:
-        print(f"Error processing CopyJob {job_uuid}: {str(e)}")
-        job.status = Status.FAILED
-        job.save()
+        logger.error(f"Error processing CopyJob {job_uuid}: {str(e)}")
+        CopyJob.objects.filter(uuid=job_uuid).update(
+            status=Status.FAILED, updated_at=timezone.now()
+        )
+        CopyStreamPublisher(job_uuid).done(
+            Status.FAILED, finish_progress(job_uuid, Status.FAILED)
+        )
+        release_job_lock(job_uuid, owner)
         raise e
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def process_copy_job_page(job_uuid, image_uuid, lock=None):
+    """
+    Generate the ad copy for one page of a fanned-out CopyJob, refreshing
+    the job's lock, held under `lock`, while it runs.
+    Never raises, so that a single failing page does not break the chord;
+    the returned flag tells the finalizer whether the page succeeded.
+    A redelivered task for a page that is already done succeeds right away.
+    """
+    try:
+        job = CopyJob.objects.get(uuid=job_uuid)
+        image = PageImage.objects.select_related("page__funnel").get(uuid=image_uuid)
+        if job.generated_copies.filter(
+            page_image=image, status=Status.COMPLETED
+        ).exists():
+            return True
+        if lock is None:
+            return generate_page(job, image, CopyStreamPublisher(job.uuid))
+        with JobLockHeartbeat(job_uuid, lock):
+            return generate_page(job, image, CopyStreamPublisher(job.uuid))
+    except Exception as e:
+        logger.error(
+            f"Error processing page image {image_uuid} of CopyJob {job_uuid}: {str(e)}"
+        )
+        return False
+
+
+@shared_task
+def finalize_copy_job(results, job_uuid, completed=0, lock=None):
+    """
+    Chord callback: set the CopyJob status from the aggregate page results
+    and release the job's lock, held under `lock`.
+    `completed` counts the pages already done before the job was resumed.
+    """
+    results = [True] * completed + list(results)
+    job = CopyJob.objects.get(uuid=job_uuid)
+    job_status = aggregate_job_status(results)
+    job.status = job_status
+    set_job_usage(job)
+    job.save(update_fields=["status", *JOB_USAGE_FIELDS, "updated_at"])
+    CopyStreamPublisher(job.uuid).done(job_status, finish_progress(job.uuid, job_status))
+    release_job_lock(job_uuid, lock)
+    logger.info(
+        f"CopyJob {job_uuid} finished with {sum(map(bool, results))}/{len(results)} "
+        f"pages: {job_status}"
+    )
+    return job_status
+
+
+def build_row_client_data(job, row):
+    """
+    Client data of the job for one row of a client file: the row's values,
+    plus the text the file was uploaded with, which applies to every row.
+    """
+    if job.client_data.get("user_input"):
+        return {**row, "notes": job.client_data["user_input"]}
+    return row
+
+
+def dispatch_row_jobs(job):
+    """
+    Enqueue the row jobs of a job that have not been enqueued yet.
+    """
+    for row_job in job.row_jobs.filter(status=Status.PENDING, celery_task_id__isnull=True):
+        task = process_copy_job.delay(str(row_job.uuid))
+        row_job.celery_task_id = task.id
+        row_job.save(update_fields=["celery_task_id", "updated_at"])
+
+
+def finish_row_jobs(job):
+    """
+    Set the status of a job whose client file has been ingested from the
+    statuses of its row jobs.
+    """
+    statuses = list(job.row_jobs.values_list("status", flat=True))
+    # A file without data rows has nothing to generate and is done.
+    if all(status == Status.COMPLETED for status in statuses):
+        job.status = Status.COMPLETED
+    elif any(
+        status in (Status.COMPLETED, Status.PARTIALLY_COMPLETED) for status in statuses
+    ):
+        job.status = Status.PARTIALLY_COMPLETED
+    else:
+        job.status = Status.FAILED
+    set_job_usage(job)
+    job.save(update_fields=["status", *JOB_USAGE_FIELDS, "updated_at"])
+    CopyStreamPublisher(job.uuid).done(job.status)
+    logger.info(f"CopyJob {job.uuid} finished {len(statuses)} rows: {job.status}")
+
+
+@shared_task(acks_late=True)
+def ingest_client_file(job_uuid):
+    """
+    Turn the rows of a CopyJob's client CSV file into row jobs, one step at
+    a time. Each run streams the file from the byte offset where the
+    previous one stopped, creates up to COPY_JOB_CSV_BATCH_SIZE row jobs and enqueues them, then
+    schedules the next run. While COPY_JOB_CSV_MAX_IN_FLIGHT row jobs are
+    still waiting or generating, it backs off instead, so a large upload
+    never floods the queue. Once the file is read and every row job has
+    finished, the job's status is set from theirs.
+    """
+    job = CopyJob.objects.get(uuid=job_uuid)
+    # Re-enqueue anything a previous run created but did not get to enqueue.
+    dispatch_row_jobs(job)
+    in_flight = job.row_jobs.filter(
+        status__in=(Status.PENDING, Status.PROCESSING)
+    ).count()
+
+    if job.row_count is not None or in_flight >= settings.COPY_JOB_CSV_MAX_IN_FLIGHT:
+        if in_flight:
+            ingest_client_file.apply_async(
+                (job_uuid,), countdown=settings.COPY_JOB_CSV_POLL_INTERVAL
+            )
+            return
+        if job.status == Status.PROCESSING:
+            finish_row_jobs(job)
+        return
+
+    with transaction.atomic():
+        # Runs of the same job take their steps one at a time, each from
+        # where the previous one stopped.
+        job = CopyJob.objects.select_for_update().get(uuid=job_uuid)
+        if job.row_count is not None:
+            # Another run read the rest of the file and polls from now on.
+            return
+        step = min(
+            settings.COPY_JOB_CSV_BATCH_SIZE,
+            settings.COPY_JOB_CSV_MAX_IN_FLIGHT - in_flight,
+            settings.COPY_JOB_CSV_MAX_ROWS - job.rows_ingested,
+        )
+        try:
+            rows = list(
+                islice(
+                    read_client_rows(
+                        job.client_file,
+                        start=job.rows_ingested,
+                        offset=job.client_file_offset,
+                    ),
+                    step,
+                )
+            )
+        except ClientFileError as e:
+            logger.error(f"Could not ingest client file of CopyJob {job_uuid}: {str(e)}")
+            rows = []
+            if not job.rows_ingested:
+                job.status = Status.FAILED
+                job.row_count = 0
+                job.save(update_fields=["status", "row_count", "updated_at"])
+                transaction.on_commit(lambda: CopyStreamPublisher(job.uuid).done(job.status))
+                return
+
+        row_jobs = []
+        for row_number, row, _ in rows:
+            if isinstance(row, Exception):
+                logger.warning(f"Invalid row {row_number} of CopyJob {job_uuid}: {str(row)}")
+                client_data, status = {"error": str(row)}, Status.FAILED
+            else:
+                client_data, status = build_row_client_data(job, row), Status.PENDING
+            row_jobs.append(
+                CopyJob(
+                    system=job.system,
+                    user=job.user,
+                    client_data=client_data,
+                    status=status,
+                    use_cache=job.use_cache,
+                    use_batch=job.use_batch,
+                    parent=job,
+                    row_number=row_number,
+                )
+            )
+
+        CopyJob.objects.bulk_create(row_jobs)
+        job.rows_ingested += len(rows)
+        if rows:
+            job.client_file_offset = rows[-1][2]
+        if job.rows_ingested >= settings.COPY_JOB_CSV_MAX_ROWS:
+            logger.warning(
+                f"Client file of CopyJob {job_uuid} has more than "
+                f"{settings.COPY_JOB_CSV_MAX_ROWS} rows; the rest is ignored"
+            )
+            job.row_count = job.rows_ingested
+        elif len(rows) < step:
+            job.row_count = job.rows_ingested
+            logger.info(f"Read {job.row_count} rows of client file of CopyJob {job_uuid}")
+        job.save(
+            update_fields=["rows_ingested", "client_file_offset", "row_count", "updated_at"]
+        )
+    dispatch_row_jobs(job)
+
+    # The next step is another task, so a long file does not hold a worker.
+    ingest_client_file.delay(job_uuid)
+
+
+def build_section_instructions(ad_copy, section, instructions=""):
+    """
+    Instructions for regenerating one section of an AdCopy: the job's
+    client data, the page's current copy for context and the editor's notes.
+    """
+    parts = [
+        build_instructions(ad_copy.copy_job.client_data),
+        "Current Page Copy:\n" + json.dumps(ad_copy.copy_json, ensure_ascii=False),
+        f"Rewrite only the components of the {section!r} section, keeping them "
+        "consistent with the rest of the page.",
+    ]
+    if instructions:
+        parts.append(f"Editor Notes:\n{instructions}")
+    return "\n\n".join(parts)
+
+
+@shared_task
+def regenerate_ad_copy_section(ad_copy_uuid, section, instructions=""):
+    """
+    Regenerate the copy of one section of a page and merge it into the
+    page's AdCopy. Routed to the priority queue (see CELERY_TASK_ROUTES),
+    since it is a single short model call a user is waiting for.
+    The page image is read from its cached preprocessed variant.
+    Returns:
+        bool: Whether the section was regenerated
+    """
+    ad_copy = AdCopy.objects.select_related("copy_job", "page_image").get(
+        uuid=ad_copy_uuid
+    )
+    if ad_copy.page_image is None:
+        logger.error(f"AdCopy {ad_copy_uuid} has no page image to regenerate from")
+        return False
+    # Prefer the page's schema, which describes each component.
+    components = section_components(
+        get_components({"image": ad_copy.page_image}), section
+    ) or section_components(ad_copy.copy_json.get("components", []), section)
+    if not components:
+        logger.error(f"AdCopy {ad_copy_uuid} has no section {section!r} to regenerate")
+        return False
+
+    try:
+        output = generate_ad_copy(
+            build_section_instructions(ad_copy, section, instructions),
+            image=ad_copy.page_image,
+            use_cache=False,
+            components=components,
+            priority=Priority.HIGH,
+        )
+        update = parse_copy_json(output, components)
+    except Exception as e:
+        logger.error(
+            f"Error regenerating section {section!r} of AdCopy {ad_copy_uuid}: {str(e)}"
+        )
+        return False
+
+    # Merge under a row lock, so concurrent edits of other sections of the
+    # same page are not lost.
+    with transaction.atomic():
+        ad_copy = AdCopy.objects.select_for_update().get(uuid=ad_copy_uuid)
+        ad_copy.copy_json = merge_copy_json(ad_copy.copy_json, update)
+        ad_copy.copy_text = render_copy_text(ad_copy.copy_json)
+        ad_copy.save(update_fields=["copy_json", "copy_text", "updated_at"])
+    logger.info(f"Regenerated section {section!r} of AdCopy {ad_copy_uuid}")
+    return True
+
+
+@shared_task
+def submit_copy_batches():
+    """
+    Periodic task: write the pending pages of all batch-mode CopyJobs that
+    are waiting for a batch into one JSONL file and submit it to the
+    ADCOPY_BATCH_BACKEND. Batches are capped at ADCOPY_BATCH_MAX_REQUESTS
+    requests; jobs that do not fit wait for the next run.
+    Returns:
+        str: UUID of the submitted CopyBatch, if any
+    """
+    jobs = CopyJob.objects.filter(
+        use_batch=True, status=Status.PROCESSING, batch__isnull=True
+    ).order_by("created_at")
+
+    batched = []
+    request_count = 0
+    # Page images make batch files large; spool them to disk, not memory.
+    with tempfile.TemporaryFile() as input_file:
+        for job in jobs.iterator():
+            pages = get_page_plan(job.system)
+            pending, completed = get_pending_images(job, pages)
+            if not pending:
+                finish_batch_job(job, completed, [])
+                continue
+            if request_count and request_count + len(pending) > settings.ADCOPY_BATCH_MAX_REQUESTS:
+                break
+
+            instructions = build_instructions(job.client_data)
+            for image in pending:
+                request = build_batch_request(job, image, instructions)
+                input_file.write(json.dumps(request).encode("utf-8") + b"\n")
+            request_count += len(pending)
+            batched.append((job, len(pages), completed))
+
+        if not batched:
+            return None
+
+        batch = CopyBatch(backend=settings.ADCOPY_BATCH_BACKEND, request_count=request_count)
+        input_file.seek(0)
+        batch.input_file.save(f"{batch.uuid}.jsonl", File(input_file), save=False)
+
+    try:
+        batch.batch_id = get_batch_backend(batch.backend).submit(batch.input_file)
+        batch.status = Status.PROCESSING
+    except Exception as e:
+        # The jobs stay unbatched and are retried by the next run.
+        logger.error(f"Error submitting CopyBatch {batch.uuid}: {str(e)}")
+        batch.status = Status.FAILED
+        batch.error = str(e)
+        batch.save()
+        return None
+
+    batch.save()
+    CopyJob.objects.filter(pk__in=[job.pk for job, _, _ in batched]).update(
+        batch=batch, updated_at=timezone.now()
+    )
+    # Only jobs of a submitted batch have progress to report.
+    for job, total, completed in batched:
+        start_progress(job, total, completed)
+    logger.info(
+        f"Submitted CopyBatch {batch.uuid} with {request_count} requests "
+        f"for {len(batched)} jobs"
+    )
+    return str(batch.uuid)
+
+
+@shared_task
+def poll_copy_batches():
+    """
+    Periodic task: check on submitted CopyBatches and ingest the results of
+    the finished ones.
+    """
+    for batch in CopyBatch.objects.filter(status=Status.PROCESSING):
+        try:
+            batch_status, content, error = get_batch_backend(batch.backend).poll(
+                batch.batch_id
+            )
+        except Exception as e:
+            logger.warning(f"Could not poll CopyBatch {batch.uuid}: {str(e)}")
+            continue
+        if batch_status == BatchStatus.PENDING:
+            continue
+        if batch_status == BatchStatus.FAILED:
+            fail_copy_batch(batch, error)
+        else:
+            ingest_copy_batch(batch, content)
+
+
+def ingest_copy_batch(batch, content):
+    """
+    Save the results of a finished batch into AdCopy and finish its jobs.
+    Pages without a result in the batch are recorded as failed.
+    """
+    results, usages = parse_batch_output(content)
+    for job in batch.jobs.filter(status=Status.PROCESSING):
+        publisher = CopyStreamPublisher(job.uuid)
+        pending, completed = get_pending_images(job, get_page_plan(job.system))
+        page_results = []
+        for image in pending:
+            custom_id = batch_custom_id(job, image)
+            output = results.get(custom_id)
+            if output is None:
+                output = Exception("No result for this page in the batch")
+            elif not isinstance(output, Exception):
+                try:
+                    validate_output({"image": image}, output)
+                except Exception as e:
+                    output = e
+            page_results.append(
+                save_page_result(job, image, output, publisher, usages.get(custom_id))
+            )
+        finish_batch_job(job, completed, page_results, publisher)
+
+    batch.status = Status.COMPLETED
+    batch.completed_at = timezone.now()
+    batch.save(update_fields=["status", "completed_at", "updated_at"])
+    logger.info(f"Ingested {len(results)} results of CopyBatch {batch.uuid}")
+
+
+def fail_copy_batch(batch, error):
+    """
+    Mark a batch the backend rejected, and its jobs, as failed.
+    """
+    logger.error(f"CopyBatch {batch.uuid} failed: {error}")
+    batch.status = Status.FAILED
+    batch.error = error
+    batch.completed_at = timezone.now()
+    batch.save(update_fields=["status", "error", "completed_at", "updated_at"])
+    for job in batch.jobs.filter(status=Status.PROCESSING):
+        job.status = Status.FAILED
+        job.save(update_fields=["status", "updated_at"])
+        CopyStreamPublisher(job.uuid).done(
+            Status.FAILED, finish_progress(job.uuid, Status.FAILED)
+        )
+
+
+def finish_batch_job(job, completed, results, publisher=None):
+    """
+    Set the final status of a batch-mode job from its page results.
+    """
+    job.status = aggregate_job_status([True] * completed + results)
+    set_job_usage(job)
+    job.save(update_fields=["status", *JOB_USAGE_FIELDS, "updated_at"])
+    (publisher or CopyStreamPublisher(job.uuid)).done(
+        job.status, finish_progress(job.uuid, job.status)
+    )
+    logger.info(f"CopyJob {job.uuid} finished: {job.status}")
@@ -1,3 +1,1386 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import openai
+import redis
+from celery import current_app
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableLambda
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bizlaunch.funnels import catalog, chains, fakes, images, tasks
+from bizlaunch.funnels.batch import (
+    BATCH_PRICE_FACTOR,
+    batch_custom_id,
+    get_batch_backend,
+)
+from bizlaunch.funnels.cache import adcopy_cache_key, set_cached_ad_copy
+from bizlaunch.funnels.chains import (
+    agenerate_ad_copies,
+    generate_ad_copy,
+    get_adcopy_chain,
+    init_adcopy_chains,
+    run_async,
+)
+from bizlaunch.funnels.fakes import FAKE_AD_COPY
+from bizlaunch.funnels.images import (
+    estimate_image_tokens,
+    get_image_variant,
+    preprocess_image,
+    target_size,
+)
+from bizlaunch.funnels.ingest import (
+    ClientFileError,
+    clean_header,
+    clean_row,
+    read_client_rows,
+)
+from bizlaunch.funnels.metrics import (
+    UsageCallbackHandler,
+    get_prompt_cache_stats,
+    get_route_stats,
+    record_call,
+    record_route_call,
+    record_route_error,
+)
+from bizlaunch.funnels.models import (
+    AdCopy,
+    ClientUpload,
+    CopyBatch,
+    CopyJob,
+    FunnelTemplate,
+    PageImage,
+    PageTemplate,
+    Status,
+    SystemFunnelAssociation,
+    SystemTemplate,
+)
+from bizlaunch.funnels.progress import get_progress
+from bizlaunch.funnels.prompts import build_messages
+from bizlaunch.funnels.ratelimit import RateLimiter
+from bizlaunch.funnels.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    call_with_retries,
+)
+from bizlaunch.funnels.routing import Priority, estimate_cost, rule_matches
+from bizlaunch.funnels.streaming import (
+    CopyStreamPublisher,
+    job_event_stream,
+    stream_channel,
+)
+from bizlaunch.funnels.structured import (
+    StructuredOutputError,
+    merge_copy_json,
+    parse_copy_json,
+)
+from bizlaunch.funnels.tasks import (
+    ExecutionMode,
+    JobLockHeartbeat,
+    acquire_job_lock,
+    aggregate_job_status,
+    ingest_copy_batch,
+    job_lock_key,
+    poll_copy_batches,
+    process_copy_job,
+    regenerate_ad_copy_section,
+    submit_copy_batches,
+)
+from bizlaunch.funnels.uploads import (
+    UploadBusyError,
+    UploadError,
+    UploadOffsetError,
+    append_chunk,
+    complete_upload,
+    start_upload,
+)
+from bizlaunch.users.models import User
+
+COMPONENTS = [
+    {"section": "Hero", "component": "Headline", "description": "Main headline"},
+    {"section": "Hero", "component": "Subheadline", "description": "Supporting line"},
+    {"section": "Offer", "component": "Button", "description": "Call to action"},
+]
+
+
+def png(shade):
+    """
+    A small PNG of a solid color.
+    """
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (shade, 100, 50)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def limiter_client():
+    """
+    Client of the rate limit Redis, served by fakeredis.
+    """
+    return redis.Redis.from_url(settings.OPENAI_RATE_LIMIT_REDIS_URL)
+
+
+def bearer(user):
+    """
+    Authorization header value of an access token for the user.
+    """
+    return f"Bearer {AccessToken.for_user(user)}"
+
+
+def rate_limit_error(code="rate_limit_exceeded"):
+    """
+    A 429 from the provider, with the given error code.
+    """
+    response = httpx.Response(
+        429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    )
+    return openai.RateLimitError("Rate limited", response=response, body={"code": code})
+
+
+def create_system(page_count=3, components=COMPONENTS):
+    """
+    A system with one funnel of `page_count` pages, each with one image.
+    """
+    system = SystemTemplate.objects.create(name="Launch System")
+    funnel = FunnelTemplate.objects.create(name="Launch Funnel")
+    SystemFunnelAssociation.objects.create(system=system, funnel=funnel, order_in_system=1)
+    for i in range(page_count):
+        page = PageTemplate.objects.create(
+            funnel=funnel, name=f"Page {i}", layout="optin", order_in_funnel=i + 1
+        )
+        PageImage.objects.create(
+            page=page,
+            order=1,
+            components=components,
+            image=ContentFile(png(i * 40), name=f"page-{i}.png"),
+        )
+    return system
+
+
+class AggregateJobStatusTests(TestCase):
+    def test_statuses(self):
+        self.assertEqual(aggregate_job_status([True, True]), Status.COMPLETED)
+        self.assertEqual(aggregate_job_status([True, False]), Status.PARTIALLY_COMPLETED)
+        self.assertEqual(aggregate_job_status([False, False]), Status.FAILED)
+        self.assertEqual(aggregate_job_status([]), Status.COMPLETED)
+
+
+class StructuredOutputTests(TestCase):
+    def output(self, entries):
+        return json.dumps({"components": entries})
+
+    def test_parse_follows_the_schema_order(self):
+        text = self.output(
+            [
+                {"section": "Offer", "component": "Button", "copy": " Join now "},
+                {"section": "Hero", "component": "Subheadline", "copy": "Sub"},
+                {"section": "Hero", "component": "Headline", "copy": "Head"},
+            ]
+        )
+        copy_json = parse_copy_json(f"```json\n{text}\n```", COMPONENTS)
+        self.assertEqual(
+            [entry["copy"] for entry in copy_json["components"]], ["Head", "Sub", "Join now"]
+        )
+
+    def test_parse_rejects_invalid_output(self):
+        missing = self.output([{"section": "Hero", "component": "Headline", "copy": "Head"}])
+        for text in ("not json", '{"copy": "x"}', missing):
+            with self.subTest(text=text), self.assertRaises(StructuredOutputError):
+                parse_copy_json(text, COMPONENTS)
+
+    def test_merge_replaces_only_updated_components(self):
+        copy_json = {
+            "components": [
+                {"section": "Hero", "component": "Headline", "copy": "Old head"},
+                {"section": "Offer", "component": "Button", "copy": "Old button"},
+            ]
+        }
+        update = {"components": [{"section": "Offer", "component": "Button", "copy": "New"}]}
+        merged = merge_copy_json(copy_json, update)
+        self.assertEqual(
+            [entry["copy"] for entry in merged["components"]], ["Old head", "New"]
+        )
+
+    def test_job_stores_structured_and_free_form_copy(self):
+        user = User.objects.create_user(email="structured@example.com", password="pw")
+        job = CopyJob.objects.create(
+            system=create_system(page_count=1, components={}), user=user, client_data={}
+        )
+        image = PageImage.objects.get()
+        process_copy_job.delay(str(job.uuid))
+        copy = job.generated_copies.get()
+        self.assertEqual((copy.copy_text, copy.copy_json), (FAKE_AD_COPY, {}))
+
+        image.components = COMPONENTS
+        image.save()
+        job = CopyJob.objects.create(system=job.system, user=user, client_data={})
+        process_copy_job.delay(str(job.uuid))
+        copy = job.generated_copies.get()
+        self.assertEqual(
+            [entry["copy"] for entry in copy.copy_json["components"]],
+            ["Headline copy.", "Subheadline copy.", "Button copy."],
+        )
+        self.assertIn("Headline copy.", copy.copy_text)
+
+
+class PageImageStorageTests(TestCase):
+    def setUp(self):
+        create_system(page_count=1)
+        self.page = PageTemplate.objects.get()
+
+    def create_image(self, content, name="screenshot.png"):
+        # Assigned unsaved, like an upload through the admin.
+        return PageImage.objects.create(page=self.page, image=ContentFile(content, name=name))
+
+    def test_image_is_stored_by_content_hash(self):
+        content = png(200)
+        image = self.create_image(content)
+        content_hash = hashlib.sha256(content).hexdigest()
+        self.assertEqual(image.image.name, f"page_images/{content_hash}.png")
+        self.assertEqual(
+            (image.content_hash, image.width, image.height, image.mime_type),
+            (content_hash, 64, 48, "image/png"),
+        )
+        self.assertEqual(PageImage.objects.get(pk=image.pk).read_image(), content)
+
+    def test_identical_images_share_one_file(self):
+        first = self.create_image(png(200), "first.png")
+        second = self.create_image(png(200), "second.png")
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertNotEqual(self.create_image(png(210)).image.name, first.image.name)
+
+    @override_settings(ADCOPY_IMAGE_PREPROCESS=False)
+    def test_data_url_is_built_from_storage(self):
+        content = png(200)
+        image = self.create_image(content)
+        self.assertEqual(
+            image.get_image_data_url(),
+            f"data:image/png;base64,{base64.b64encode(content).decode('utf-8')}",
+        )
+
+
+class ImagePreprocessingTests(TestCase):
+    def test_target_size(self):
+        self.assertEqual(target_size(1440, 4000), (737, 2048))
+        self.assertEqual(target_size(1440, 2000), (768, 1067))
+        self.assertEqual(target_size(4000, 1000, detail="low"), (512, 128))
+        self.assertEqual(target_size(600, 400), (600, 400))
+
+    def test_estimate_image_tokens(self):
+        self.assertEqual(estimate_image_tokens(1440, 4000, detail="low"), 85)
+        self.assertEqual(estimate_image_tokens(1440, 4000), 85 + 170 * 2 * 4)
+        self.assertEqual(estimate_image_tokens(None, None), 85 + 170 * 4)
+
+    def test_screenshot_is_downsized_and_flattened(self):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (1440, 4000), (10, 20, 30, 0)).save(buffer, "PNG")
+        content = preprocess_image(buffer.getvalue(), "JPEG", quality=80)
+        with Image.open(io.BytesIO(content)) as img:
+            self.assertEqual((img.format, img.mode, img.size), ("JPEG", "RGB", (737, 2048)))
+            # Transparent pixels become white.
+            self.assertGreater(min(img.getpixel((0, 0))), 250)
+        self.assertLess(len(content), len(buffer.getvalue()))
+
+    def test_variant_is_derived_once(self):
+        create_system(page_count=1)
+        image = PageImage.objects.get()
+        with mock.patch.object(
+            images, "preprocess_image", wraps=images.preprocess_image
+        ) as preprocess:
+            content, mime_type = get_image_variant(image, "WEBP", quality=70)
+            self.assertEqual(get_image_variant(image, "WEBP", quality=70), (content, mime_type))
+            self.assertEqual(preprocess.call_count, 1)
+            get_image_variant(image, "JPEG", quality=70)
+            self.assertEqual(preprocess.call_count, 2)
+        self.assertEqual(mime_type, "image/webp")
+        with Image.open(io.BytesIO(content)) as img:
+            self.assertEqual(img.format, "WEBP")
+
+
+class ClientFileTests(TestCase):
+    def test_clean_header(self):
+        self.assertEqual(clean_header([" business", "niche "]), ["business", "niche"])
+        for header in (None, [], ["a", ""], ["a", "a"]):
+            with self.subTest(header=header), self.assertRaises(ClientFileError):
+                clean_header(header)
+
+    @override_settings(COPY_JOB_CSV_MAX_VALUE_LENGTH=5)
+    def test_clean_row(self):
+        self.assertEqual(clean_row({"a": " yoga ", "b": " "}), {"a": "yoga"})
+        for row in ({"a": "x", None: ["extra"]}, {"a": " ", "b": ""}, {"a": "too long"}):
+            with self.subTest(row=row), self.assertRaises(ValueError):
+                clean_row(row)
+
+    def test_rows_resume_from_a_byte_offset(self):
+        content = "﻿business,niche\nAcme,yoga\n\"Beta\nInc\",fitness\nGamma\nDelta,tea\n"
+        user = User.objects.create_user(email="rows@example.com", password="pw")
+        job = CopyJob(user=user, client_data={})
+        job.client_file.save("clients.csv", ContentFile(content.encode("utf-8")), save=False)
+
+        rows = list(read_client_rows(job.client_file))
+        self.assertEqual([row[0] for row in rows], [1, 2, 3, 4])
+        self.assertEqual(rows[1][1], {"business": "Beta\nInc", "niche": "fitness"})
+        self.assertEqual(rows[-1][2], job.client_file.size)
+        for start, (_, _, offset) in enumerate(rows, start=1):
+            resumed = list(read_client_rows(job.client_file, start=start, offset=offset))
+            skipped = list(read_client_rows(job.client_file, start=start))
+            self.assertEqual([row[:2] for row in resumed], [row[:2] for row in skipped])
+            self.assertEqual(resumed, [row for row in rows[start:]])
+
+
+class RoutingTests(TestCase):
+    def test_rule_matches(self):
+        rule = {"priority": [Priority.HIGH]}
+        self.assertTrue(rule_matches(rule, "optin", 3, Priority.HIGH))
+        self.assertFalse(rule_matches(rule, "optin", 3, Priority.NORMAL))
+
+        rule = {"layouts": ["Thank You"]}
+        self.assertTrue(rule_matches(rule, "thank you page", None, Priority.NORMAL))
+        self.assertFalse(rule_matches(rule, "optin", None, Priority.NORMAL))
+
+        rule = {"max_components": 3}
+        self.assertTrue(rule_matches(rule, "", 3, Priority.NORMAL))
+        self.assertFalse(rule_matches(rule, "", 4, Priority.NORMAL))
+        self.assertFalse(rule_matches(rule, "", None, Priority.NORMAL))
+        self.assertTrue(rule_matches({}, "", None, Priority.LOW))
+
+
+class RateLimiterTests(TestCase):
+    def level(self, limiter):
+        return float(limiter_client().hget(limiter.keys[1], "level"))
+
+    def test_exhausted_budget_waits(self):
+        limiter = RateLimiter("test-model", requests_per_minute=2, tokens_per_minute=6000)
+        self.assertEqual(limiter.try_acquire(100), 0)
+        self.assertEqual(limiter.try_acquire(100), 0)
+        self.assertGreater(limiter.try_acquire(100), 0)
+
+        limiter = RateLimiter("other-model", requests_per_minute=600, tokens_per_minute=6000)
+        self.assertEqual(limiter.try_acquire(5000), 0)
+        self.assertAlmostEqual(limiter.try_acquire(2000), 10, delta=0.5)
+
+    def test_settle_corrects_the_estimate(self):
+        limiter = RateLimiter("test-model", requests_per_minute=600, tokens_per_minute=6000)
+        self.assertEqual(limiter.try_acquire(2000), 0)
+        self.assertAlmostEqual(self.level(limiter), 4000, delta=50)
+
+        # Unused tokens are given back, excess usage is taken.
+        limiter.settle(2000, 500)
+        self.assertAlmostEqual(self.level(limiter), 5500, delta=50)
+        limiter.settle(500, 3000)
+        self.assertAlmostEqual(self.level(limiter), 3000, delta=50)
+
+        # The bucket never refills past its capacity.
+        limiter.settle(6000, 0)
+        self.assertAlmostEqual(self.level(limiter), 6000, delta=1)
+
+    @override_settings(
+        OPENAI_RATE_LIMIT_ENABLED=True,
+        OPENAI_RATE_LIMIT_RPM=600,
+        OPENAI_RATE_LIMIT_TPM=60000,
+    )
+    def test_generation_takes_its_reported_usage(self):
+        create_system(page_count=1)
+        usage = UsageCallbackHandler()
+        generate_ad_copy("Yoga studio", image=PageImage.objects.get(), usage=usage)
+        fields = usage.as_fields()
+        used = fields["input_tokens"] + fields["output_tokens"]
+        limiter = RateLimiter(settings.ADCOPY_FAST_MODEL, 600, 60000)
+        self.assertAlmostEqual(self.level(limiter), 60000 - used, delta=50)
+
+
+class RetryTests(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("test-model")
+
+    def test_retryable_errors_are_retried(self):
+        func = mock.Mock(side_effect=[rate_limit_error(), httpx.ReadTimeout("Timeout"), "Copy"])
+        self.assertEqual(call_with_retries(func, self.breaker), "Copy")
+        self.assertEqual(func.call_count, 3)
+        self.assertIsNone(cache.get(self.breaker.failures_key))
+
+    @override_settings(ADCOPY_RETRY_ATTEMPTS=3)
+    def test_attempts_are_bounded(self):
+        func = mock.Mock(side_effect=rate_limit_error())
+        with self.assertRaises(openai.RateLimitError):
+            call_with_retries(func, self.breaker)
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_fail_fast(self):
+        for error in (ValueError("Bad output"), rate_limit_error("insufficient_quota")):
+            with self.subTest(error=error):
+                func = mock.Mock(side_effect=error)
+                with self.assertRaises(type(error)):
+                    call_with_retries(func, self.breaker)
+                self.assertEqual(func.call_count, 1)
+
+
+@override_settings(ADCOPY_CIRCUIT_FAILURE_THRESHOLD=2)
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker("test-model")
+
+    def trip(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        # The reset timeout elapses.
+        cache.delete(self.breaker.open_key)
+
+    def test_open_circuit_fails_calls_without_calling(self):
+        self.trip()
+        cache.set(self.breaker.open_key, True)
+        func = mock.Mock(return_value="Copy")
+        with self.assertRaises(CircuitOpenError):
+            call_with_retries(func, self.breaker)
+        func.assert_not_called()
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self.trip()
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_probe_failure_reopens_the_circuit(self):
+        self.trip()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open())
+
+    def test_probe_success_closes_the_circuit(self):
+        self.trip()
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.breaker.before_call()
+        self.breaker.before_call()
+        # A single failure no longer opens it.
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open())
+
+
+class UsageMetricsTests(TestCase):
+    usage = {"input_tokens": 1000, "cached_tokens": 400, "output_tokens": 100}
+
+    def test_route_stats_add_up_recorded_calls(self):
+        record_route_call("optin", "gpt-4o-mini", self.usage, latency_ms=300)
+        record_route_call("optin", "gpt-4o-mini", self.usage, latency_ms=500)
+        record_route_error("optin")
+
+        stats = get_route_stats()["optin"]
+        self.assertEqual(
+            (stats["model"], stats["calls"], stats["errors"], stats["avg_latency_ms"]),
+            ("gpt-4o-mini", 2, 1, 400),
+        )
+        self.assertEqual((stats["input_tokens"], stats["cached_tokens"]), (2000, 800))
+        cost = estimate_cost("gpt-4o-mini", 1000, 400, 100)
+        self.assertAlmostEqual(stats["cost_usd"], 2 * cost)
+        self.assertAlmostEqual(stats["cost_per_call_usd"], cost)
+
+        out = io.StringIO()
+        call_command("model_route_stats", "--reset", stdout=out)
+        self.assertIn("optin (gpt-4o-mini): 2 calls, 1 errors, 400 ms average latency", out.getvalue())
+        self.assertIn("2000 input tokens (800 cached), 200 output tokens", out.getvalue())
+        self.assertEqual(get_route_stats(), {})
+
+    def test_prompt_cache_stats_add_up_recorded_calls(self):
+        record_call("gpt-4o-mini", self.usage, ttft_ms=200)
+        record_call("gpt-4o-mini", self.usage)
+
+        stats = get_prompt_cache_stats()["gpt-4o-mini"]
+        self.assertEqual((stats["calls"], stats["streamed_calls"], stats["avg_ttft_ms"]), (2, 1, 200))
+        self.assertAlmostEqual(stats["cached_ratio"], 0.4)
+
+        out = io.StringIO()
+        call_command("prompt_cache_stats", "--reset", stdout=out)
+        self.assertIn(
+            "gpt-4o-mini: 2 calls, 2000 input tokens (800 cached, 1200 uncached, 40% hit rate)",
+            out.getvalue(),
+        )
+        self.assertIn("200 ms average over 1 streamed calls", out.getvalue())
+        self.assertEqual(get_prompt_cache_stats(), {})
+
+    def test_usage_report_groups_generated_pages(self):
+        user = User.objects.create_user(email="usage@example.com", password="pw")
+        job = CopyJob.objects.create(system=create_system(), user=user, client_data={})
+        process_copy_job.delay(str(job.uuid))
+        model = job.generated_copies.values_list("model", flat=True).first()
+
+        out = io.StringIO()
+        call_command("copy_usage_report", stdout=out)
+        self.assertIn(f"{model}: 3 pages", out.getvalue())
+        self.assertIn("Slowest pages", out.getvalue())
+
+        out = io.StringIO()
+        call_command("copy_usage_report", "--model", "other", stdout=out)
+        self.assertEqual(out.getvalue(), "No generated pages with recorded usage\n")
+
+
+class PromptLayoutTests(TestCase):
+    def setUp(self):
+        create_system(page_count=1)
+        self.image = PageImage.objects.select_related("page").get()
+        fakes._seen_prefixes.clear()
+
+    def test_instructions_come_last(self):
+        acme = build_messages({"image": self.image, "instructions": "Business: Acme"})
+        beta = build_messages({"image": self.image, "instructions": "Business: Beta"})
+
+        self.assertIsInstance(acme[0], SystemMessage)
+        self.assertEqual(acme[0].content, beta[0].content)
+        self.assertEqual([part["type"] for part in acme[1].content], ["text", "image_url", "text"])
+        # Only the last part differs between jobs.
+        self.assertEqual(acme[1].content[:-1], beta[1].content[:-1])
+        self.assertEqual(beta[1].content[-1]["text"], "User Instructions:\nBusiness: Beta")
+
+    @mock.patch.object(fakes, "PROMPT_CACHE_MIN_TOKENS", 256)
+    def test_repeat_pages_hit_the_prompt_cache(self):
+        acme, beta = UsageCallbackHandler(), UsageCallbackHandler()
+        generate_ad_copy("Business: Acme", self.image, use_cache=False, usage=acme)
+        generate_ad_copy("Business: Beta", self.image, use_cache=False, usage=beta)
+
+        self.assertEqual(acme.cached_tokens, 0)
+        self.assertGreater(beta.cached_tokens, 0)
+        self.assertLess(beta.cached_tokens, beta.input_tokens)
+        stats = get_prompt_cache_stats()[beta.model]
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["cached_tokens"], beta.cached_tokens)
+
+
+class ChainRegistryTests(TestCase):
+    def test_chain_is_built_once_per_model(self):
+        chain = get_adcopy_chain("gpt-4o")
+        self.assertIs(get_adcopy_chain("gpt-4o"), chain)
+        self.assertIsNot(get_adcopy_chain("gpt-4o-mini"), chain)
+
+    def test_calls_reuse_the_chain(self):
+        create_system(page_count=1)
+        image = PageImage.objects.get()
+        with mock.patch.object(
+            chains, "create_adcopy_chain", wraps=chains.create_adcopy_chain
+        ) as create:
+            for instructions in ("Yoga studio", "Tea shop", "Bakery"):
+                generate_ad_copy(instructions, image=image, use_cache=False)
+        self.assertEqual(create.call_count, 1)
+
+    def test_init_rebuilds_the_registry(self):
+        chain = get_adcopy_chain()
+        init_adcopy_chains()
+        self.assertEqual(list(chains._chains.values()), [get_adcopy_chain()])
+        self.assertIsNot(get_adcopy_chain(), chain)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        create_system(page_count=2)
+        # Pages are joined in, as the async path cannot query the database.
+        self.image, self.other_image = PageImage.objects.select_related(
+            "page__funnel"
+        ).order_by("page__order_in_funnel")
+
+    def test_key_depends_on_every_part(self):
+        parts = ("System prompt", "Instructions", b"image bytes", "gpt-4o")
+        key = adcopy_cache_key(*parts)
+        self.assertEqual(key, adcopy_cache_key(*parts))
+        for i in range(len(parts)):
+            changed = list(parts)
+            changed[i] = changed[i] + (b"!" if isinstance(changed[i], bytes) else "!")
+            with self.subTest(part=i):
+                self.assertNotEqual(adcopy_cache_key(*changed), key)
+
+    def test_repeated_generation_is_served_from_the_cache(self):
+        with mock.patch.object(
+            chains, "get_adcopy_chain", wraps=chains.get_adcopy_chain
+        ) as get_chain:
+            first = generate_ad_copy("Yoga studio", image=self.image)
+            self.assertEqual(generate_ad_copy("Yoga studio", image=self.image), first)
+            self.assertEqual(get_chain.call_count, 1)
+
+            # Other instructions, another image or opting out reach the model.
+            generate_ad_copy("Tea shop", image=self.image)
+            generate_ad_copy("Yoga studio", image=self.other_image)
+            generate_ad_copy("Yoga studio", image=self.image, use_cache=False)
+            self.assertEqual(get_chain.call_count, 4)
+
+    def test_only_misses_reach_the_model_in_async_mode(self):
+        cached = generate_ad_copy("Yoga studio", image=self.image)
+        inputs = [
+            {"instructions": "Yoga studio", "image": image}
+            for image in (self.image, self.other_image)
+        ]
+        with mock.patch.object(
+            chains, "get_adcopy_chain", wraps=chains.get_adcopy_chain
+        ) as get_chain:
+            outputs = run_async(agenerate_ad_copies(inputs))
+        self.assertEqual(outputs[0], cached)
+        self.assertEqual(get_chain.call_count, 1)
+
+    @override_settings(ADCOPY_CACHE_MAX_ENTRY_SIZE=10)
+    def test_large_responses_are_not_cached(self):
+        set_cached_ad_copy("adcopy:response:small", "Short")
+        set_cached_ad_copy("adcopy:response:large", "Much too long to cache")
+        self.assertEqual(cache.get("adcopy:response:small"), "Short")
+        self.assertIsNone(cache.get("adcopy:response:large"))
+
+
+class ConcurrentGenerationTests(TestCase):
+    def test_concurrency_is_capped(self):
+        in_flight = []
+        peak = []
+
+        async def answer(data):
+            in_flight.append(data)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(data)
+            if data["instructions"] == "fail":
+                raise ValueError("Model unavailable")
+            return f"Copy for {data['instructions']}"
+
+        inputs = [
+            {"instructions": name, "image_base64": "aW1hZ2U="}
+            for name in ("a", "b", "fail", "c", "d")
+        ]
+        outputs = run_async(
+            agenerate_ad_copies(
+                inputs,
+                max_concurrency=2,
+                chain=RunnableLambda(lambda data: data, afunc=answer),
+                use_cache=False,
+            )
+        )
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(outputs[:2], ["Copy for a", "Copy for b"])
+        self.assertIsInstance(outputs[2], ValueError)
+        self.assertEqual(outputs[3:], ["Copy for c", "Copy for d"])
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="uploads@example.com", password="pw")
+        self.data = b"business,niche\nAcme,yoga\nBeta,fitness\n"
+        self.upload = start_upload(
+            self.user, "clients.csv", len(self.data), hashlib.sha256(self.data).hexdigest()
+        )
+
+    def append(self, offset, data, **kwargs):
+        return append_chunk(self.upload.uuid, io.BytesIO(data), offset, len(data), **kwargs)
+
+    def test_chunks_are_appended_in_order(self):
+        self.assertEqual(self.append(0, self.data[:10]).offset, 10)
+        with self.assertRaises(UploadOffsetError) as raised:
+            self.append(0, self.data[:10])
+        self.assertEqual(raised.exception.offset, 10)
+
+        upload = self.append(10, self.data[10:])
+        self.assertEqual((upload.offset, upload.status), (len(self.data), Status.PENDING))
+        self.assertEqual(complete_upload(self.upload.uuid).status, Status.COMPLETED)
+        with upload.file.open("rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_incomplete_or_corrupt_chunks_are_dropped(self):
+        self.append(0, self.data[:10])
+        with self.assertRaises(UploadError):
+            append_chunk(self.upload.uuid, io.BytesIO(self.data[10:15]), 10, 20)
+        with self.assertRaises(UploadError):
+            self.append(10, self.data[10:20], checksum="0" * 64)
+
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.offset, self.upload.status), (10, Status.PENDING))
+        with self.upload.file.open("rb") as f:
+            self.assertEqual(f.read(), self.data[:10])
+        self.assertEqual(self.append(10, self.data[10:]).offset, len(self.data))
+
+    def test_chunk_being_written_blocks_other_chunks(self):
+        self.upload.status = Status.PROCESSING
+        self.upload.save(update_fields=["status", "updated_at"])
+        with self.assertRaises(UploadBusyError):
+            self.append(0, self.data[:10])
+        with self.assertRaises(UploadBusyError):
+            complete_upload(self.upload.uuid)
+
+    def test_incomplete_upload_cannot_be_completed(self):
+        self.append(0, self.data[:10])
+        with self.assertRaises(UploadError):
+            complete_upload(self.upload.uuid)
+
+    def test_corrupt_file_fails_to_complete(self):
+        self.append(0, self.data[:-1] + b"X")
+        with self.assertRaises(UploadError):
+            complete_upload(self.upload.uuid)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.status, Status.FAILED)
+
+    def test_uploads_need_a_local_storage(self):
+        field = ClientUpload._meta.get_field("file")
+        with mock.patch.object(field, "storage", InMemoryStorage()):
+            with self.assertRaises(ImproperlyConfigured):
+                start_upload(self.user, "clients.csv", len(self.data))
+
+
+class CopyJobProcessingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="jobs@example.com", password="pw")
+        self.system = create_system()
+
+    def create_job(self, **kwargs):
+        return CopyJob.objects.create(
+            system=self.system, user=self.user, client_data={"business": "Acme"}, **kwargs
+        )
+
+    def test_execution_modes_generate_every_page(self):
+        for mode in (ExecutionMode.SEQUENTIAL, ExecutionMode.FANOUT, ExecutionMode.ASYNC):
+            with self.subTest(mode=mode), override_settings(COPY_JOB_EXECUTION_MODE=mode):
+                job = self.create_job(use_cache=False)
+                process_copy_job.delay(str(job.uuid))
+
+                job.refresh_from_db()
+                self.assertEqual(job.status, Status.COMPLETED)
+                copies = job.generated_copies.all()
+                self.assertEqual(len(copies), 3)
+                for copy in copies:
+                    self.assertEqual(copy.status, Status.COMPLETED)
+                    self.assertEqual(len(copy.copy_json["components"]), len(COMPONENTS))
+                self.assertIsNone(cache.get(job_lock_key(job.uuid)))
+
+    @override_settings(COPY_JOB_EXECUTION_MODE=ExecutionMode.FANOUT)
+    def test_failed_page_does_not_stop_the_other_pages(self):
+        failing = PageImage.objects.order_by("page__order_in_funnel")[1]
+        generate_ad_copy = tasks.generate_ad_copy
+
+        def generate(instructions, image=None, **kwargs):
+            if image == failing:
+                raise ValueError("Model unavailable")
+            return generate_ad_copy(instructions, image=image, **kwargs)
+
+        job = self.create_job()
+        with mock.patch.object(tasks, "generate_ad_copy", side_effect=generate):
+            process_copy_job.delay(str(job.uuid))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.PARTIALLY_COMPLETED)
+        copies = {copy.page_image_id: copy for copy in job.generated_copies.all()}
+        self.assertEqual(len(copies), 3)
+        self.assertEqual(
+            (copies[failing.pk].status, copies[failing.pk].error),
+            (Status.FAILED, "Model unavailable"),
+        )
+
+    def test_resumed_job_only_generates_missing_pages(self):
+        job = self.create_job(status=Status.PROCESSING)
+        first, second, _ = PageImage.objects.order_by("page__order_in_funnel")
+        AdCopy.objects.create(
+            copy_job=job, page=first.page, page_image=first, copy_text="Kept"
+        )
+        AdCopy.objects.create(
+            copy_job=job, page=second.page, page_image=second, status=Status.FAILED
+        )
+        process_copy_job.delay(str(job.uuid))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.COMPLETED)
+        self.assertEqual(job.generated_copies.count(), 3)
+        self.assertEqual(job.generated_copies.get(page_image=first).copy_text, "Kept")
+        self.assertEqual(job.generated_copies.get(page_image=second).status, Status.COMPLETED)
+
+    def test_job_being_processed_is_skipped(self):
+        job = self.create_job()
+        cache.add(job_lock_key(job.uuid), "another-run")
+        # The same task id does not pass for the run holding the lock, as
+        # a redelivered task keeps the id of the original one.
+        process_copy_job.apply((str(job.uuid),), task_id="another-run")
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.PENDING)
+        self.assertFalse(job.generated_copies.exists())
+
+    def test_progress_is_recorded(self):
+        job = self.create_job()
+        process_copy_job.delay(str(job.uuid))
+
+        user_id, progress = get_progress(job.uuid)
+        self.assertEqual(user_id, str(self.user.pk))
+        self.assertEqual(progress["status"], Status.COMPLETED)
+        self.assertEqual((progress["total"], progress["done"], progress["failed"]), (3, 3, 0))
+        self.assertEqual(progress["eta_seconds"], 0)
+        last = PageImage.objects.order_by("page__order_in_funnel").last()
+        self.assertEqual(progress["latest_page"], {"uuid": str(last.uuid), "name": "Page 2"})
+
+    def test_progress_endpoint(self):
+        job = self.create_job()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/copy/jobs/{job.uuid}/progress/"
+
+        # Before the job starts, the job status stands in for its progress.
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(response.json()["data"]["status"], Status.PENDING)
+        self.assertIsNone(response.json()["data"]["total"])
+
+        process_copy_job.delay(str(job.uuid))
+        # Recorded progress is served without querying the database.
+        with self.assertNumQueries(0):
+            response = client.get(url)
+        self.assertEqual(response.json()["data"]["done"], 3)
+
+        other = User.objects.create_user(email="other@example.com", password="pw")
+        client.force_authenticate(other)
+        self.assertEqual(client.get(url).status_code, 404)
+
+    def test_finished_job_is_not_processed_again(self):
+        job = self.create_job(status=Status.COMPLETED)
+        process_copy_job.delay(str(job.uuid))
+        self.assertFalse(job.generated_copies.exists())
+        self.assertIsNone(cache.get(job_lock_key(job.uuid)))
+
+    @override_settings(COPY_JOB_CSV_BATCH_SIZE=2, COPY_JOB_CSV_MAX_VALUE_LENGTH=20)
+    def test_client_file_rows_become_row_jobs(self):
+        content = b"business,niche\nAcme,yoga\nBeta,fitness,extra\nGamma,tea\n"
+        job = self.create_job()
+        job.client_file.save("clients.csv", ContentFile(content))
+        process_copy_job.delay(str(job.uuid))
+
+        job.refresh_from_db()
+        self.assertEqual((job.rows_ingested, job.row_count), (3, 3))
+        self.assertEqual(job.client_file_offset, len(content))
+        self.assertEqual(job.status, Status.PARTIALLY_COMPLETED)
+        row_jobs = job.row_jobs.order_by("row_number")
+        self.assertEqual(
+            [(row.row_number, row.status) for row in row_jobs],
+            [(1, Status.COMPLETED), (2, Status.FAILED), (3, Status.COMPLETED)],
+        )
+        self.assertEqual(row_jobs[0].client_data, {"business": "Acme", "niche": "yoga"})
+
+    def test_client_file_without_rows_completes(self):
+        for content in (b"business,niche\n", b""):
+            with self.subTest(content=content):
+                job = self.create_job()
+                job.client_file.save("clients.csv", ContentFile(content))
+                process_copy_job.delay(str(job.uuid))
+
+                job.refresh_from_db()
+                self.assertEqual(job.status, Status.COMPLETED)
+                self.assertEqual((job.rows_ingested, job.row_count), (0, 0))
+                self.assertFalse(job.row_jobs.exists())
+
+    def test_row_jobs_are_listed_under_their_parent(self):
+        job = self.create_job()
+        job.client_file.save("clients.csv", ContentFile(b"business\nAcme\nBeta\n"))
+        process_copy_job.delay(str(job.uuid))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get("/api/copy/jobs/")
+        self.assertEqual([r["uuid"] for r in response.json()["data"]], [str(job.uuid)])
+
+        response = client.get(f"/api/copy/jobs/{job.uuid}/rows/")
+        results = response.json()["data"]
+        self.assertEqual(sorted(r["row_number"] for r in results), [1, 2])
+        self.assertTrue(all(r["parent"] == str(job.uuid) for r in results))
+
+
+class WorkerKilled(BaseException):
+    """
+    Stands in for the worker process dying mid-task: unlike an error, it
+    is not handled by the task.
+    """
+
+
+class ResumeCopyJobsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="resume@example.com", password="pw")
+        self.job = CopyJob.objects.create(
+            system=create_system(), user=self.user, client_data={"business": "Acme"}
+        )
+        self.first, self.second, _ = PageImage.objects.order_by("page__order_in_funnel")
+
+    def kill_mid_run(self):
+        """
+        Run the job until its worker dies on the second page, an hour ago.
+        """
+        generate_ad_copy = tasks.generate_ad_copy
+
+        def generate(instructions, image=None, **kwargs):
+            if image == self.second:
+                raise WorkerKilled()
+            return generate_ad_copy(instructions, image=image, **kwargs)
+
+        with (
+            mock.patch.object(tasks, "generate_ad_copy", side_effect=generate),
+            self.assertRaises(WorkerKilled),
+        ):
+            process_copy_job.delay(str(self.job.uuid))
+        CopyJob.objects.filter(pk=self.job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Status.PROCESSING)
+        self.assertEqual(self.job.generated_copies.get().page_image, self.first)
+
+    def resume(self, **options):
+        out = io.StringIO()
+        call_command("resume_copy_jobs", stdout=out, **options)
+        return out.getvalue()
+
+    def assert_resumed(self, first_copy):
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Status.COMPLETED)
+        self.assertEqual(self.job.generated_copies.count(), 3)
+        self.assertEqual(self.job.generated_copies.get(page_image=self.first), first_copy)
+        self.assertIsNotNone(self.job.celery_task_id)
+        self.assertIsNone(cache.get(job_lock_key(self.job.uuid)))
+
+    @override_settings(COPY_JOB_LOCK_TIMEOUT=0.3)
+    def test_heartbeat_keeps_the_lock_alive(self):
+        key = job_lock_key(self.job.uuid)
+        self.assertTrue(acquire_job_lock(self.job.uuid, "run"))
+        with JobLockHeartbeat(self.job.uuid, "run"):
+            time.sleep(0.6)
+            self.assertEqual(cache.get(key), "run")
+            self.assertFalse(acquire_job_lock(self.job.uuid, "other-run"))
+        time.sleep(0.4)
+        self.assertIsNone(cache.get(key))
+
+    def test_killed_job_resumes_once_its_lock_expires(self):
+        self.kill_mid_run()
+        first_copy = self.job.generated_copies.get()
+
+        # The killed run's lock is not refreshed any more, but has not expired.
+        self.assertIn("still running, skipped", self.resume())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Status.PROCESSING)
+        self.assertIsNone(self.job.celery_task_id)
+
+        cache.delete(job_lock_key(self.job.uuid))
+        self.assertIn("would resume", self.resume(dry_run=True))
+        self.assertIn("Resumed 1 copy jobs", self.resume())
+        self.assert_resumed(first_copy)
+
+    def test_force_takes_over_the_lock(self):
+        self.kill_mid_run()
+        first_copy = self.job.generated_copies.get()
+        self.assertIn("Resumed 1 copy jobs", self.resume(force=True))
+        self.assert_resumed(first_copy)
+
+    def test_recently_updated_jobs_are_left_alone(self):
+        self.kill_mid_run()
+        cache.delete(job_lock_key(self.job.uuid))
+        self.assertIn("Resumed 0 copy jobs", self.resume(stale_minutes=120))
+
+    def test_retried_task_resumes_once_the_lock_expires(self):
+        self.kill_mid_run()
+        first_copy = self.job.generated_copies.get()
+        acquire_job_lock = tasks.acquire_job_lock
+
+        def acquire(job_uuid, owner, claim=None):
+            acquired = acquire_job_lock(job_uuid, owner, claim)
+            if not acquired:
+                # The killed run's lock expires while the retry waits.
+                cache.delete(job_lock_key(job_uuid))
+            return acquired
+
+        # A redelivered task that finds the lock retries after
+        # COPY_JOB_LOCK_TIMEOUT, as do its retries; run eagerly, the retry
+        # runs right away.
+        with mock.patch.object(tasks, "acquire_job_lock", side_effect=acquire) as lock:
+            process_copy_job.apply((str(self.job.uuid),), retries=1, throw=False)
+        self.assertEqual(lock.call_count, 2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Status.COMPLETED)
+        self.assertEqual(self.job.generated_copies.get(page_image=self.first), first_copy)
+
+
+class StreamingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="stream@example.com", password="pw")
+        self.other = User.objects.create_user(email="other@example.com", password="pw")
+        self.job = CopyJob.objects.create(
+            system=create_system(), user=self.user, client_data={"business": "Acme"}
+        )
+
+    def subscribe(self):
+        pubsub = redis.Redis.from_url(settings.COPY_JOB_STREAM_REDIS_URL).pubsub()
+        pubsub.subscribe(stream_channel(self.job.uuid))
+        pubsub.get_message(timeout=1)
+        return pubsub
+
+    def events(self, pubsub):
+        events = []
+        while message := pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1):
+            events.append(json.loads(message["data"]))
+        return events
+
+    async def read(self, stream, count):
+        """
+        The next `count` events of a stream, skipping keepalives.
+        """
+        events = []
+        async for event in stream:
+            if event != ": keepalive\n\n":
+                events.append(event)
+            if len(events) == count:
+                break
+        return events
+
+    def test_job_publishes_its_copy_as_it_is_generated(self):
+        pubsub = self.subscribe()
+        process_copy_job.delay(str(self.job.uuid))
+        events = self.events(pubsub)
+
+        images = PageImage.objects.order_by("page__order_in_funnel")
+        pages = [event for event in events if event["event"] == "page"]
+        self.assertEqual(
+            [(event["page"], event["status"]) for event in pages],
+            [(str(image.uuid), Status.COMPLETED) for image in images],
+        )
+        for image in images:
+            text = "".join(
+                event["text"]
+                for event in events
+                if event["event"] == "delta" and event["page"] == str(image.uuid)
+            )
+            copy = self.job.generated_copies.get(page_image=image)
+            self.assertEqual(json.loads(text)["components"], copy.copy_json["components"])
+        self.assertEqual(events[-1], {"event": "done", "status": Status.COMPLETED})
+
+    @override_settings(COPY_JOB_STREAM_FLUSH_INTERVAL=60)
+    def test_deltas_are_batched(self):
+        pubsub = self.subscribe()
+        publisher = CopyStreamPublisher(self.job.uuid)
+        for text in ("Find ", "your ", "calm"):
+            publisher.delta("page", text)
+        publisher.page("page", Status.COMPLETED)
+        self.assertEqual(
+            self.events(pubsub),
+            [
+                {"event": "delta", "page": "page", "text": "Find "},
+                {"event": "delta", "page": "page", "text": "your calm"},
+                {"event": "page", "page": "page", "status": Status.COMPLETED},
+            ],
+        )
+
+    async def test_stream_relays_events_until_done(self):
+        stream = job_event_stream(self.job.uuid)
+        self.assertEqual(
+            await anext(stream), 'event: status\ndata: {"status": "pending"}\n\n'
+        )
+        publisher = CopyStreamPublisher(self.job.uuid)
+        publisher.delta("page", "Find your calm")
+        publisher.done(Status.COMPLETED)
+        delta, done = await self.read(stream, 2)
+        self.assertEqual(
+            delta,
+            'event: delta\ndata: {"event": "delta", "page": "page", "text": "Find your calm"}\n\n',
+        )
+        self.assertTrue(done.startswith("event: done\n"))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+    @override_settings(COPY_JOB_STREAM_KEEPALIVE=0.01)
+    async def test_quiet_stream_is_kept_alive(self):
+        stream = job_event_stream(self.job.uuid)
+        await anext(stream)
+        self.assertEqual(await anext(stream), ": keepalive\n\n")
+        await stream.aclose()
+
+    async def test_stream_of_finished_job_ends_right_away(self):
+        await CopyJob.objects.filter(pk=self.job.pk).aupdate(status=Status.COMPLETED)
+        events = [event async for event in job_event_stream(self.job.uuid)]
+        self.assertEqual(events, ['event: status\ndata: {"status": "completed"}\n\n'])
+
+    async def test_endpoint_streams_the_users_jobs(self):
+        await CopyJob.objects.filter(pk=self.job.pk).aupdate(status=Status.FAILED)
+        client = AsyncClient()
+        url = f"/api/copy/jobs/{self.job.uuid}/stream/"
+        response = await client.get(
+            url, headers={"Accept": "text/event-stream", "Authorization": bearer(self.user)}
+        )
+        self.assertTrue(response["Content-Type"].startswith("text/event-stream"))
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content, b'event: status\ndata: {"status": "failed"}\n\n')
+
+        response = await client.get(
+            url, headers={"Accept": "text/event-stream", "Authorization": bearer(self.other)}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class SectionRegenerationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="sections@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        job = CopyJob.objects.create(
+            system=create_system(page_count=1), user=self.user, client_data={"business": "Acme"}
+        )
+        process_copy_job.delay(str(job.uuid))
+        self.ad_copy = job.generated_copies.get()
+        self.ad_copy.copy_json = {
+            "components": [
+                {"section": "Hero", "component": "Headline", "copy": "Old head"},
+                {"section": "Hero", "component": "Subheadline", "copy": "Old sub"},
+                {"section": "Offer", "component": "Button", "copy": "Old button"},
+            ]
+        }
+        self.ad_copy.save()
+        self.url = f"/api/copy/copies/{self.ad_copy.uuid}/regenerate/"
+
+    def test_only_the_section_is_regenerated(self):
+        with (
+            mock.patch.object(tasks, "generate_ad_copy", wraps=tasks.generate_ad_copy) as generate,
+            mock.patch.object(images, "preprocess_image", wraps=images.preprocess_image) as preprocess,
+        ):
+            response = self.client.post(
+                self.url, {"section": "Hero", "instructions": "Shorter"}, format="json"
+            )
+        self.assertEqual(response.status_code, 202)
+
+        self.ad_copy.refresh_from_db()
+        self.assertEqual(
+            [entry["copy"] for entry in self.ad_copy.copy_json["components"]],
+            ["Headline copy.", "Subheadline copy.", "Old button"],
+        )
+        self.assertIn("Old button", self.ad_copy.copy_text)
+        # One high priority call for the section, from the cached page image.
+        kwargs = generate.call_args.kwargs
+        self.assertEqual(kwargs["priority"], Priority.HIGH)
+        self.assertEqual([c["component"] for c in kwargs["components"]], ["Headline", "Subheadline"])
+        self.assertIn("Editor Notes:\nShorter", generate.call_args.args[0])
+        preprocess.assert_not_called()
+
+    def test_unknown_sections_and_other_users_copy_are_rejected(self):
+        response = self.client.post(self.url, {"section": "Footer"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        other = User.objects.create_user(email="other@example.com", password="pw")
+        self.client.force_authenticate(other)
+        response = self.client.post(self.url, {"section": "Hero"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_task_goes_to_the_priority_queue(self):
+        route = current_app.amqp.router.route({}, regenerate_ad_copy_section.name)
+        self.assertEqual(route["queue"].name, "priority")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="etag@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.job = CopyJob.objects.create(
+            system=create_system(page_count=1), user=self.user, client_data={}
+        )
+
+    def test_unchanged_job_is_not_modified(self):
+        url = f"/api/copy/jobs/{self.job.uuid}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        image = PageImage.objects.get()
+        AdCopy.objects.create(copy_job=self.job, page=image.page, page_image=image)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unchanged_catalog_is_not_modified(self):
+        response = self.client.get("/api/copy/systems/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][0]["name"], "Launch System")
+
+        response = self.client.get("/api/copy/systems/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+class CatalogTests(TestCase):
+    url = "/api/copy/systems/"
+
+    def setUp(self):
+        cache.clear()
+        self.system = create_system(page_count=1)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(email="catalog@example.com", password="pw")
+        )
+
+    def test_edited_system_is_served_at_once(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.system.name = "Relaunch System"
+            self.system.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][0]["name"], "Relaunch System")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_nested_edits_invalidate_the_cached_catalog(self):
+        page = PageTemplate.objects.select_related("funnel").get()
+        association = SystemFunnelAssociation.objects.get()
+        with mock.patch.object(catalog, "render_catalog", wraps=catalog.render_catalog) as render:
+            self.client.get(self.url)
+            self.client.get(self.url)
+            self.assertEqual(render.call_count, 1)
+
+            for instance in (page.funnel, association, page):
+                with self.subTest(model=type(instance).__name__):
+                    render.reset_mock()
+                    version = catalog.get_catalog_version()
+                    with self.captureOnCommitCallbacks(execute=True):
+                        instance.save()
+                    self.assertEqual(catalog.get_catalog_version(), version + 1)
+                    self.assertEqual(self.client.get(self.url).status_code, 200)
+                    self.assertEqual(render.call_count, 1)
+
+
+class BatchGenerationTests(TestCase):
+    """
+    Batch-mode jobs end to end against the FileSystemBatchBackend, which
+    answers a batch with the fake chat model the first time it is polled.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="batch@example.com", password="pw")
+        self.system = create_system()
+        self.jobs = [
+            CopyJob.objects.create(
+                system=self.system,
+                user=self.user,
+                client_data={"business": name},
+                use_batch=True,
+            )
+            for name in ("Acme", "Beta")
+        ]
+        for job in self.jobs:
+            process_copy_job.delay(str(job.uuid))
+
+    def output_path(self, batch):
+        return os.path.join(settings.ADCOPY_BATCH_FAKE_DIR, batch.batch_id, "output.jsonl")
+
+    def test_batch_results_become_ad_copies(self):
+        batch = CopyBatch.objects.get(uuid=submit_copy_batches())
+        self.assertEqual((batch.status, batch.request_count), (Status.PROCESSING, 6))
+        self.assertEqual(set(batch.jobs.all()), set(self.jobs))
+
+        poll_copy_batches()
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, Status.COMPLETED)
+        self.assertIsNotNone(batch.completed_at)
+        for job in self.jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Status.COMPLETED)
+            copies = job.generated_copies.all()
+            self.assertEqual(len(copies), 3)
+            for copy in copies:
+                self.assertEqual(copy.status, Status.COMPLETED)
+                self.assertEqual(len(copy.copy_json["components"]), len(COMPONENTS))
+                self.assertEqual(copy.model, settings.ADCOPY_FAST_MODEL)
+                self.assertGreater(copy.input_tokens, 0)
+                self.assertGreater(copy.output_tokens, 0)
+                cost = estimate_cost(
+                    copy.model, copy.input_tokens, copy.cached_tokens, copy.output_tokens
+                )
+                self.assertEqual(copy.cost_usd, Decimal(f"{cost * BATCH_PRICE_FACTOR:.6f}"))
+            self.assertEqual(job.input_tokens, sum(copy.input_tokens for copy in copies))
+            self.assertEqual(job.output_tokens, sum(copy.output_tokens for copy in copies))
+
+        # Finished jobs are not submitted again.
+        self.assertIsNone(submit_copy_batches())
+
+    def test_failed_requests_fail_their_pages(self):
+        batch = CopyBatch.objects.get(uuid=submit_copy_batches())
+        job = self.jobs[0]
+        first, second, third = PageImage.objects.order_by("page__order_in_funnel")
+
+        # Answer the batch, then replace two results with failed requests
+        # as the provider reports them: a request error and an error status.
+        get_batch_backend(batch.backend).process(batch.batch_id, self.output_path(batch))
+        with open(self.output_path(batch)) as f:
+            lines = [json.loads(line) for line in f]
+        for line in lines:
+            if line["custom_id"] == batch_custom_id(job, first):
+                line["response"] = None
+                line["error"] = {"code": "server_error", "message": "Upstream error"}
+            elif line["custom_id"] == batch_custom_id(job, second):
+                line["response"] = {
+                    "status_code": 400,
+                    "body": {"error": {"message": "Invalid image"}},
+                }
+        with open(self.output_path(batch), "w") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+
+        poll_copy_batches()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.PARTIALLY_COMPLETED)
+        copies = {copy.page_image_id: copy for copy in job.generated_copies.all()}
+        self.assertEqual(
+            (copies[first.pk].status, copies[first.pk].error), (Status.FAILED, "Upstream error")
+        )
+        self.assertEqual(
+            (copies[second.pk].status, copies[second.pk].error), (Status.FAILED, "Invalid image")
+        )
+        self.assertEqual(copies[third.pk].status, Status.COMPLETED)
+        self.assertEqual(job.input_tokens, copies[third.pk].input_tokens)
+
+        other = self.jobs[1]
+        other.refresh_from_db()
+        self.assertEqual(other.status, Status.COMPLETED)
+
+    def test_failed_submission_leaves_the_jobs_waiting(self):
+        backend = get_batch_backend(settings.ADCOPY_BATCH_BACKEND)
+        with mock.patch.object(
+            type(backend), "submit", side_effect=ConnectionError("Provider unavailable")
+        ):
+            self.assertIsNone(submit_copy_batches())
+
+        batch = CopyBatch.objects.get()
+        self.assertEqual((batch.status, batch.error), (Status.FAILED, "Provider unavailable"))
+        for job in self.jobs:
+            job.refresh_from_db()
+            self.assertIsNone(job.batch)
+            self.assertEqual(get_progress(job.uuid), (None, None))
+
+        # The next run submits them.
+        batch = CopyBatch.objects.get(uuid=submit_copy_batches())
+        self.assertEqual(set(batch.jobs.all()), set(self.jobs))
+        self.assertEqual(get_progress(self.jobs[0].uuid)[1]["total"], 3)
+
+    def test_pages_missing_from_the_results_fail(self):
+        batch = CopyBatch.objects.get(uuid=submit_copy_batches())
+        ingest_copy_batch(batch, b"")
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, Status.COMPLETED)
+        for job in self.jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Status.FAILED)
+            self.assertEqual(
+                set(job.generated_copies.values_list("error", flat=True)),
+                {"No result for this page in the batch"},
+            )
@@ -0,0 +1,236 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from bizlaunch.funnels.models import ClientUpload, Status
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request or file at a time
+READ_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """
+    Raised when a chunk or completion request cannot be accepted.
+    """
+
+
+class UploadOffsetError(UploadError):
+    """
+    Raised when a chunk does not start where the upload left off, e.g. when
+    a client retries a chunk that already arrived. Carries the offset the
+    client should continue from.
+    """
+
+    def __init__(self, offset):
+        super().__init__(f"Expected a chunk at offset {offset}.")
+        self.offset = offset
+
+
+class UploadBusyError(UploadOffsetError):
+    """
+    Raised when another chunk of the upload is still being written.
+    """
+
+    def __init__(self, offset):
+        UploadError.__init__(self, "Another chunk of the upload is being written.")
+        self.offset = offset
+
+
+def file_checksum(file):
+    """
+    SHA-256 of a stored file, hex encoded, read in small pieces.
+    """
+    digest = hashlib.sha256()
+    with file.open("rb") as f:
+        while data := f.read(READ_SIZE):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def start_upload(user, filename, size, checksum=""):
+    """
+    Create a chunked upload and its empty file in storage.
+    Raises:
+        ImproperlyConfigured: If the file storage is not a local one
+    """
+    upload = ClientUpload(user=user, filename=filename, size=size, checksum=checksum)
+    if not isinstance(upload.file.storage, FileSystemStorage):
+        # Chunks are written into the file in place, which object storages
+        # such as S3 cannot do.
+        raise ImproperlyConfigured("Chunked uploads need a FileSystemStorage.")
+    upload.file.save(filename, ContentFile(b""), save=False)
+    upload.save()
+    logger.info(f"Started ClientUpload {upload.uuid} of {size} bytes")
+    return upload
+
+
+def append_chunk(upload_uuid, stream, offset, length, checksum=""):
+    """
+    Append one chunk to an upload, reading it from the request stream in
+    small pieces so the chunk is never held in memory.
+    Chunks are written in place into the stored file, which needs a local
+    file storage such as the FileSystemStorage configured in STORAGES.
+    Args:
+        upload_uuid: The upload
+        stream: File-like request body
+        offset (int): Byte offset the client says the chunk starts at
+        length (int): Declared length of the chunk (the Content-Length)
+        checksum (str): Optional SHA-256 of the chunk, hex encoded
+    Returns:
+        ClientUpload: The upload, with its new offset
+    Raises:
+        UploadOffsetError: If offset is not the upload's current offset
+        UploadBusyError: If another chunk of the upload is being written
+        UploadError: If the chunk is too large, incomplete or corrupt
+    """
+    if length > settings.CLIENT_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(
+            f"Chunks may be at most {settings.CLIENT_UPLOAD_MAX_CHUNK_SIZE} bytes."
+        )
+
+    # Claim the upload in a short transaction: while its status is
+    # PROCESSING, other chunks are refused. The chunk is then streamed to
+    # disk without holding the row lock or a transaction open.
+    with transaction.atomic():
+        upload = ClientUpload.objects.select_for_update().get(uuid=upload_uuid)
+        if upload.status == Status.PROCESSING and not is_abandoned(upload):
+            raise UploadBusyError(upload.offset)
+        if upload.status not in (Status.PENDING, Status.PROCESSING):
+            raise UploadError("The upload is already complete.")
+        if offset != upload.offset:
+            raise UploadOffsetError(upload.offset)
+        if offset + length > upload.size:
+            raise UploadError("The chunk goes past the declared size of the file.")
+        upload.status = Status.PROCESSING
+        upload.save(update_fields=["status", "updated_at"])
+
+    try:
+        received = write_chunk(upload, stream, offset, length, checksum)
+    except Exception:
+        release_upload(upload, offset)
+        raise
+
+    # Commit the new offset, unless the claim was given up and taken over.
+    if not release_upload(upload, offset, offset + received):
+        raise UploadError("The chunk took too long; send it again.")
+    upload.offset = offset + received
+    upload.status = Status.PENDING
+    return upload
+
+
+def is_abandoned(upload):
+    """
+    Whether the chunk an upload is claimed for has been written for longer
+    than CLIENT_UPLOAD_CHUNK_TIMEOUT, e.g. because its worker died.
+    """
+    age = timezone.now() - upload.updated_at
+    return age.total_seconds() > settings.CLIENT_UPLOAD_CHUNK_TIMEOUT
+
+
+def release_upload(upload, offset, new_offset=None):
+    """
+    Give up the claim on an upload taken at `offset`, moving its offset to
+    `new_offset` if given. The claim is identified by the time it was taken.
+    Returns:
+        bool: Whether the claim was still held
+    """
+    return bool(
+        ClientUpload.objects.filter(
+            uuid=upload.uuid,
+            status=Status.PROCESSING,
+            offset=offset,
+            updated_at=upload.updated_at,
+        ).update(
+            status=Status.PENDING,
+            offset=offset if new_offset is None else new_offset,
+            updated_at=timezone.now(),
+        )
+    )
+
+
+def write_chunk(upload, stream, offset, length, checksum=""):
+    """
+    Write a chunk from the request stream into the upload's file at offset.
+    Returns:
+        int: The number of bytes written
+    Raises:
+        UploadError: If the chunk is incomplete or corrupt
+    """
+    digest = hashlib.sha256()
+    received = 0
+    with upload.file.storage.open(upload.file.name, "r+b") as f:
+        f.seek(offset)
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            digest.update(data)
+            f.write(data)
+            received += len(data)
+
+        # Drop a partially received or corrupt chunk, so that the client
+        # can send it again from the same offset.
+        if received != length:
+            f.truncate(offset)
+            raise UploadError(f"Received {received} of {length} bytes.")
+        if checksum and digest.hexdigest() != checksum.lower():
+            f.truncate(offset)
+            raise UploadError("The chunk does not match its checksum.")
+        f.truncate(offset + received)
+    return received
+
+
+def complete_upload(upload_uuid):
+    """
+    Finish an upload once all of its bytes arrived, verifying the checksum
+    of the whole file if one was given when it started.
+    The file is read before the upload is locked, so the row lock is only
+    held to check the upload did not change meanwhile and to set its status.
+    Raises:
+        UploadError: If bytes are missing or the file is corrupt
+    """
+    upload = ClientUpload.objects.get(uuid=upload_uuid)
+    if check_complete(upload):
+        return upload
+    matches = not upload.checksum or file_checksum(upload.file) == upload.checksum.lower()
+
+    with transaction.atomic():
+        upload = ClientUpload.objects.select_for_update().get(uuid=upload_uuid)
+        if check_complete(upload):
+            return upload
+        upload.status = Status.COMPLETED if matches else Status.FAILED
+        upload.save(update_fields=["status", "updated_at"])
+
+    if upload.status == Status.FAILED:
+        logger.error(f"ClientUpload {upload.uuid} does not match its checksum")
+        raise UploadError("The file does not match its checksum.")
+    logger.info(f"Completed ClientUpload {upload.uuid}")
+    return upload
+
+
+def check_complete(upload):
+    """
+    Whether an upload is already complete.
+    Once every byte arrived, no chunk can be appended, so its file does not
+    change while it is being completed.
+    Raises:
+        UploadBusyError: If a chunk of the upload is being written
+        UploadError: If the upload failed or bytes are missing
+    """
+    if upload.status == Status.COMPLETED:
+        return True
+    if upload.status == Status.PROCESSING:
+        raise UploadBusyError(upload.offset)
+    if upload.status != Status.PENDING:
+        raise UploadError("The upload failed; start a new one.")
+    if upload.offset != upload.size:
+        raise UploadError(f"Received {upload.offset} of {upload.size} bytes.")
+    return False
@@ -1,11 +1,19 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import CopyJobViewSet, FunnelSystemsAPIView, ProjectViewSet
+from .views import (
+    AdCopyViewSet,
+    ClientUploadViewSet,
+    CopyJobViewSet,
+    FunnelSystemsAPIView,
+    ProjectViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"jobs", CopyJobViewSet, basename="copy-job")
 router.register(r"projects", ProjectViewSet, basename="project")
+router.register(r"copies", AdCopyViewSet, basename="ad-copy")
+router.register(r"uploads", ClientUploadViewSet, basename="client-upload")
 
 urlpatterns = [
     path("", include(router.urls)),
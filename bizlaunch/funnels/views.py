@@ -1,26 +1,56 @@
 import logging
+import uuid
 
 from celery import current_app
 from celery.result import AsyncResult
 from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
-from rest_framework import status, viewsets
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from drf_yasg.utils import no_body, swagger_auto_schema
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from bizlaunch.funnels.models import CopyJob, Project, SystemTemplate
+from bizlaunch.core.conditional import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_etag,
+)
+from bizlaunch.core.pagination import KeysetPagination
+from bizlaunch.core.parsers import ORJSONParser
+from bizlaunch.core.renderers import ApiORJSONRenderer
+from bizlaunch.funnels.catalog import get_catalog
+from bizlaunch.funnels.models import (
+    AdCopy,
+    ClientUpload,
+    CopyJob,
+    Project,
+    Status,
+)
+from bizlaunch.funnels.progress import get_progress
 from bizlaunch.funnels.serializers import (
+    AdCopyGenerationSerializer,
+    ClientUploadSerializer,
     CopyJobCreateSerializer,
     CopyJobStatusSerializer,
     ProjectCreateSerializer,
     ProjectSerializer,
-    SystemTemplateSerializer,
+    SectionRegenerateSerializer,
+)
+from bizlaunch.funnels.streaming import EventStreamRenderer, job_event_stream
+from bizlaunch.funnels.tasks import process_copy_job, regenerate_ad_copy_section
+from bizlaunch.funnels.uploads import (
+    UploadError,
+    UploadOffsetError,
+    append_chunk,
+    complete_upload,
+    start_upload,
 )
-from bizlaunch.funnels.tasks import process_copy_job
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -29,30 +59,68 @@ logger = logging.getLogger(__name__)
 class FunnelSystemsAPIView(APIView):
     """
     Returns the UUIDs of all funnel systems.
+    The catalog only changes when an admin edits it, so the response body is
+    rendered once per catalog version and served from memory.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        systems = SystemTemplate.objects.all()
-        serializer = SystemTemplateSerializer(systems, many=True)
-        return Response(serializer.data)
+        etag, content = get_catalog()
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return set_etag(
+            HttpResponse(content, content_type=ApiORJSONRenderer.media_type), etag
+        )
 
 
 class CopyJobViewSet(viewsets.ModelViewSet):
     http_method_names = ["get"]
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
     lookup_field = "uuid"
 
     def get_queryset(self):
-        return CopyJob.objects.filter(user=self.request.user)
+        queryset = CopyJob.objects.filter(user=self.request.user)
+        if self.action == "list":
+            # Row jobs of a client file are listed under their parent job
+            queryset = queryset.filter(parent__isnull=True)
+        elif self.action == "retrieve":
+            # ETag inputs, read with the job itself
+            queryset = queryset.annotate(
+                copy_count=Count("generated_copies"),
+                copies_updated_at=Max("generated_copies__updated_at"),
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
             return CopyJobCreateSerializer
         return CopyJobStatusSerializer
 
+    @swagger_auto_schema(
+        operation_description=(
+            "Get a job's status and results. Send the ETag of the previous "
+            "response as If-None-Match to get 304 Not Modified while nothing changed."
+        ),
+        responses={200: CopyJobStatusSerializer(), 304: "Not Modified", 404: "Not Found"},
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Polled by clients while a job runs. The ETag is derived from the
+        job's and its pages' update times and page count, so unchanged jobs
+        are answered before their results are loaded or serialized.
+        """
+        job = self.get_object()
+        etag = make_etag(
+            request, job.uuid, job.updated_at, job.copy_count, job.copies_updated_at
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        serializer = self.get_serializer(job)
+        return set_etag(Response(serializer.data), etag)
+
     @swagger_auto_schema(
         operation_description="Create a new CopyJob with optional file upload.",
         request_body=CopyJobCreateSerializer,
@@ -72,6 +140,293 @@ class CopyJobViewSet(viewsets.ModelViewSet):
         response_serializer = CopyJobStatusSerializer(instance)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    @swagger_auto_schema(
+        operation_description=(
+            "List the row jobs of a job created from a client file, one per "
+            "CSV row, newest first."
+        ),
+        responses={200: CopyJobStatusSerializer(many=True), 404: "Not Found"},
+    )
+    @action(detail=True, methods=["get"])
+    def rows(self, request, *args, **kwargs):
+        job = self.get_object()
+        page = self.paginate_queryset(job.row_jobs.all())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Get the job's structured copy, per page, as sections and components. "
+            "Optionally filtered by page UUID and section name."
+        ),
+        manual_parameters=[
+            openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("section", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+        responses={200: "Structured copy per page", 404: "Not Found"},
+    )
+    @action(detail=True, methods=["get"])
+    def sections(self, request, *args, **kwargs):
+        """
+        Serves AdCopy.copy_json as stored, in page plan order, without
+        loading model instances or running nested serializers.
+        """
+        job = self.get_object()
+        copies = AdCopy.objects.filter(
+            copy_job=job,
+            status=Status.COMPLETED,
+            page__funnel__systemfunnelassociation__system_id=job.system_id,
+        ).order_by(
+            "page__funnel__systemfunnelassociation__order_in_system",
+            "page__order_in_funnel",
+            "page_image__order",
+        )
+        if request.query_params.get("page"):
+            try:
+                copies = copies.filter(page=uuid.UUID(request.query_params["page"]))
+            except ValueError:
+                raise ValidationError({"page": "Must be a valid UUID."})
+
+        section = request.query_params.get("section")
+        pages = []
+        for copy in copies.values("page", "page_image", "copy_json").iterator():
+            components = copy["copy_json"].get("components")
+            if not components:
+                continue
+            if section:
+                components = [c for c in components if c["section"] == section]
+                if not components:
+                    continue
+            pages.append(
+                {
+                    "page": copy["page"],
+                    "page_image": copy["page_image"],
+                    "components": components,
+                }
+            )
+        return Response(pages)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Get the job's progress: status, pages total/done/failed, the latest "
+            "finished page and an ETA in seconds. Cheap enough to poll; "
+            "the stream endpoint pushes the same data as 'progress' events."
+        ),
+        responses={200: "Job progress", 404: "Not Found"},
+    )
+    @action(detail=True, methods=["get"])
+    def progress(self, request, *args, **kwargs):
+        """
+        Served from the progress kept in Redis by the job's tasks, so polling
+        does not query the job or its ad copies. Jobs without recorded
+        progress (not started yet, or expired) fall back to the job status.
+        """
+        try:
+            job_uuid = uuid.UUID(kwargs["uuid"])
+        except ValueError:
+            raise NotFound()
+
+        owner, progress = get_progress(job_uuid)
+        if progress is not None:
+            if owner != str(request.user.pk):
+                raise NotFound()
+            return Response(progress)
+
+        job_status = (
+            self.get_queryset()
+            .filter(uuid=job_uuid)
+            .values_list("status", flat=True)
+            .first()
+        )
+        if job_status is None:
+            raise NotFound()
+        return Response(
+            {
+                "status": job_status,
+                "total": None,
+                "done": None,
+                "failed": None,
+                "latest_page": None,
+                "eta_seconds": None,
+                "updated_at": None,
+            }
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Stream the job's copy as Server-Sent Events while it is generated: "
+            "a 'status' event, then 'delta' (copy chunk for a page), 'page' "
+            "(page finished), 'progress' and finally 'done' events."
+        ),
+        responses={200: "text/event-stream"},
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        renderer_classes=[EventStreamRenderer, ApiORJSONRenderer],
+    )
+    def stream(self, request, *args, **kwargs):
+        """
+        The event stream is an async iterator, so it is only relayed live
+        when the project is served through the ASGI app (config/asgi.py).
+        """
+        job = self.get_object()
+        response = StreamingHttpResponse(
+            job_event_stream(job.uuid), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class AdCopyViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Generated ad copies of the user's jobs.
+    Single sections of a page can be regenerated without rerunning the job.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = AdCopyGenerationSerializer
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return AdCopy.objects.filter(copy_job__user=self.request.user)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Regenerate one section of a page's structured copy. The section is "
+            "rewritten in the background with the job's client data and the rest "
+            "of the page as context; retrieve the ad copy to see the result."
+        ),
+        request_body=SectionRegenerateSerializer,
+        responses={202: "Regeneration queued", 400: "Validation Error"},
+    )
+    @action(detail=True, methods=["post"])
+    def regenerate(self, request, *args, **kwargs):
+        ad_copy = self.get_object()
+        serializer = SectionRegenerateSerializer(
+            data=request.data, context={"ad_copy": ad_copy}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        task = regenerate_ad_copy_section.delay(
+            str(ad_copy.uuid),
+            serializer.validated_data["section"],
+            serializer.validated_data["instructions"],
+        )
+        return Response(
+            {
+                "ad_copy": ad_copy.uuid,
+                "section": serializer.validated_data["section"],
+                "task_id": task.id,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ClientUploadViewSet(
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """
+    Chunked, resumable uploads of large client files.
+
+    Flow:
+    1. POST the filename, total size and optional SHA-256 to start an upload.
+    2. PUT the file's bytes in order to chunk/?offset=<bytes received so far>,
+       as raw request bodies. A chunk that is cut off or fails its checksum is
+       discarded; send it again. After an interruption, GET the upload to
+       read the offset to continue from.
+    3. POST complete/, then pass the upload's UUID as `upload` when creating
+       a project or copy job.
+    Chunks are streamed to storage as they arrive, never buffered whole.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    serializer_class = ClientUploadSerializer
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return ClientUpload.objects.filter(user=self.request.user)
+
+    @swagger_auto_schema(
+        operation_description="Start a chunked upload of a CSV client file.",
+        request_body=ClientUploadSerializer,
+        responses={201: ClientUploadSerializer(), 400: "Validation Error"},
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = start_upload(request.user, **serializer.validated_data)
+        return Response(
+            self.get_serializer(upload).data, status=status.HTTP_201_CREATED
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Append a chunk, sent as the raw request body, at the given offset. "
+            "Answers 409 with the expected offset when the offset is not where "
+            "the upload left off."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "offset", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True
+            ),
+            openapi.Parameter(
+                "checksum",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Optional SHA-256 of the chunk, hex encoded",
+            ),
+        ],
+        responses={200: ClientUploadSerializer(), 400: "Invalid Chunk", 409: "Wrong Offset or Busy"},
+    )
+    @action(detail=True, methods=["put"])
+    def chunk(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params["offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({"offset": "Must be an integer."})
+        if offset < 0 or length <= 0:
+            raise ValidationError("Send a non-empty chunk at a non-negative offset.")
+
+        try:
+            # request.stream reads the body as it arrives; request.data
+            # would make DRF parse, and buffer, the whole chunk first.
+            upload = append_chunk(
+                upload.uuid,
+                request.stream,
+                offset,
+                length,
+                request.query_params.get("checksum", ""),
+            )
+        except UploadOffsetError as e:
+            return Response(
+                {"detail": str(e), "offset": e.offset}, status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            raise ValidationError({"detail": str(e)})
+        return Response(self.get_serializer(upload).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Finish an upload once all bytes arrived, verifying the file's checksum."
+        ),
+        request_body=no_body,
+        responses={200: ClientUploadSerializer(), 400: "Incomplete or Corrupt"},
+    )
+    @action(detail=True, methods=["post"])
+    def complete(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            upload = complete_upload(upload.uuid)
+        except UploadError as e:
+            raise ValidationError({"detail": str(e)})
+        return Response(self.get_serializer(upload).data)
+
 
 class ProjectViewSet(viewsets.ModelViewSet):
     """
@@ -89,10 +444,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
     lookup_field = "uuid"
 
     def get_queryset(self):
-        return Project.objects.filter(user=self.request.user)
+        queryset = Project.objects.filter(user=self.request.user)
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.select_related("copy_job__system")
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -100,18 +459,57 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return ProjectSerializer
 
     @swagger_auto_schema(
-        operation_description="List all projects for the authenticated user.",
-        responses={200: ProjectSerializer(many=True)},
+        operation_description=(
+            "List all projects for the authenticated user. Send the ETag of the "
+            "previous response as If-None-Match to get 304 Not Modified while "
+            "nothing changed."
+        ),
+        responses={200: ProjectSerializer(many=True), 304: "Not Modified"},
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        """
+        The ETag is derived from the page's projects, copy jobs and systems,
+        read in the single page query, and the cursors of the neighbouring
+        pages; that is everything the listed fields come from.
+        """
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        etag = make_etag(
+            request,
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+            *(
+                (
+                    project.uuid,
+                    project.updated_at,
+                    project.copy_job and project.copy_job.updated_at,
+                    project.copy_job and project.copy_job.system.updated_at,
+                )
+                for project in page
+            ),
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        serializer = self.get_serializer(page, many=True)
+        return set_etag(self.get_paginated_response(serializer.data), etag)
 
     @swagger_auto_schema(
         operation_description="Retrieve a project by its UUID.",
-        responses={200: ProjectSerializer()},
+        responses={200: ProjectSerializer(), 304: "Not Modified"},
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        project = self.get_object()
+        job = project.copy_job
+        etag = make_etag(
+            request,
+            project.uuid,
+            project.updated_at,
+            job and job.updated_at,
+            job and job.system.updated_at,
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        serializer = self.get_serializer(project)
+        return set_etag(Response(serializer.data), etag)
 
     @swagger_auto_schema(
         operation_description=(
@@ -3,6 +3,10 @@ ASGI config for bizlaunch project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this app (e.g. gunicorn with uvicorn workers) for
+the Server-Sent Events endpoints such as ``api/copy/jobs/<uuid>/stream/``,
+which relay async streams that WSGI servers would buffer.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
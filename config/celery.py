@@ -1,7 +1,7 @@
 import os
 
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, worker_process_init
 
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.prod")
@@ -24,5 +24,14 @@ def config_loggers(*args, **kwargs):
     dictConfig(settings.LOGGING)
 
 
+@worker_process_init.connect
+def init_worker_process(*args, **kwargs):
+    # Build the shared ad copy chain (and its HTTP client) once per worker
+    # process instead of once per page.
+    from bizlaunch.funnels.chains import init_adcopy_chains
+
+    init_adcopy_chains()
+
+
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
@@ -15,6 +15,7 @@ from datetime import timedelta
 from pathlib import Path
 
 from decouple import Csv, config
+from kombu import Queue
 
 # Set the project base directory
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -73,7 +74,6 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "bizlaunch.core.response_middleware.ApiResponseMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -143,6 +143,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",  # Default permission for authenticated access
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "bizlaunch.core.renderers.ApiORJSONRenderer",  # Wraps API responses in the standard envelope
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "bizlaunch.core.parsers.ORJSONParser",  # Uses orjson when installed
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
@@ -383,5 +392,158 @@ CACHES = {
 CELERY_BROKER_URL = f"{REDIS_URL}/0"  # URL for Redis
 CELERY_ACCEPT_CONTENT = ["json"]  # Accepted content types
 CELERY_TASK_SERIALIZER = "json"  # Use JSON for task serialization
+# Result backend is required for chords (used by the "fanout" execution mode)
+CELERY_RESULT_BACKEND = config("CELERY_RESULT_BACKEND", default=f"{REDIS_URL}/0")
+# Short interactive tasks (section regeneration) get their own queue, so they
+# do not wait behind the page tasks of whole copy jobs. Workers started
+# without -Q consume both queues; run a dedicated `-Q priority` worker to
+# reserve capacity for them.
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+CELERY_TASK_QUEUES = (Queue("priority"), Queue("celery"))
+CELERY_TASK_ROUTES = {
+    "bizlaunch.funnels.tasks.regenerate_ad_copy_section": {"queue": "priority"},
+}
+# Periodic tasks, run by `celery -A config beat`
+CELERY_BEAT_SCHEDULE = {
+    "submit-copy-batches": {
+        "task": "bizlaunch.funnels.tasks.submit_copy_batches",
+        "schedule": config("ADCOPY_BATCH_SUBMIT_INTERVAL", default=60 * 10, cast=int),
+    },
+    "poll-copy-batches": {
+        "task": "bizlaunch.funnels.tasks.poll_copy_batches",
+        "schedule": config("ADCOPY_BATCH_POLL_INTERVAL", default=60 * 5, cast=int),
+    },
+}
+
+# Copy jobs
+# ------------------------------------------------------------------------------
+# How process_copy_job generates the pages of a job:
+# - "sequential": one page after another inside the job task
+# - "fanout": one Celery subtask per page, joined by a chord finalizer
+# - "async": all pages concurrently on one worker, each an ainvoke of the
+#   chain, with at most COPY_JOB_ASYNC_CONCURRENCY in flight
+COPY_JOB_EXECUTION_MODE = config("COPY_JOB_EXECUTION_MODE", default="sequential")
+# Maximum number of in-flight model requests per job in "async" mode,
+# enforced by a semaphore in chains.agenerate_ad_copies
+COPY_JOB_ASYNC_CONCURRENCY = config("COPY_JOB_ASYNC_CONCURRENCY", default=4, cast=int)
+# Live copy output published to Redis pub/sub and served as Server-Sent
+# Events by api/copy/jobs/<uuid>/stream/ (needs the ASGI app)
+COPY_JOB_STREAM_ENABLED = config("COPY_JOB_STREAM_ENABLED", default=True, cast=bool)
+COPY_JOB_STREAM_REDIS_URL = config("COPY_JOB_STREAM_REDIS_URL", default=f"{REDIS_URL}/0")
+# Token deltas are batched and published at most this often, in seconds
+COPY_JOB_STREAM_FLUSH_INTERVAL = config("COPY_JOB_STREAM_FLUSH_INTERVAL", default=0.1, cast=float)
+# Seconds between keepalive comments and maximum lifetime of a stream
+COPY_JOB_STREAM_KEEPALIVE = config("COPY_JOB_STREAM_KEEPALIVE", default=15, cast=int)
+COPY_JOB_STREAM_TIMEOUT = config("COPY_JOB_STREAM_TIMEOUT", default=60 * 30, cast=int)
+# A job is processed by one task at a time; further tasks for it are no-ops
+# while it holds its lock. The task refreshes the lock every third of this
+# many seconds; the lock of a killed worker expires after it.
+COPY_JOB_LOCK_TIMEOUT = config("COPY_JOB_LOCK_TIMEOUT", default=120, cast=int)
+# Seconds job progress (pages done/total, latest page, ETA) is kept in Redis
+COPY_JOB_PROGRESS_TTL = config("COPY_JOB_PROGRESS_TTL", default=60 * 60 * 24, cast=int)
+# Jobs uploaded with a client CSV file get one row job per row. The file is
+# streamed from storage and row jobs are created this many at a time...
+COPY_JOB_CSV_BATCH_SIZE = config("COPY_JOB_CSV_BATCH_SIZE", default=100, cast=int)
+# ...while fewer than this many row jobs of the file are waiting or running.
+# Otherwise ingestion checks again after the poll interval, in seconds.
+COPY_JOB_CSV_MAX_IN_FLIGHT = config("COPY_JOB_CSV_MAX_IN_FLIGHT", default=200, cast=int)
+COPY_JOB_CSV_POLL_INTERVAL = config("COPY_JOB_CSV_POLL_INTERVAL", default=15, cast=int)
+# Rows beyond this are ignored; longer values make a row invalid
+COPY_JOB_CSV_MAX_ROWS = config("COPY_JOB_CSV_MAX_ROWS", default=10000, cast=int)
+COPY_JOB_CSV_MAX_VALUE_LENGTH = config("COPY_JOB_CSV_MAX_VALUE_LENGTH", default=2000, cast=int)
+# Chunked client file uploads (api/copy/uploads/), sizes in bytes
+CLIENT_UPLOAD_MAX_SIZE = config("CLIENT_UPLOAD_MAX_SIZE", default=500 * 1024 * 1024, cast=int)
+CLIENT_UPLOAD_MAX_CHUNK_SIZE = config("CLIENT_UPLOAD_MAX_CHUNK_SIZE", default=8 * 1024 * 1024, cast=int)
+# A chunk still being written after this many seconds is considered abandoned
+# and may be sent again
+CLIENT_UPLOAD_CHUNK_TIMEOUT = config("CLIENT_UPLOAD_CHUNK_TIMEOUT", default=60 * 10, cast=int)
+
+# Funnel catalog
+# ------------------------------------------------------------------------------
+# api/copy/systems/ is rendered once per catalog version and stored in
+# CACHES["default"]; saving or deleting a system, funnel, funnel association
+# or page template starts a new version. Each process serves its in-memory
+# copy for this many seconds before checking the version again.
+FUNNEL_CATALOG_VERSION_CHECK_INTERVAL = config(
+    "FUNNEL_CATALOG_VERSION_CHECK_INTERVAL", default=1.0, cast=float
+)
+FUNNEL_CATALOG_CACHE_TIMEOUT = config("FUNNEL_CATALOG_CACHE_TIMEOUT", default=60 * 60 * 24, cast=int)
+
+# Ad copy LLM
+# ------------------------------------------------------------------------------
+ADCOPY_MODEL = config("ADCOPY_MODEL", default="gpt-4o")
+# "openai" or "fake" (offline stand-in for tests and benchmarks)
+ADCOPY_LLM_BACKEND = config("ADCOPY_LLM_BACKEND", default="openai")
+# Simulated per-request latency of the fake backend, in seconds
+ADCOPY_FAKE_LATENCY = config("ADCOPY_FAKE_LATENCY", default=0.5, cast=float)
+# Content-addressed response cache, stored in CACHES["default"]
+ADCOPY_CACHE_ENABLED = config("ADCOPY_CACHE_ENABLED", default=True, cast=bool)
+ADCOPY_CACHE_TIMEOUT = config("ADCOPY_CACHE_TIMEOUT", default=60 * 60 * 24 * 7, cast=int)
+# Responses larger than this many bytes are not cached
+ADCOPY_CACHE_MAX_ENTRY_SIZE = config("ADCOPY_CACHE_MAX_ENTRY_SIZE", default=64 * 1024, cast=int)
+# Page screenshots are downsized to what the model actually sees and
+# re-encoded before being sent; variants are cached in file storage.
+ADCOPY_IMAGE_PREPROCESS = config("ADCOPY_IMAGE_PREPROCESS", default=True, cast=bool)
+ADCOPY_IMAGE_FORMAT = config("ADCOPY_IMAGE_FORMAT", default="JPEG")  # "JPEG" or "WEBP"
+ADCOPY_IMAGE_QUALITY = config("ADCOPY_IMAGE_QUALITY", default=85, cast=int)
+# "low", "high" or "auto"
+ADCOPY_IMAGE_DETAIL = config("ADCOPY_IMAGE_DETAIL", default="auto")
+# Pages with a component schema (PageImage.components) get JSON copy per
+# component, validated and stored in AdCopy.copy_json
+ADCOPY_STRUCTURED_OUTPUT = config("ADCOPY_STRUCTURED_OUTPUT", default=True, cast=bool)
+
+# Model routing: each page goes to the model of the first rule it meets,
+# or to ADCOPY_MODEL. Rule conditions, all optional (see routing.py):
+# - "priority": generation priorities, "high" (section regeneration),
+#   "normal" (copy jobs) or "low" (batch mode)
+# - "layouts": keywords, one of which PageTemplate.layout must contain
+# - "max_components": most components in the page's schema
+# Latency and cost per rule are shown by `manage.py model_route_stats`.
+ADCOPY_ROUTING_ENABLED = config("ADCOPY_ROUTING_ENABLED", default=True, cast=bool)
+ADCOPY_FAST_MODEL = config("ADCOPY_FAST_MODEL", default="gpt-4o-mini")
+ADCOPY_MODEL_ROUTES = [
+    {"name": "interactive", "model": ADCOPY_MODEL, "priority": ["high"]},
+    {
+        "name": "simple-layout",
+        "model": ADCOPY_FAST_MODEL,
+        "layouts": ["thank you", "confirmation", "conformation", "calendar"],
+    },
+    {"name": "few-components", "model": ADCOPY_FAST_MODEL, "max_components": 3},
+]
+# USD per million tokens: input, cached input, output
+ADCOPY_MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+# Retries with jittered exponential backoff for retryable model errors
+ADCOPY_RETRY_ATTEMPTS = config("ADCOPY_RETRY_ATTEMPTS", default=4, cast=int)
+ADCOPY_RETRY_INITIAL_DELAY = config("ADCOPY_RETRY_INITIAL_DELAY", default=1.0, cast=float)
+ADCOPY_RETRY_MAX_DELAY = config("ADCOPY_RETRY_MAX_DELAY", default=30.0, cast=float)
+# Per-model circuit breaker: consecutive failures before calls fast-fail,
+# and for how many seconds
+ADCOPY_CIRCUIT_FAILURE_THRESHOLD = config("ADCOPY_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+ADCOPY_CIRCUIT_RESET_TIMEOUT = config("ADCOPY_CIRCUIT_RESET_TIMEOUT", default=60, cast=int)
+# Batch mode (CopyJob.use_batch): pages are collected into provider batch
+# files, generated offline within 24h at a lower price, and ingested when
+# the batch finishes. Submission and polling run on the beat schedule.
+# "bizlaunch.funnels.batch.FileSystemBatchBackend" is a local stand-in.
+ADCOPY_BATCH_BACKEND = config(
+    "ADCOPY_BATCH_BACKEND", default="bizlaunch.funnels.batch.OpenAIBatchBackend"
+)
+ADCOPY_BATCH_FAKE_DIR = config("ADCOPY_BATCH_FAKE_DIR", default=str(BASE_DIR / "batches"))
+# Maximum requests per batch file (the provider limit is 50,000)
+ADCOPY_BATCH_MAX_REQUESTS = config("ADCOPY_BATCH_MAX_REQUESTS", default=50000, cast=int)
+
+# OpenAI rate limiting
+# ------------------------------------------------------------------------------
+# Token buckets in Redis shared by all workers; calls wait for budget
+# instead of failing with 429s.
+OPENAI_RATE_LIMIT_ENABLED = config("OPENAI_RATE_LIMIT_ENABLED", default=True, cast=bool)
+OPENAI_RATE_LIMIT_REDIS_URL = config("OPENAI_RATE_LIMIT_REDIS_URL", default=f"{REDIS_URL}/2")
+OPENAI_RATE_LIMIT_RPM = config("OPENAI_RATE_LIMIT_RPM", default=500, cast=int)
+OPENAI_RATE_LIMIT_TPM = config("OPENAI_RATE_LIMIT_TPM", default=30000, cast=int)
+# Completion tokens reserved per call when estimating its token usage
+OPENAI_RATE_LIMIT_COMPLETION_TOKENS = config("OPENAI_RATE_LIMIT_COMPLETION_TOKENS", default=1000, cast=int)
 
 DELAY_EMAIL = False
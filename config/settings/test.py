@@ -0,0 +1,75 @@
+"""
+With these settings, tests run faster and offline.
+"""
+
+import os
+import tempfile
+
+# Values base.py reads without a default; tests never reach these services.
+os.environ.setdefault("DJANGO_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from .base import *  # noqa: E402, F403
+
+# GENERAL
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#test-runner
+TEST_RUNNER = "django.test.runner.DiscoverRunner"
+
+# PASSWORDS
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# CACHES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "",
+    },
+}
+
+# EMAIL
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# MEDIA
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#media-root
+MEDIA_ROOT = tempfile.mkdtemp(prefix="bizlaunch-test-media-")
+
+# STATIC
+# ------------------------------------------------------------------------------
+# No collectstatic manifest is built for tests.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Celery
+# ------------------------------------------------------------------------------
+# Tasks run in the calling process; chords need a result backend.
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_RESULT_BACKEND = "cache+memory://"
+
+# Ad copy LLM
+# ------------------------------------------------------------------------------
+# The offline stand-in model, answering immediately. Redis-backed features
+# (rate limits, streaming, progress, metrics) are served by fakeredis, see
+# bizlaunch/conftest.py.
+ADCOPY_LLM_BACKEND = "fake"
+ADCOPY_FAKE_LATENCY = 0.0
+ADCOPY_BATCH_BACKEND = "bizlaunch.funnels.batch.FileSystemBatchBackend"
+ADCOPY_BATCH_FAKE_DIR = tempfile.mkdtemp(prefix="bizlaunch-test-batches-")
+ADCOPY_RETRY_INITIAL_DELAY = 0.0
+ADCOPY_RETRY_MAX_DELAY = 0.0
+OPENAI_RATE_LIMIT_ENABLED = False